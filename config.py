@@ -17,3 +17,89 @@ if not all([DEEPGRAM_API_KEY, GROQ_API_KEY, ENCRYPTION_KEY]):
 
 # Configuraciones no secretas
 EDGE_VOICE = "es-CO-SalomeNeural"
+
+# Síntesis por frases: frases sintetizándose a la vez y longitud mínima de cada frase
+TTS_PIPELINE = {
+    "max_concurrency": 3,
+    "min_sentence_chars": 20,
+}
+TTS_TIMEOUT_S = 60.0
+
+# Ventana de contexto del LLM: tokens máximos del prompt, longitud del resumen de la historia
+# antigua y fracción del espacio que queda para la historia literal tras resumir
+CONTEXT_WINDOW = {
+    "token_budget": 3000,
+    "summary_max_tokens": 300,
+    "fold_target": 0.5,
+}
+
+# Extracción de memoria en segundo plano: turnos por llamada al LLM, espera máxima del lote
+# y longitud mínima (en palabras) de un turno para analizarlo
+MEMORY_WORKER = {
+    "max_batch_turns": 4,
+    "max_wait_s": 20.0,
+    "min_words": 3,
+}
+
+# Presupuesto de CPU del análisis facial (en fracciones de un núcleo)
+FACIAL_CPU_BUDGET_PER_SESSION = 0.5
+FACIAL_TOTAL_CPU_BUDGET = max(1, (os.cpu_count() or 2) // 2)
+FACIAL_MIN_FRAME_INTERVAL = 2
+FACIAL_MAX_FRAME_INTERVAL = 60
+
+# Sesión de ONNX Runtime del modelo de emoción vocal.
+# Pocos hilos por sesión: con varias sesiones concurrentes, más hilos sólo compiten por los mismos núcleos.
+VOICE_ONNX_SESSION = {
+    "intra_op_threads": min(4, max(1, (os.cpu_count() or 2) // 2)),
+    "inter_op_threads": 1,
+    "execution_mode": "sequential",
+    "graph_optimization_level": "all",
+}
+# El grafo optimizado con nivel "all" puede incluir optimizaciones propias del hardware: la caché es local a cada máquina.
+VOICE_ONNX_CACHE_DIR = os.path.join("ai_resources", "models", "voice_emotion", "optimized")
+VOICE_WARMUP_LENGTHS_S = (1.0, 5.0, 10.0)
+
+# Detección de actividad de voz previa a la transcripción y al análisis vocal (ver EnergyVAD)
+VOICE_VAD = {
+    "threshold_db": 12.0,
+    "min_energy_db": -50.0,
+    "min_speech_ms": 150.0,
+    "min_silence_ms": 300.0,
+    "padding_ms": 150.0,
+}
+
+# Servicio de micro-lotes de emoción vocal compartido por todas las sesiones.
+# Cada worker usa los hilos de VOICE_ONNX_SESSION: workers * intra_op_threads no debería superar los núcleos.
+VOICE_SERVICE = {
+    "max_batch_size": 8,
+    "max_wait_ms": 15.0,
+    "num_workers": 1,
+    "max_queue_size": 32,
+}
+VOICE_SERVICE_TIMEOUT_S = 30.0
+
+# Formato del audio que se sube para transcribir: "flac" (sin pérdidas), "opus" (más pequeño, con pérdidas) o "wav"
+TRANSCRIPTION_UPLOAD_FORMAT = "flac"
+
+# Cliente del LLM: modelos en orden de preferencia (los siguientes son de respaldo), plazo total por
+# llamada, tiempo máximo por intento, reintentos por modelo con espera exponencial con jitter y
+# petición duplicada ("hedge") si la primera tarda más que el p95 reciente del modelo
+LLM_CLIENT = {
+    "models": ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"],
+    "deadline_s": 20.0,
+    "attempt_timeout_s": 8.0,
+    "max_retries": 2,
+    "backoff_base_s": 0.25,
+    "backoff_max_s": 2.0,
+    "hedge": True,
+    "hedge_quantile": 0.95,
+    "hedge_min_delay_s": 0.3,
+    "hedge_default_delay_s": 1.5,
+}
+
+# Endpoint de Groq (None = el del SDK; se puede apuntar a un servidor local de pruebas)
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+
+# Endpoints de Deepgram (se pueden apuntar a un servidor local de pruebas)
+DEEPGRAM_API_URL = os.getenv("DEEPGRAM_API_URL", "https://api.deepgram.com/v1/listen")
+DEEPGRAM_LIVE_URL = os.getenv("DEEPGRAM_LIVE_URL", "wss://api.deepgram.com/v1/listen")
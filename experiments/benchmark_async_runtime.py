@@ -0,0 +1,148 @@
+# experiments/benchmark_async_runtime.py
+
+"""
+Mide el coste por turno de abrir conexiones nuevas frente al bucle persistente:
+
+- "asyncio.run + sesión nueva": lo que hacían `run_transcription` y
+  `run_synthesis`: un bucle y una conexión TCP+TLS nuevos en cada llamada.
+- "bucle persistente + pool": `run_async` con la sesión HTTP compartida de
+  `src/utils/async_runtime.py`; la conexión se abre una vez y se reutiliza.
+
+Por defecto usa un servidor HTTPS local con certificado autofirmado (sin red),
+así que la diferencia medida es sólo la creación del bucle y el handshake
+TCP+TLS. Con `--url` se mide contra un servicio real (la latencia de red hace
+que el ahorro por turno sea mayor).
+
+Uso:
+    python experiments/benchmark_async_runtime.py --requests 50
+    python experiments/benchmark_async_runtime.py --url https://api.deepgram.com/v1/projects
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import datetime
+import ssl
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import aiohttp
+from aiohttp import web
+from src.utils.async_runtime import AsyncRuntime
+
+def _self_signed_context():
+    """Contexto TLS de servidor con un certificado autofirmado para 127.0.0.1."""
+    import ipaddress
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number()).not_valid_before(now)
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+            .sign(key, hashes.SHA256()))
+    with tempfile.TemporaryDirectory() as tmp:
+        cert_path, key_path = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+        with open(cert_path, "wb") as f:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+        with open(key_path, "wb") as f:
+            f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert_path, key_path)
+    return context
+
+def start_local_server():
+    """Servidor HTTPS en un hilo propio que responde un JSON pequeño. Devuelve la URL."""
+    ready = threading.Event()
+    state = {}
+
+    async def handler(request):
+        return web.json_response({"ok": True})
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=_self_signed_context())
+        loop.run_until_complete(site.start())
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait(10)
+    return f"https://127.0.0.1:{state['port']}/"
+
+async def _request(session, url, ssl_option):
+    async with session.get(url, ssl=ssl_option) as response:
+        await response.read()
+
+async def _fresh_request(url, ssl_option):
+    async with aiohttp.ClientSession() as session:
+        await _request(session, url, ssl_option)
+
+def measure_fresh(url, n, ssl_option):
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        asyncio.run(_fresh_request(url, ssl_option))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def measure_pooled(url, n, ssl_option):
+    runtime = AsyncRuntime(name="benchmark-async")
+
+    async def pooled_request():
+        await _request(await runtime.get_http_session(), url, ssl_option)
+
+    timings = []
+    try:
+        runtime.run(pooled_request())  # la primera llamada abre la conexión, como el primer turno
+        for _ in range(n):
+            start = time.perf_counter()
+            runtime.run(pooled_request())
+            timings.append(time.perf_counter() - start)
+    finally:
+        runtime.close()
+    return timings
+
+def _report(name, timings):
+    timings_ms = sorted(t * 1000 for t in timings)
+    p95 = timings_ms[min(len(timings_ms) - 1, int(0.95 * len(timings_ms)))]
+    print(f"{name:<34} | {statistics.median(timings_ms):>9.2f} | {p95:>9.2f}")
+    return statistics.median(timings_ms)
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de conexión por turno: asyncio.run por llamada vs bucle persistente.")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--url", default=None, help="URL HTTPS real a medir (por defecto, servidor local).")
+    args = parser.parse_args()
+
+    url = args.url or start_local_server()
+    # El certificado local es autofirmado: sólo en ese caso se omite la verificación
+    ssl_option = None if args.url else False
+    print(f"Midiendo {args.requests} peticiones contra {url}\n")
+    print(f"{'Modo':<34} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+    print("-" * 58)
+    fresh = _report("asyncio.run + sesión nueva", measure_fresh(url, args.requests, ssl_option))
+    pooled = _report("bucle persistente + pool", measure_pooled(url, args.requests, ssl_option))
+    print(f"\nAhorro por turno (p50): {fresh - pooled:.2f} ms por llamada externa.")
+
+if __name__ == "__main__":
+    main()
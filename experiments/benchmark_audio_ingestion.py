@@ -0,0 +1,98 @@
+# experiments/benchmark_audio_ingestion.py
+
+"""
+Bytes subidos y tiempo de CPU por turno de la ingesta de audio, antes y después.
+
+- Antes: `audio_bytes.export(format="wav")`, WAV completo a Deepgram y el
+  reconocedor vuelve a leerlo con `soundfile` y a remuestrearlo con `librosa`.
+- Después: `decode_audio_segment` decodifica una vez a float32 a 16 kHz, el VAD
+  recorta el silencio y sólo ese tramo se codifica (FLAC u Opus) para subirlo.
+
+El clip se sintetiza como lo entrega `audiorecorder` (estéreo, 44.1 kHz) con
+silencio al principio y al final, así que no hace falta ningún archivo.
+
+Uso:
+    python experiments/benchmark_audio_ingestion.py --lengths 3 8 15 --repeats 5
+"""
+
+import sys
+import argparse
+import io
+import statistics
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import numpy as np
+import soundfile as sf
+from pydub import AudioSegment
+from src.analysis.voice_activity import EnergyVAD, trim_to_speech
+from src.audio.audio_ingestion import decode_audio_segment, encode_audio
+
+RECORDER_RATE = 44100
+MODEL_RATE = 16000
+
+def synthetic_clip(speech_s: float, silence_s: float = 1.0) -> AudioSegment:
+    """Clip estéreo de 16 bits: silencio, 'voz' (tonos modulados con ruido) y silencio."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(speech_s * RECORDER_RATE)) / RECORDER_RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    voice = envelope * (0.2 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 720 * t)) + rng.normal(0, 0.02, len(t))
+    silence = rng.normal(0, 0.001, int(silence_s * RECORDER_RATE))
+    mono = np.concatenate([silence, voice, silence])
+    stereo = (np.stack([mono, mono], axis=1) * 32767).astype(np.int16)
+    return AudioSegment(stereo.tobytes(), frame_rate=RECORDER_RATE, sample_width=2, channels=2)
+
+def _resample(speech, orig_sr, target_sr):
+    try:
+        import librosa
+        return librosa.resample(speech, orig_sr=orig_sr, target_sr=target_sr)
+    except ImportError:
+        # Sin librosa se aproxima con interpolación lineal (subestima el coste del camino anterior)
+        positions = np.arange(int(len(speech) * target_sr / orig_sr)) * (orig_sr / target_sr)
+        return np.interp(positions, np.arange(len(speech)), speech)
+
+def before(segment):
+    wav_audio_data = segment.export(format="wav").read()
+    speech, samplerate = sf.read(io.BytesIO(wav_audio_data))
+    if speech.ndim > 1:
+        speech = speech.mean(axis=1)
+    speech = _resample(speech, samplerate, MODEL_RATE)
+    return len(wav_audio_data), speech
+
+def after(segment, vad, upload_format):
+    speech = decode_audio_segment(segment, MODEL_RATE)
+    segments = vad.detect(speech, MODEL_RATE)["segments"]
+    upload, _ = encode_audio(trim_to_speech(speech, segments), MODEL_RATE, upload_format)
+    return len(upload), speech
+
+def _cpu_ms(func, repeats):
+    timings, size = [], None
+    for _ in range(repeats):
+        start = time.thread_time()
+        size, _ = func()
+        timings.append((time.thread_time() - start) * 1000)
+    return size, statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta de audio por turno: WAV completo vs decodificación única + FLAC/Opus.")
+    parser.add_argument("--lengths", nargs="+", type=float, default=[3.0, 8.0, 15.0], help="Segundos de voz del clip.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    vad = EnergyVAD()
+    print(f"{'Voz':>5} | {'Camino':<22} | {'Bytes subidos':>13} | {'CPU (ms)':>9}")
+    print("-" * 60)
+    for length_s in args.lengths:
+        segment = synthetic_clip(length_s)
+        rows = [("antes (WAV 44.1k)", lambda: before(segment))]
+        rows += [(f"después ({fmt})", lambda fmt=fmt: after(segment, vad, fmt)) for fmt in ("wav", "flac", "opus")]
+        for name, func in rows:
+            size, cpu_ms = _cpu_ms(func, args.repeats)
+            print(f"{length_s:>4g}s | {name:<22} | {size:>13,} | {cpu_ms:>9.1f}")
+        print("-" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# experiments/benchmark_conversation_turn.py
+
+"""
+Compara la duración de un turno de conversación ejecutado etapa a etapa (como
+hacía main.py antes de `TurnPipeline`) con el grafo de `build_conversation_pipeline`.
+
+Los servicios externos se sustituyen por esperas fijas
+(`tests/standins/conversation_stages.py`): transcripción 0.4 s, emoción vocal
+0.3 s, LLM 0.5 s, TTS 0.3 s, extracción de memoria 0.5 s y 0.05 s por escritura
+en la base de datos. La diferencia medida es sólo la del orden de ejecución.
+
+Uso:
+    python experiments/benchmark_conversation_turn.py --turns 5
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from cryptography.fernet import Fernet
+
+# No se llama a ningún servicio real; config.py exige que las variables existan y la clave debe ser válida
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY"):
+    os.environ.setdefault(variable, "standin")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
+
+from tests.standins.conversation_stages import ConversationStandIns, STAGE_DELAYS_S
+
+# Orden del flujo secuencial anterior
+SEQUENTIAL_ORDER = ("decode", "transcription", "vocal_emotion", "llm", "tts", "save_user", "save_assistant", "memory")
+
+def run_sequential(pipeline, inputs):
+    ctx = dict(inputs)
+    for name in SEQUENTIAL_ORDER:
+        ctx[name] = pipeline.stages[name].func(dict(ctx))
+
+def main():
+    parser = argparse.ArgumentParser(description="Turno secuencial frente al grafo de etapas.")
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    standins = ConversationStandIns().install()
+    pipeline = standins.build_pipeline()
+    print("Tiempos simulados por etapa (s): " + ", ".join(f"{name}={delay}" for name, delay in STAGE_DELAYS_S.items()))
+
+    sequential, critical, complete = [], [], []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        run_sequential(pipeline, standins.turn_inputs())
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        turn = pipeline.run(standins.turn_inputs())
+        critical.append(time.perf_counter() - start)
+        turn.wait_background(timeout=10.0)
+        complete.append(time.perf_counter() - start)
+
+    print(f"\n{'Modo':<34} | {'Mediana (s)':>11}")
+    print("-" * 48)
+    print(f"{'Secuencial (respuesta y guardado)':<34} | {statistics.median(sequential):>11.2f}")
+    print(f"{'Grafo: ruta crítica (respuesta)':<34} | {statistics.median(critical):>11.2f}")
+    print(f"{'Grafo: con etapas de fondo':<34} | {statistics.median(complete):>11.2f}")
+
+if __name__ == "__main__":
+    main()
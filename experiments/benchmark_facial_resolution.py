@@ -0,0 +1,76 @@
+# experiments/benchmark_facial_resolution.py
+
+"""
+Mide la latencia de la detección facial según la resolución de entrada, con y sin
+el preprocesado de `ResolutionAdaptiveDetector`.
+
+Uso:
+    python experiments/benchmark_facial_resolution.py --image cara.jpg --method fer --repeats 10
+Sin --image, se captura un fotograma de la cámara (como experiments/test_fer.py).
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import cv2
+import numpy as np
+from src.analysis.facial_emotion import initialize_detector, ResolutionAdaptiveDetector
+
+RESOLUTIONS = [(640, 360), (854, 480), (1280, 720), (1920, 1080)]
+
+def load_frame(image_path):
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise FileNotFoundError(f"No se pudo leer la imagen '{image_path}'.")
+        return frame
+    cap = cv2.VideoCapture(0)
+    ret, frame = cap.read()
+    cap.release()
+    if not ret:
+        raise RuntimeError("No se pudo capturar imagen de la cámara. Usa --image.")
+    return frame
+
+def time_calls(fn, frame, repeats):
+    fn(frame)  # calentamiento
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(frame)
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la detección facial según la resolución de entrada.")
+    parser.add_argument("--image", help="Imagen con una cara. Por defecto se usa la cámara.")
+    parser.add_argument("--method", default="fer", help="Método de initialize_detector (fer, onnx_fp32, ...).")
+    parser.add_argument("--max-side", type=int, default=480)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    detector = initialize_detector(method=args.method)
+    base_frame = load_frame(args.image)
+
+    print(f"\n{'Resolución':>12} | {'Original (ms)':>14} | {'Reducido (ms)':>14} | {'ROI (ms)':>10} | Caras")
+    print("-" * 70)
+    for width, height in RESOLUTIONS:
+        frame = cv2.resize(base_frame, (width, height))
+        raw_ms = time_calls(detector.detect_emotions, frame, args.repeats)
+
+        downscaled = ResolutionAdaptiveDetector(detector, max_side=args.max_side, use_roi=False)
+        downscaled_ms = time_calls(downscaled.detect_emotions, frame, args.repeats)
+
+        # Con ROI, la primera llamada fija la cara previa y las siguientes detectan alrededor de ella
+        roi = ResolutionAdaptiveDetector(detector, max_side=args.max_side, use_roi=True)
+        roi_ms = time_calls(roi.detect_emotions, frame, args.repeats)
+
+        faces = len(roi.detect_emotions(frame))
+        print(f"{width:>5}x{height:<6} | {raw_ms:>14.1f} | {downscaled_ms:>14.1f} | {roi_ms:>10.1f} | {faces}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# experiments/benchmark_frame_path.py
+
+"""
+Compara la ruta de fotogramas clásica de `recv_queued` (to_ndarray + dibujo +
+from_ndarray en cada fotograma) con la de `FrameOverlay`, midiendo bytes
+reservados por fotograma y tiempo por fotograma.
+
+Uso:
+    python experiments/benchmark_frame_path.py --width 1920 --height 1080 --frames 300 --analyze-every 5
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import av
+import cv2
+import numpy as np
+from src.ui.frame_overlay import FrameOverlay
+
+DETECTION = {"bounding_box": (600, 300, 400, 400), "dominant_emotion": "happy"}
+
+def make_frames(width, height, count):
+    """Fotogramas yuv420p como los que entrega el decodificador de WebRTC."""
+    base = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return [av.VideoFrame.from_ndarray(base, format="bgr24").reformat(format="yuv420p") for _ in range(count)]
+
+def legacy_path(frames, analyze_every, detection):
+    allocated = 0
+    for i, frame in enumerate(frames, start=1):
+        img = frame.to_ndarray(format="bgr24")
+        allocated += img.nbytes
+        if i % analyze_every == 0:
+            analyzed = img.copy()
+            allocated += analyzed.nbytes
+        if detection:
+            (x, y, w, h) = detection["bounding_box"]
+            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(img, detection["dominant_emotion"].capitalize(), (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        av.VideoFrame.from_ndarray(img, format="bgr24")
+        allocated += img.nbytes
+    return allocated
+
+def overlay_path(frames, analyze_every, detection):
+    overlay = FrameOverlay()
+    for i, frame in enumerate(frames, start=1):
+        if i % analyze_every == 0:
+            overlay.to_bgr(frame)
+        overlay.annotate(frame, detection)
+    return overlay.allocated_bytes
+
+def run(name, fn, frames, analyze_every, detection, fps):
+    start = time.perf_counter()
+    allocated = fn(frames, analyze_every, detection)
+    elapsed = time.perf_counter() - start
+    per_frame = allocated / len(frames)
+    print(f"{name:<28} | {per_frame / 1e6:>10.2f} MB/fotograma | {per_frame * fps / 1e6:>8.1f} MB/s a {fps} fps | {elapsed / len(frames) * 1000:>6.2f} ms/fotograma")
+
+def main():
+    parser = argparse.ArgumentParser(description="Tasa de asignación de memoria de la ruta de fotogramas.")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--analyze-every", type=int, default=5)
+    parser.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    frames = make_frames(args.width, args.height, args.frames)
+    print(f"{args.width}x{args.height}, {args.frames} fotogramas, análisis 1 de cada {args.analyze_every}\n")
+    for label, detection in (("sin cara", None), ("con cara", DETECTION)):
+        run(f"clásica ({label})", legacy_path, frames, args.analyze_every, detection, args.fps)
+        run(f"FrameOverlay ({label})", overlay_path, frames, args.analyze_every, detection, args.fps)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# experiments/benchmark_live_transcription.py
+
+"""
+Compara la latencia entre que el usuario deja de hablar y la transcripción final:
+
+- "al soltar": como `run_transcription`, todo el audio se envía de golpe cuando
+  termina la grabación, así que el servidor procesa el clip entero después.
+- "streaming": `LiveTranscriptionSession` envía fragmentos al ritmo de la
+  grabación y el servidor los procesa mientras el usuario habla.
+
+Usa el sustituto local de Deepgram (sin red) con un coste de procesamiento
+simulado de `--processing-rtf` segundos por segundo de audio.
+
+Uso:
+    python experiments/benchmark_live_transcription.py --lengths 2 5 10 --processing-rtf 0.15
+"""
+
+import sys
+import os
+import argparse
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY", "ENCRYPTION_KEY"):
+    os.environ.setdefault(variable, "standin")
+
+import numpy as np
+from tests.standins.deepgram_live import DeepgramLiveStandIn
+from src.analysis.voice_transcription import LiveTranscriptionSession
+
+SAMPLE_RATE = 16000
+CHUNK_S = 0.1
+
+def _script(length_s: float):
+    """Una frase cada 2 s de audio."""
+    ends = list(np.arange(2.0, length_s, 2.0)) + [length_s]
+    return [(float(end), f"Frase número {i + 1} del enunciado de prueba.") for i, end in enumerate(ends)]
+
+def _chunks(length_s: float):
+    samples = (np.random.default_rng(0).normal(0, 0.1, int(length_s * SAMPLE_RATE)) * 32767).astype(np.int16)
+    step = int(CHUNK_S * SAMPLE_RATE)
+    return [samples[i:i + step].tobytes() for i in range(0, len(samples), step)]
+
+def measure(length_s: float, processing_rtf: float, streaming: bool) -> float:
+    """Devuelve los segundos entre el final de la grabación y la transcripción final."""
+    chunks = _chunks(length_s)
+    with DeepgramLiveStandIn(script=_script(length_s), processing_rtf=processing_rtf) as standin:
+        session = LiveTranscriptionSession(sample_rate=SAMPLE_RATE, url=standin.url)
+        if streaming:
+            for chunk in chunks:
+                session.push(chunk)
+                time.sleep(CHUNK_S)
+        else:
+            # La grabación dura lo mismo, pero el audio sólo sale al soltar el botón
+            time.sleep(length_s)
+            for chunk in chunks:
+                session.push(chunk)
+        stopped = time.perf_counter()
+        transcript = session.finish(timeout=60.0)
+        elapsed = time.perf_counter() - stopped
+    if not transcript:
+        raise RuntimeError("El sustituto no devolvió transcripción.")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la transcripción final: envío al soltar vs streaming.")
+    parser.add_argument("--lengths", nargs="+", type=float, default=[2.0, 5.0, 10.0])
+    parser.add_argument("--processing-rtf", type=float, default=0.15)
+    args = parser.parse_args()
+
+    print(f"{'Duración':>9} | {'Al soltar (ms)':>15} | {'Streaming (ms)':>15}")
+    print("-" * 46)
+    for length_s in args.lengths:
+        batch_ms = measure(length_s, args.processing_rtf, streaming=False) * 1000
+        live_ms = measure(length_s, args.processing_rtf, streaming=True) * 1000
+        print(f"{length_s:>8g}s | {batch_ms:>15.0f} | {live_ms:>15.0f}")
+
+if __name__ == "__main__":
+    main()
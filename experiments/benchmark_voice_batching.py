@@ -0,0 +1,64 @@
+# experiments/benchmark_voice_batching.py
+
+"""
+Compara la inferencia segmento a segmento (bucle anterior de `predict`) con la
+inferencia por lotes de `ONNXEmotionRecognizer` (segmentos de la misma longitud)
+para enunciados de 30 s y 60 s, y comprueba que ambas rutas den las mismas
+puntuaciones.
+
+Uso:
+    python experiments/benchmark_voice_batching.py --method onnx_fp32 --wav ejemplo.wav --repeats 5
+Sin --wav se usa ruido sintético (sirve para medir tiempos, no para interpretar emociones).
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import numpy as np
+from src.analysis.voice_emotion import get_recognizer
+
+def load_audio(recognizer, wav_path, seconds):
+    num_samples = int(seconds * recognizer.target_sampling_rate)
+    if wav_path:
+        with open(wav_path, "rb") as f:
+            speech = recognizer._preprocess_audio(f.read())
+        return np.resize(speech, num_samples)
+    return np.random.default_rng(0).normal(0, 0.1, num_samples)
+
+def timed(fn, repeats):
+    fn()  # calentamiento
+    latencies = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        latencies.append(time.perf_counter() - start)
+    return float(np.median(latencies)) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Inferencia por lotes frente al bucle por segmentos.")
+    parser.add_argument("--method", default="onnx_fp32")
+    parser.add_argument("--wav", help="Archivo WAV de referencia (se repite hasta la duración pedida).")
+    parser.add_argument("--chunk-length", type=float, default=10.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    recognizer = get_recognizer(method=args.method)
+    print(f"\n{'Duración':>9} | {'Bucle (ms)':>11} | {'Lote (ms)':>10} | {'Aceleración':>11} | Máx. dif. logits")
+    print("-" * 70)
+    for seconds in (30, 60):
+        speech = load_audio(recognizer, args.wav, seconds)
+        chunks = recognizer._split_chunks(speech, args.chunk_length)
+
+        loop_ms, loop_logits = timed(lambda: np.concatenate([recognizer._predict_logits_batch([c]) for c in chunks]), args.repeats)
+        batch_ms, batch_logits = timed(lambda: recognizer._predict_logits_batch(chunks), args.repeats)
+        max_diff = float(np.abs(loop_logits.mean(axis=0) - batch_logits.mean(axis=0)).max())
+        print(f"{seconds:>8}s | {loop_ms:>11.1f} | {batch_ms:>10.1f} | {loop_ms / batch_ms:>10.2f}x | {max_diff:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# experiments/benchmark_voice_variants.py
+
+"""
+Banco de pruebas de las variantes de `get_recognizer` (onnx_fp32, onnx_dynamic, onnx_static).
+
+Para cada variante, en un proceso aislado, mide:
+- tiempo de carga del modelo y pico de memoria residente (RSS),
+- latencia p50/p95 (tras unas ejecuciones de calentamiento por duración, que no se miden) y factor de tiempo real (RTF = latencia / duración) para
+  enunciados de 1 s a 60 s construidos a partir de los WAV del directorio,
+- concordancia top-1 y divergencia KL media frente a onnx_fp32.
+
+Los resultados se escriben en JSON para elegir la variante de producción con datos.
+
+Uso:
+    python experiments/benchmark_voice_variants.py --wav-dir ai_resources/calibration_data --output data/bench_voice.json
+"""
+
+import sys
+import os
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import platform
+import queue
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import numpy as np
+
+VARIANTS = ["onnx_fp32", "onnx_dynamic", "onnx_static"]
+LENGTHS_S = [1, 2, 5, 10, 30, 60]
+
+def _peak_rss_mb():
+    """Pico de memoria residente del proceso actual, en MB (None si no se puede medir)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa en KB; macOS en bytes
+        return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+def _run_variant(method, wav_files, lengths, repeats, warmup, result_queue):
+    """Se ejecuta en un proceso hijo para que la carga y el RSS de cada variante no se mezclen."""
+    try:
+        from src.analysis.voice_emotion import get_recognizer
+        start = time.perf_counter()
+        recognizer = get_recognizer(method=method)
+        load_time_s = time.perf_counter() - start
+        labels = [recognizer.id2label[i].upper() for i in sorted(recognizer.id2label)]
+
+        sources = []
+        for path in wav_files:
+            with open(path, "rb") as f:
+                sources.append((os.path.basename(path), recognizer._preprocess_audio(f.read())))
+
+        # Las primeras inferencias de cada forma reservan memoria y preparan el grafo; no se miden
+        for length in lengths:
+            utterance = np.resize(sources[0][1], int(length * recognizer.target_sampling_rate))
+            for _ in range(warmup):
+                recognizer.predict_array(utterance)
+
+        latencies = {str(length): [] for length in lengths}
+        scores = {}
+        for name, speech in sources:
+            for length in lengths:
+                # Se repite el audio hasta la duración pedida, de forma determinista
+                utterance = np.resize(speech, int(length * recognizer.target_sampling_rate))
+                predictions = None
+                for _ in range(repeats):
+                    t0 = time.perf_counter()
+                    predictions = recognizer.predict_array(utterance)
+                    latencies[str(length)].append(time.perf_counter() - t0)
+                by_label = {p["label"]: p["score"] for p in predictions}
+                scores[f"{name}|{length}"] = [by_label[label] for label in labels]
+
+        result_queue.put({"method": method, "load_time_s": load_time_s, "peak_rss_mb": _peak_rss_mb(),
+                          "labels": labels, "latencies": latencies, "scores": scores})
+    except Exception as e:
+        result_queue.put({"method": method, "error": str(e)})
+
+def _wait_result(process, result_queue, method, timeout_s):
+    """
+    Espera el resultado del proceso hijo. Si el hijo muere sin enviarlo (p. ej. lo
+    mata el sistema por falta de memoria) o tarda más de `timeout_s`, devuelve un
+    error en vez de bloquear el banco de pruebas.
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            # El hijo pudo enviar el resultado justo antes de terminar
+            try:
+                return result_queue.get(timeout=1.0)
+            except queue.Empty:
+                return {"method": method, "error": f"el proceso terminó sin resultado (código de salida {process.exitcode})"}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {"method": method, "error": f"sin resultado tras {timeout_s:.0f} s; proceso detenido (usa --timeout para ampliarlo)"}
+
+def _kl_divergence(p, q, eps=1e-9):
+    p = np.clip(np.asarray(p), eps, 1.0)
+    q = np.clip(np.asarray(q), eps, 1.0)
+    return float(np.sum(p * np.log(p / q)))
+
+def summarize(raw, reference):
+    summary = {"method": raw["method"], "load_time_s": raw["load_time_s"], "peak_rss_mb": raw["peak_rss_mb"], "lengths": {}}
+    for length, values in raw["latencies"].items():
+        values = np.array(values)
+        summary["lengths"][length] = {
+            "p50_ms": float(np.percentile(values, 50) * 1000),
+            "p95_ms": float(np.percentile(values, 95) * 1000),
+            "rtf_p50": float(np.percentile(values, 50) / float(length)),
+        }
+    if reference is not None:
+        keys = sorted(set(raw["scores"]) & set(reference["scores"]))
+        agree = [np.argmax(raw["scores"][k]) == np.argmax(reference["scores"][k]) for k in keys]
+        kl = [_kl_divergence(reference["scores"][k], raw["scores"][k]) for k in keys]
+        summary["top1_agreement_vs_fp32"] = float(np.mean(agree)) if keys else None
+        summary["kl_divergence_vs_fp32"] = float(np.mean(kl)) if keys else None
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara las variantes ONNX del modelo de emoción vocal.")
+    parser.add_argument("--wav-dir", required=True, help="Directorio con archivos .wav.")
+    parser.add_argument("--variants", nargs="+", default=VARIANTS)
+    parser.add_argument("--lengths", nargs="+", type=float, default=LENGTHS_S, help="Duraciones en segundos.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=2, help="Ejecuciones sin medir por duración antes de las repeticiones.")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="Segundos máximos por variante.")
+    parser.add_argument("--max-files", type=int, default=10)
+    parser.add_argument("--output", default=os.path.join("data", "benchmark_voice_variants.json"))
+    args = parser.parse_args()
+
+    wav_files = sorted(glob.glob(os.path.join(args.wav_dir, "*.wav")))[:args.max_files]
+    if not wav_files:
+        raise SystemExit(f"No se encontraron archivos .wav en '{args.wav_dir}'.")
+
+    # 'spawn' garantiza un proceso limpio por variante (sin modelos heredados del padre)
+    ctx = mp.get_context("spawn")
+    raw_results = {}
+    for method in args.variants:
+        print(f"▶ Midiendo {method} con {len(wav_files)} archivos...")
+        result_queue = ctx.Queue()
+        process = ctx.Process(target=_run_variant,
+                              args=(method, wav_files, args.lengths, args.repeats, args.warmup, result_queue))
+        process.start()
+        raw = _wait_result(process, result_queue, method, args.timeout)
+        process.join()
+        if "error" in raw:
+            print(f"   ❌ {method}: {raw['error']}")
+            continue
+        raw_results[method] = raw
+
+    reference = raw_results.get("onnx_fp32")
+    summaries = [summarize(raw, reference) for raw in raw_results.values()]
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"files": [os.path.basename(p) for p in wav_files], "repeats": args.repeats, "warmup": args.warmup,
+                   "results": summaries}, f, indent=2)
+
+    print(f"\n{'Variante':<14} | {'Carga (s)':>9} | {'RSS (MB)':>8} | {'Top-1':>6} | {'KL':>8} | p50/p95 ms (RTF) por duración")
+    print("-" * 110)
+    for s in summaries:
+        per_length = "  ".join(f"{float(k):g}s:{v['p50_ms']:.0f}/{v['p95_ms']:.0f} ({v['rtf_p50']:.4f})" for k, v in s["lengths"].items())
+        top1 = s.get("top1_agreement_vs_fp32")
+        kl = s.get("kl_divergence_vs_fp32")
+        rss = s["peak_rss_mb"]
+        print(f"{s['method']:<14} | {s['load_time_s']:>9.2f} | {(f'{rss:.0f}' if rss else '-'):>8} | "
+              f"{(f'{top1:.1%}' if top1 is not None else '-'):>6} | {(f'{kl:.4f}' if kl is not None else '-'):>8} | {per_length}")
+    print(f"\nResultados guardados en '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
@@ -11,22 +11,29 @@ if 'logging_configured' not in st.session_state:
     setup_logging()
     st.session_state.logging_configured = True
 
+import atexit
 import logging
-from collections import deque
-import cv2
+import config
 import av
 import threading
 from typing import List
 
 # Importar módulos del proyecto
-from src.analysis.facial_emotion import initialize_detector, analyze_frame_emotions
-from src.analysis.voice_transcription import run_transcription # MODIFICADO
+from src.analysis.facial_emotion import initialize_detector, ResolutionAdaptiveDetector, TrackingFaceDetector
+from src.analysis.inference_worker import FacialInferenceWorker
+from src.analysis.frame_scheduler import AdaptiveFrameScheduler
+from src.analysis.emotion_aggregator import EmotionAggregator
 from src.analysis.voice_emotion import get_recognizer # NUEVO
-from src.chat.llm_client import get_groq_response, extract_memory_from_text
-from src.audio.tts_player import run_synthesis
-from src.chat.prompt_builder import build_llm_prompt, build_memory_extraction_prompt
-from src.database.data_manager import setup_database, start_new_session, save_interaction_encrypted, save_memory_fact, get_all_memory
-from src.ui.components import render_video_feed, render_facial_emotion_component, render_vocal_emotion_component, render_chat_history, render_audio_player
+from src.analysis.inference_service import VoiceEmotionService
+from src.analysis.voice_activity import EnergyVAD
+from src.chat.conversation_turn import build_conversation_pipeline
+from src.chat.turn_pipeline import StageStream
+from src.chat.memory_worker import MemoryExtractionWorker
+from src.chat.context_manager import ConversationContext
+from src.audio.tts_pipeline import SentenceTTSPipeline
+from src.database.data_manager import setup_database, start_new_session, get_all_memory
+from src.ui.frame_overlay import FrameOverlay
+from src.ui.components import render_video_feed, render_facial_emotion_component, render_vocal_emotion_component, render_chat_history, render_streaming_response, render_audio_player
 from audiorecorder import audiorecorder
 
 # --- CONFIGURACIÓN E INICIALIZACIÓN ---
@@ -34,20 +41,59 @@ st.set_page_config(page_title="PsyAI - Sesión en Tiempo Real", layout="wide")
 st.title("🧠 PsyAI - Sesión en Tiempo Real")
 
 # Constantes
-FRAME_SKIP = 5
-BUFFER_SIZE = 10
+# Ventanas de agregación facial en segundos (None = toda la sesión de video)
+EMOTION_WINDOWS = {"corto": 2.0, "medio": 10.0, "sesion": None}
+EMOTION_EMA_ALPHA = 0.3
+# Backend del análisis facial: "fer" (TensorFlow) o "onnx_fp32" / "onnx_dynamic" / "onnx_static"
+FACIAL_METHOD = "fer"
+# Preprocesado previo a la detección: lado máximo en píxeles y región de interés
+DETECTION_MAX_SIDE = 480
+DETECTION_USE_ROI = True
+# Seguimiento de la cara entre detecciones completas de MTCNN
+FACE_TRACKING = True
+REDETECT_EVERY = 10
 
 # Cargar recursos (modelos, conexión DB)
 @st.cache_resource
 def load_resources():
     logging.info("Cargando recursos (modelos, DB)...")
-    facial_detector = initialize_detector()
-    vocal_recognizer = get_recognizer(method="onnx_fp32") # NUEVO: Cargar modelo vocal
+    facial_detector = initialize_detector(method=FACIAL_METHOD)
+    vocal_recognizer = get_recognizer(
+        method="onnx_fp32",
+        session_config=config.VOICE_ONNX_SESSION,
+        optimized_cache_dir=config.VOICE_ONNX_CACHE_DIR,
+        warmup_lengths_s=config.VOICE_WARMUP_LENGTHS_S,
+    )
     setup_database()
     logging.info("Recursos cargados exitosamente.")
     return facial_detector, vocal_recognizer
 
+# Cola de micro-lotes compartida: los turnos concurrentes de varias sesiones se infieren juntos
+@st.cache_resource
+def load_voice_service(_vocal_recognizer):
+    return VoiceEmotionService(_vocal_recognizer, **config.VOICE_SERVICE)
+
+# Extracción de memoria por lotes fuera de la ruta de respuesta, compartida entre sesiones
+@st.cache_resource
+def load_memory_worker():
+    worker = MemoryExtractionWorker(**config.MEMORY_WORKER)
+    # Los turnos aún en cola se extraen antes de salir
+    atexit.register(worker.stop)
+    return worker
+
+# Grafo de etapas del turno: se construye una vez y se comparte entre sesiones
+@st.cache_resource
+def load_conversation_pipeline(_voice_service, _memory_worker, sample_rate):
+    return build_conversation_pipeline(EnergyVAD(**config.VOICE_VAD), _voice_service, sample_rate,
+                                       voice_timeout_s=config.VOICE_SERVICE_TIMEOUT_S,
+                                       upload_format=config.TRANSCRIPTION_UPLOAD_FORMAT,
+                                       tts_timeout_s=config.TTS_TIMEOUT_S,
+                                       memory_worker=_memory_worker)
+
 facial_detector, vocal_recognizer = load_resources()
+voice_service = load_voice_service(vocal_recognizer) if vocal_recognizer is not None else None
+memory_worker = load_memory_worker()
+conversation_pipeline = load_conversation_pipeline(voice_service, memory_worker, vocal_recognizer.target_sampling_rate) if voice_service else None
 
 # --- Estructura Segura para Comunicación entre Hilos ---
 class AnalysisResult:
@@ -72,6 +118,8 @@ if "ai_audio" not in st.session_state:
     st.session_state.ai_audio = None
 if "long_term_memory" not in st.session_state:
     st.session_state.long_term_memory = get_all_memory()
+if "conversation_context" not in st.session_state:
+    st.session_state.conversation_context = ConversationContext(**config.CONTEXT_WINDOW)
 if "analysis_result_container" not in st.session_state:
     st.session_state.analysis_result_container = AnalysisResult()
 if "last_processed_audio" not in st.session_state:
@@ -80,36 +128,58 @@ if "last_processed_audio" not in st.session_state:
 # --- PROCESADOR DE VIDEO ---
 class EmotionProcessor:
     def __init__(self, detector, result_container: AnalysisResult):
-        self.detector = detector
+        # El modelo se comparte entre sesiones; el preprocesado y el rastreador son propios de cada stream.
+        self.detector = ResolutionAdaptiveDetector(detector, max_side=DETECTION_MAX_SIDE, use_roi=DETECTION_USE_ROI)
+        if FACE_TRACKING:
+            self.detector = TrackingFaceDetector(self.detector, redetect_every=REDETECT_EVERY)
         self.result_container = result_container
-        self.frame_counter = 0
-        self.emotion_buffer = deque(maxlen=BUFFER_SIZE)
+        # El intervalo de análisis se adapta a la latencia medida y al número de sesiones activas.
+        self.scheduler = AdaptiveFrameScheduler(
+            cpu_budget_per_session=config.FACIAL_CPU_BUDGET_PER_SESSION,
+            total_cpu_budget=config.FACIAL_TOTAL_CPU_BUDGET,
+            min_interval=config.FACIAL_MIN_FRAME_INTERVAL,
+            max_interval=config.FACIAL_MAX_FRAME_INTERVAL,
+        )
+        self.aggregator = EmotionAggregator(windows=EMOTION_WINDOWS, primary="corto", ema_alpha=EMOTION_EMA_ALPHA)
+        self.last_detection = None
+        self.buffer_lock = threading.Lock()
+        self.overlay = FrameOverlay()
+        # La inferencia corre en su propio hilo para no bloquear el bucle de eventos de WebRTC.
+        self.worker = FacialInferenceWorker(self.detector, on_result=self._on_result)
 
-    def _aggregate_emotions(self):
-        if not self.emotion_buffer: return None
-        avg_scores = {e: sum(d['scores'][e] for d in self.emotion_buffer) / len(self.emotion_buffer) for e in self.emotion_buffer[0]['scores']}
-        dominant_emotions = [d['dominant_emotion'] for d in self.emotion_buffer]
-        most_common_dominant = max(set(dominant_emotions), key=dominant_emotions.count)
-        return {"stable_dominant_emotion": most_common_dominant, "average_scores": avg_scores}
+    def _on_result(self, result):
+        """Callback del worker: se ejecuta en el hilo de inferencia."""
+        latency = self.worker.last_latency
+        if latency is not None:
+            self.scheduler.record_latency(latency)
+        self.result_container.set_data("facial_scheduler_metrics", self.scheduler.get_metrics())
+        if result:
+            with self.buffer_lock:
+                self.last_detection = result
+                self.aggregator.update(result["scores"])
+                aggregated_result = self.aggregator.summary()
+            self.result_container.set_data("facial_emotion", aggregated_result)
+        self.result_container.set_data("facial_worker_metrics", self.worker.get_metrics())
+        self.result_container.set_data("frame_path_metrics", self.overlay.get_metrics())
+        if FACE_TRACKING:
+            self.result_container.set_data("facial_tracking_stats", dict(self.detector.stats))
 
     async def recv_queued(self, frames: List[av.VideoFrame]) -> List[av.VideoFrame]:
         if not frames: return []
         latest_frame = frames[-1]
-        img = latest_frame.to_ndarray(format="bgr24")
-        self.frame_counter += 1
-        if self.frame_counter % FRAME_SKIP == 0:
-            result = analyze_frame_emotions(self.detector, img)
-            if result:
-                self.emotion_buffer.append(result)
-                aggregated_result = self._aggregate_emotions()
-                self.result_container.set_data("facial_emotion", aggregated_result)
-        
-        last_detection = self.emotion_buffer[-1] if self.emotion_buffer else None
-        if last_detection:
-            (x, y, w, h) = last_detection["bounding_box"]
-            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(img, last_detection["dominant_emotion"].capitalize(), (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-        return [av.VideoFrame.from_ndarray(img, format="bgr24")]
+        if self.scheduler.should_analyze():
+            # Sólo los fotogramas analizados se convierten a BGR; el array es nuevo y pasa al worker sin copia.
+            self.worker.submit(self.overlay.to_bgr(latest_frame))
+
+        with self.buffer_lock:
+            last_detection = self.last_detection
+        # Sin detección se devuelve el fotograma original; con ella se dibuja sobre un fotograma de salida reutilizado.
+        return [self.overlay.annotate(latest_frame, last_detection)]
+
+    def on_ended(self):
+        """Llamado por streamlit-webrtc al cerrar el stream."""
+        self.worker.stop()
+        self.scheduler.close()
 
 # --- LAYOUT DE LA UI ---
 if facial_detector is None or vocal_recognizer is None:
@@ -149,56 +219,57 @@ else:
     if len(audio_bytes) > 0 and audio_bytes != st.session_state.last_processed_audio:
         st.session_state.last_processed_audio = audio_bytes
         
+        response_stream = StageStream()
+        # Las frases se sintetizan mientras el LLM sigue generando y suenan en cuanto están listas
+        speech_pipeline = SentenceTTSPipeline(**config.TTS_PIPELINE)
         with st.spinner("Procesando tu voz..."):
-            wav_audio_data = audio_bytes.export(format="wav").read()
-            
-            # 1. Transcribir
-            user_text = run_transcription(wav_audio_data)
-            
-            # 2. NUEVO: Analizar emoción vocal
-            vocal_emotions_result = vocal_recognizer.predict(wav_audio_data)
-            st.session_state.analysis_result_container.set_data("vocal_emotion", {"vocal_emotions": vocal_emotions_result})
-            logging.info(f"Emoción vocal detectada: {vocal_emotions_result[0] if vocal_emotions_result else 'Ninguna'}")
-            
-            if user_text and user_text.strip() != "":
-                facial_emotion_data = st.session_state.analysis_result_container.get_data("facial_emotion")
-                
-                logging.info(f"Usuario transcribió: '{user_text}'")                
-                st.session_state.messages.append({"role": "user", "content": user_text})
-                
-                # Combinar datos de emoción para guardar y para el prompt
-                user_interaction_data = {
-                    "text": user_text,
-                    "facial_dominant": facial_emotion_data.get("stable_dominant_emotion") if facial_emotion_data else None,
-                    "facial_scores": facial_emotion_data.get("average_scores") if facial_emotion_data else None,
-                    "vocal_analysis": vocal_emotions_result # NUEVO
-                }
-                save_interaction_encrypted(st.session_state.session_id, 'user', user_interaction_data)
-                
-                # 3. Construir Prompt y Obtener Respuesta
-                prompt_context_data = {
-                    "facial_dominant": user_interaction_data["facial_dominant"],
-                    "vocal_emotions": vocal_emotions_result
-                }
-                prompt_messages = build_llm_prompt(st.session_state.messages, user_text, prompt_context_data, st.session_state.long_term_memory)
-                ai_response = get_groq_response(prompt_messages)
-                logging.info(f"IA respondió: '{ai_response}'")
-                
-                # 4. Extraer Memoria
-                memory_prompt = build_memory_extraction_prompt(user_text, ai_response)
-                extracted_facts = extract_memory_from_text(memory_prompt)
-                if extracted_facts:
-                    logging.info(f"Hechos de memoria extraídos: {extracted_facts}")
-                    for key, value in extracted_facts.items():
-                        save_memory_fact(key, value)
-                        st.session_state.long_term_memory[key] = value
-
-                # 5. Sintetizar Audio y Guardar respuesta de la IA
-                st.session_state.messages.append({"role": "assistant", "content": ai_response})
-                save_interaction_encrypted(st.session_state.session_id, 'assistant', {"text": ai_response})
-                st.session_state.ai_audio = run_synthesis(ai_response)
-                
-                st.rerun()
-            else:
-                st.error("Lo siento, no pude entender lo que dijiste. ¿Podrías intentarlo de nuevo?")
-                logging.warning("La transcripción falló o devolvió un texto vacío.")
\ No newline at end of file
+            turn = conversation_pipeline.start({
+                "audio_segment": audio_bytes,
+                "session_id": st.session_state.session_id,
+                # Sólo rol y contenido: la API no acepta claves extra como 'truncated'
+                "chat_history": [{"role": m["role"], "content": m["content"]} for m in st.session_state.messages],
+                "long_term_memory": st.session_state.long_term_memory,
+                "conversation_context": st.session_state.conversation_context,
+                "facial_emotion": result_container.get_data("facial_emotion"),
+                "result_container": result_container,
+                "response_stream": response_stream,
+                "speech_pipeline": speech_pipeline,
+            })
+            # Los streams se cierran al terminar la etapa llm, también si se omite o falla
+            turn.on_stage_done("llm", lambda _: (response_stream.close(), speech_pipeline.finish()))
+            transcription_status = turn.wait_stage("transcription")
+
+        if transcription_status == "ok":
+            # La respuesta se muestra token a token y suena frase a frase mientras el resto del turno avanza
+            with chat_container:
+                with st.chat_message("user"):
+                    st.markdown(turn.get("transcription"))
+                render_streaming_response(response_stream, speech_pipeline.segments)
+
+        turn.wait_critical()
+        result_container.set_data("turn_timings", turn.timings_summary())
+        # Las etapas de fondo (base de datos, memoria) terminan después: se publican sus tiempos al acabar
+        turn.on_complete(lambda finished: result_container.set_data("turn_timings", finished.timings_summary()))
+        logging.info(f"Turno completado en {turn.critical_ms:.0f} ms (ruta crítica).")
+
+        llm_metrics = result_container.get_data("llm_metrics")
+        if turn.status.get("llm") == "ok" and llm_metrics and llm_metrics.get("ttft_ms") is not None:
+            # Primer token visto por el usuario: desde que suelta el botón, no desde el inicio de la etapa llm
+            llm_metrics["turn_ttft_ms"] = turn.timings["llm"]["start_ms"] + llm_metrics["ttft_ms"]
+            result_container.set_data("llm_metrics", llm_metrics)
+            logging.info(f"Primer token del turno a los {llm_metrics['turn_ttft_ms']:.0f} ms.")
+        tts_metrics = result_container.get_data("tts_metrics")
+        if turn.status.get("tts") == "ok" and tts_metrics and tts_metrics.get("first_audio_ms") is not None:
+            logging.info(f"Primer audio del turno a los {tts_metrics['first_audio_ms']:.0f} ms.")
+
+        if turn.status.get("llm") == "ok":
+            ai_response = turn.get("llm")
+            st.session_state.messages.append({"role": "user", "content": turn.get("transcription")})
+            # Si el stream se cortó a medias, el historial lo muestra como respuesta incompleta
+            st.session_state.messages.append({"role": "assistant", "content": ai_response,
+                                              "truncated": bool(result_container.get_data("llm_truncated"))})
+            # El audio se reproduce por segmentos en la cola del navegador, que sigue sonando tras el rerun
+            st.session_state.ai_audio = None
+            st.rerun()
+        else:
+            st.error("Lo siento, no pude entender lo que dijiste. ¿Podrías intentarlo de nuevo?")
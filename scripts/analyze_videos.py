@@ -0,0 +1,163 @@
+# scripts/analyze_videos.py
+
+"""
+Análisis facial offline de videos grabados (sesiones archivadas, material de calibración).
+
+Lee cada video fotograma a fotograma, reparte el análisis entre un pool de
+procesos (cada uno con su propio detector de `initialize_detector`) y escribe
+la serie temporal de emociones de cada video en un CSV. El número de fotogramas
+en vuelo está acotado, por lo que la memoria no depende de la duración del video.
+
+Uso:
+    python scripts/analyze_videos.py videos/*.mp4 --output-dir data/analisis_offline --sample-fps 5 --workers 4
+"""
+
+import sys
+import os
+import argparse
+import csv
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Añadir el directorio raíz al path para que podamos importar desde 'src'
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+import cv2
+from src.analysis.facial_emotion import initialize_detector, analyze_frame_emotions, ResolutionAdaptiveDetector, EMOTION_LABELS
+from src.analysis.emotion_aggregator import EmotionAggregator
+
+# Detector propio de cada proceso del pool
+_detector = None
+
+def _init_worker(method: str, max_side: int):
+    global _detector
+    # Evita que cada proceso abra tantos hilos como núcleos tiene la máquina
+    cv2.setNumThreads(1)
+    detector = initialize_detector(method=method)
+    if detector is not None and max_side:
+        detector = ResolutionAdaptiveDetector(detector, max_side=max_side, use_roi=False)
+    _detector = detector
+
+def _analyze(frame_index: int, timestamp_s: float, frame_np):
+    return frame_index, timestamp_s, analyze_frame_emotions(_detector, frame_np)
+
+def iter_sampled_frames(video_path: str, sample_fps: float):
+    """
+    Devuelve un generador de (índice, segundos, fotograma) que lee el video en
+    streaming. El video se abre al llamarla, no al iterar: si no se puede abrir,
+    lanza FileNotFoundError antes de que se cree el CSV.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        cap.release()
+        raise FileNotFoundError(f"No se pudo abrir el video '{video_path}'.")
+    return _read_sampled_frames(cap, sample_fps)
+
+def _read_sampled_frames(cap, sample_fps: float):
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    step = max(1, round(video_fps / sample_fps)) if sample_fps else 1
+    frame_index = 0
+    try:
+        while True:
+            # grab() avanza sin decodificar a BGR; sólo se recuperan los fotogramas muestreados
+            if not cap.grab():
+                break
+            if frame_index % step == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                yield frame_index, frame_index / video_fps, frame
+            frame_index += 1
+    finally:
+        cap.release()
+
+def _write_row(writer, aggregator, frame_index, timestamp_s, result):
+    if result is None:
+        writer.writerow([frame_index, f"{timestamp_s:.3f}", "", "", "", "", ""] + [""] * len(EMOTION_LABELS))
+        return
+    aggregator.update(result["scores"], timestamp=timestamp_s)
+    x, y, w, h = result["bounding_box"]
+    writer.writerow([frame_index, f"{timestamp_s:.3f}", result["dominant_emotion"], x, y, w, h]
+                    + [result["scores"].get(label, "") for label in EMOTION_LABELS])
+
+def analyze_video(video_path: str, output_dir: str, pool: ProcessPoolExecutor, sample_fps: float, max_in_flight: int):
+    """Analiza un video y devuelve (fotogramas analizados, caras detectadas, resumen agregado)."""
+    output_path = os.path.join(output_dir, f"{Path(video_path).stem}_emociones.csv")
+    aggregator = EmotionAggregator(labels=EMOTION_LABELS, windows={"video": None})
+    in_flight = deque()
+    analyzed = faces = 0
+    frames = iter_sampled_frames(video_path, sample_fps)
+
+    with open(output_path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["frame", "timestamp_s", "dominant_emotion", "box_x", "box_y", "box_w", "box_h"] + list(EMOTION_LABELS))
+
+        for frame_index, timestamp_s, frame in frames:
+            in_flight.append(pool.submit(_analyze, frame_index, timestamp_s, frame))
+            # Se espera al más antiguo: acota la memoria y conserva el orden en el CSV
+            if len(in_flight) >= max_in_flight:
+                row = in_flight.popleft().result()
+                _write_row(writer, aggregator, *row)
+                analyzed += 1
+                faces += row[2] is not None
+
+        while in_flight:
+            row = in_flight.popleft().result()
+            _write_row(writer, aggregator, *row)
+            analyzed += 1
+            faces += row[2] is not None
+
+    print(f"   -> {output_path}")
+    return analyzed, faces, aggregator.get_window("video")
+
+def main():
+    parser = argparse.ArgumentParser(description="Análisis facial offline de videos con un pool de procesos.")
+    parser.add_argument("videos", nargs="+", help="Rutas de los videos a analizar.")
+    parser.add_argument("--output-dir", default=os.path.join("data", "analisis_offline"))
+    parser.add_argument("--method", default="fer", help="Método de initialize_detector (fer, onnx_fp32, onnx_dynamic, onnx_static).")
+    parser.add_argument("--sample-fps", type=float, default=5.0, help="Fotogramas analizados por segundo de video (0 = todos).")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--max-side", type=int, default=480, help="Lado máximo para la detección (0 = resolución original).")
+    args = parser.parse_args()
+
+    # Se comprueba en el proceso principal que el detector carga: si falla en los procesos del pool,
+    # cada fotograma devolvería "sin cara" y se escribirían CSV vacíos sin ningún error visible
+    try:
+        detector = initialize_detector(method=args.method)
+    except (FileNotFoundError, ValueError) as e:
+        sys.exit(f"❌ No se pudo cargar el detector '{args.method}': {e}")
+    if detector is None:
+        sys.exit(f"❌ No se pudo cargar el detector '{args.method}'. Revisa las dependencias indicadas arriba.")
+    del detector
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    max_in_flight = args.workers * 2
+
+    print(f"Analizando {len(args.videos)} video(s) con {args.workers} procesos (método: {args.method})...")
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.method, args.max_side)) as pool:
+        total_frames = 0
+        start = time.perf_counter()
+        for video_path in args.videos:
+            print(f"\n▶ {video_path}")
+            video_start = time.perf_counter()
+            try:
+                analyzed, faces, summary = analyze_video(video_path, args.output_dir, pool, args.sample_fps, max_in_flight)
+            except FileNotFoundError as e:
+                print(f"❌ {e}")
+                continue
+            elapsed = time.perf_counter() - video_start
+            total_frames += analyzed
+            dominant = summary["stable_dominant_emotion"] if summary else "sin caras"
+            print(f"   {analyzed} fotogramas ({faces} con cara) en {elapsed:.1f}s | "
+                  f"{analyzed / elapsed:.1f} fps | {analyzed / elapsed / args.workers:.2f} fps/núcleo | dominante: {dominant}")
+
+        elapsed = time.perf_counter() - start
+        if total_frames:
+            print(f"\nTotal: {total_frames} fotogramas en {elapsed:.1f}s | {total_frames / elapsed:.1f} fps | "
+                  f"{total_frames / elapsed / args.workers:.2f} fps/núcleo")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# scripts/export_fer_to_onnx.py
+
+import os
+import glob
+import urllib.request
+import numpy as np
+import cv2
+import tensorflow as tf
+import tf2onnx
+from tensorflow.keras.models import load_model
+from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType
+from onnxruntime.quantization.calibrate import CalibrationDataReader
+import fer
+
+# --- CONFIGURACIÓN ---
+ONNX_MODELS_DIR = os.path.join("ai_resources", "models", "facial_emotion")
+CALIBRATION_DATA_DIR = os.path.join("ai_resources", "calibration_data", "faces")
+FER_MODEL_PATH = os.path.join(os.path.dirname(fer.__file__), "data", "emotion_model.hdf5")
+YUNET_URL = "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx"
+# ---------------------
+
+class FaceCalibrationDataReader(CalibrationDataReader):
+    """
+    Lee imágenes de la carpeta de calibración, recorta las caras con el
+    clasificador Haar de OpenCV y las prepara igual que FER para que el
+    cuantizador de ONNX pueda 'medir' los rangos de activación.
+    """
+    def __init__(self, data_dir: str, input_name: str, target_size=(64, 64), num_files_to_use=200):
+        self.input_name = input_name
+        self.target_size = target_size
+        image_files = sorted(glob.glob(os.path.join(data_dir, "*.jpg")) + glob.glob(os.path.join(data_dir, "*.png")))
+        if not image_files:
+            raise ValueError(f"No se encontraron imágenes .jpg/.png en el directorio de calibración: '{data_dir}'. "
+                             "Por favor, coloca allí algunas fotos de caras (ej. de FER-2013).")
+
+        files_to_process = image_files[:num_files_to_use]
+        print(f"Usando {len(files_to_process)} de {len(image_files)} imágenes de '{data_dir}' para calibración.")
+        cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+        self.files = files_to_process
+        self.cascade = cascade
+        self.data_iter = self._iter_faces()
+
+    def _iter_faces(self):
+        for file_path in self.files:
+            gray = cv2.imread(file_path, cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                print(f"Advertencia: No se pudo leer {os.path.basename(file_path)}.")
+                continue
+            faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
+            # Las imágenes ya recortadas (como FER-2013) se usan completas
+            crops = [gray[y:y + h, x:x + w] for (x, y, w, h) in faces] or [gray]
+            for crop in crops:
+                face = cv2.resize(crop, self.target_size)
+                face = (face.astype(np.float32) / 255.0 - 0.5) * 2.0
+                yield face[np.newaxis, ..., np.newaxis]
+
+    def get_next(self):
+        face = next(self.data_iter, None)
+        if face is None:
+            return None
+        return {self.input_name: face}
+
+def export_models():
+    """Función principal para exportar y cuantizar el clasificador de FER."""
+    os.makedirs(ONNX_MODELS_DIR, exist_ok=True)
+    os.makedirs(CALIBRATION_DATA_DIR, exist_ok=True)
+
+    print(f"Cargando el clasificador Keras de FER desde '{FER_MODEL_PATH}'...")
+    model = load_model(FER_MODEL_PATH, compile=False)
+    input_shape = model.input_shape  # (None, 64, 64, 1)
+    input_name = "input"
+
+    float32_path = os.path.join(ONNX_MODELS_DIR, "emotion_float32.onnx")
+    if not os.path.exists(float32_path):
+        print(f"\n1. Exportando clasificador a ONNX (Float32) en '{float32_path}'...")
+        spec = (tf.TensorSpec((None,) + tuple(input_shape[1:]), tf.float32, name=input_name),)
+        tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=float32_path)
+        print("✅ Exportación a Float32 completada.")
+    else:
+        print(f"ℹ️ El modelo ONNX (Float32) '{float32_path}' ya existe. Saltando exportación.")
+
+    dynamic_quant_path = os.path.join(ONNX_MODELS_DIR, "emotion_quant_dynamic.onnx")
+    if not os.path.exists(dynamic_quant_path):
+        print(f"\n2. Aplicando cuantización dinámica a '{dynamic_quant_path}'...")
+        quantize_dynamic(
+            model_input=float32_path,
+            model_output=dynamic_quant_path,
+            weight_type=QuantType.QUInt8
+        )
+        print("✅ Cuantización dinámica completada.")
+    else:
+        print(f"ℹ️ El modelo cuantizado dinámicamente '{dynamic_quant_path}' ya existe. Saltando.")
+
+    static_quant_path = os.path.join(ONNX_MODELS_DIR, "emotion_quant_static.onnx")
+    if not os.path.exists(static_quant_path):
+        print(f"\n3. Aplicando cuantización estática con calibración a '{static_quant_path}'...")
+        try:
+            calibration_data_reader = FaceCalibrationDataReader(CALIBRATION_DATA_DIR, input_name, target_size=tuple(input_shape[1:3]))
+            quantize_static(
+                model_input=float32_path,
+                model_output=static_quant_path,
+                calibration_data_reader=calibration_data_reader,
+                quant_format='QDQ',
+                activation_type=QuantType.QInt8,
+                weight_type=QuantType.QInt8,
+            )
+            print("✅ Cuantización estática completada.")
+        except ValueError as e:
+            print(f"\n❌ ERROR durante la calibración estática: {e}")
+    else:
+        print(f"ℹ️ El modelo cuantizado estáticamente '{static_quant_path}' ya existe. Saltando.")
+
+    print("\n" + "="*50)
+    print("PASO 4: DETECTOR DE CARAS YUNET (OPCIONAL)")
+    print("="*50)
+    print("MTCNN no se exporta: su cascada de tres redes depende de lógica en Python.")
+    print("En su lugar se puede usar YuNet, un detector de caras ya distribuido en ONNX por OpenCV.")
+    print("Sin él, el backend ONNX usa el clasificador Haar incluido en OpenCV.")
+    yunet_path = os.path.join(ONNX_MODELS_DIR, "face_detection_yunet.onnx")
+    if not os.path.exists(yunet_path):
+        choice = input("¿Deseas descargar el detector YuNet? (s/n): ").lower().strip()
+        if choice in ['s', 'si', 'y', 'yes']:
+            try:
+                urllib.request.urlretrieve(YUNET_URL, yunet_path)
+                print("✅ Detector YuNet descargado.")
+            except Exception as e:
+                print(f"\n❌ ERROR al descargar YuNet: {e}")
+        else:
+            print("\nℹ️ Saltando la descarga de YuNet por elección del usuario.")
+    else:
+        print(f"ℹ️ El detector YuNet '{yunet_path}' ya existe. Saltando.")
+
+    print(f"\n¡Proceso finalizado! Los modelos disponibles han sido generados en la carpeta '{ONNX_MODELS_DIR}'.")
+
+if __name__ == "__main__":
+    print("--- INICIO DEL SCRIPT DE EXPORTACIÓN DEL MODELO DE EMOCIÓN FACIAL ---")
+    print("Este script convierte el clasificador de emociones de FER a formatos ONNX optimizados.")
+    export_models()
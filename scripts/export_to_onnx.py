@@ -1,58 +1,129 @@
 # scripts/export_to_onnx.py
 
+import sys
+import json
 import torch
+import onnx
 import os
 import glob
+import multiprocessing
+from pathlib import Path
 import numpy as np
 import librosa
+import soundfile as sf
+import time
 from transformers import Wav2Vec2ForSequenceClassification, Wav2Vec2FeatureExtractor
 from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantType
 from onnxruntime.quantization.calibrate import CalibrationDataReader
 import warnings
 
+# Añadir el directorio raíz al path para que podamos importar desde 'src'
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from src.analysis.voice_emotion import load_bundle_from_hub, BUNDLE_FILENAME
+
 # --- CONFIGURACIÓN ---
 MODEL_NAME = "superb/wav2vec2-base-superb-er"
 ONNX_MODELS_DIR = os.path.join("ai_resources", "models", "voice_emotion")
 CALIBRATION_DATA_DIR = os.path.join("ai_resources", "calibration_data")
+CALIBRATION_NUM_FILES = None  # None = todos los archivos de la carpeta
+CALIBRATION_SEGMENTS_PER_FILE = 5
+CALIBRATION_SEGMENT_LENGTH_S = 3
+CALIBRATION_SEED = 0
+# Cada cuántos lotes el calibrador reduce las activaciones guardadas a rangos min/max.
+# Acota la memoria del calibrador, que de otro modo guarda las salidas de todos los segmentos.
+CALIBRATION_MAX_INTERMEDIATE_OUTPUTS = 8
 # ---------------------
 
 # Ignorar warnings específicos de librosa que pueden aparecer
 warnings.filterwarnings('ignore', category=FutureWarning, module='librosa')
 
+class FrameLogitsWrapper(torch.nn.Module):
+    """
+    Exporta el modelo con logits por frame en lugar de logits ya promediados.
+
+    El proyector y el clasificador de Wav2Vec2ForSequenceClassification son
+    lineales, así que la media de los logits por frame equivale a los logits del
+    modelo original. El grafo admite lotes de segmentos de la misma longitud;
+    no conviene rellenar, porque la GroupNorm de la primera convolución
+    normaliza sobre todo el eje temporal (ver ONNXEmotionRecognizer).
+    """
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_values, attention_mask):
+        outputs = self.model.wav2vec2(input_values, attention_mask=attention_mask, output_hidden_states=True)
+        if self.model.config.use_weighted_layer_sum:
+            hidden_states = torch.stack(outputs.hidden_states, dim=1)
+            norm_weights = torch.nn.functional.softmax(self.model.layer_weights, dim=-1)
+            hidden_states = (hidden_states * norm_weights.view(-1, 1, 1)).sum(dim=1)
+        else:
+            hidden_states = outputs[0]
+        return self.model.classifier(self.model.projector(hidden_states))
+
+def is_batched_export(onnx_path: str) -> bool:
+    """Comprueba si un modelo exportado ya tiene eje de lote dinámico y salida por frame."""
+    model_proto = onnx.load(onnx_path, load_external_data=False)
+    output_names = [output.name for output in model_proto.graph.output]
+    batch_dim = model_proto.graph.input[0].type.tensor_type.shape.dim[0]
+    return "frame_logits" in output_names and bool(batch_dim.dim_param)
+
 class AudioCalibrationDataReader(CalibrationDataReader):
     """
     Lee archivos de audio de la carpeta de calibración y los prepara
     para que el cuantizador de ONNX pueda 'medir' los rangos de activación.
+
+    Los segmentos se generan bajo demanda: de cada archivo sólo se leen del
+    disco los tramos elegidos (con `seek`), así que la memoria no depende del
+    número ni de la duración de los archivos. La elección de los tramos es
+    reproducible: cada archivo usa su propio generador derivado de `seed`.
     """
-    def __init__(self, data_dir: str, feature_extractor, num_files_to_use=20, num_segments_per_file=5, segment_length_s=3):
+    def __init__(self, data_dir: str, feature_extractor, num_files_to_use=None, num_segments_per_file=5,
+                 segment_length_s=3, seed=0):
         self.feature_extractor = feature_extractor
-        self.segment_length = int(segment_length_s * self.feature_extractor.sampling_rate)
+        self.segment_length_s = segment_length_s
+        self.num_segments_per_file = num_segments_per_file
+        self.seed = seed
         
-        wav_files = glob.glob(os.path.join(data_dir, "*.wav"))
+        # Orden estable para que la misma semilla produzca los mismos segmentos en cualquier máquina
+        wav_files = sorted(glob.glob(os.path.join(data_dir, "*.wav")))
         if not wav_files:
             raise ValueError(f"No se encontraron archivos .wav en el directorio de calibración: '{data_dir}'. "
                              "Por favor, descarga algunos archivos de audio (ej. de CREMA-D o RAVDESS) y colócalos allí.")
         
-        files_to_process = wav_files[:num_files_to_use]
-        print(f"Usando {len(files_to_process)} de {len(wav_files)} archivos de audio de '{data_dir}' para calibración.")
-        
-        self.segments_list = []
-        for file_path in files_to_process:
+        self.files = wav_files[:num_files_to_use] if num_files_to_use else wav_files
+        print(f"Usando {len(self.files)} de {len(wav_files)} archivos de audio de '{data_dir}' para calibración "
+              f"(hasta {len(self.files) * num_segments_per_file} segmentos de {segment_length_s}s, semilla {seed}).")
+        self.segments_read = 0
+        self.rewind()
+
+    def rewind(self):
+        """Reinicia la lectura desde el primer archivo con los mismos segmentos."""
+        self.segments_read = 0
+        self.data_iter = self._iter_segments()
+
+    def _iter_segments(self):
+        target_sr = self.feature_extractor.sampling_rate
+        for file_index, file_path in enumerate(self.files):
+            rng = np.random.default_rng([self.seed, file_index])
             try:
-                speech, sr = librosa.load(file_path, sr=self.feature_extractor.sampling_rate)
-                if len(speech) < self.segment_length:
-                    continue
-                
-                for _ in range(num_segments_per_file):
-                    start = np.random.randint(0, len(speech) - self.segment_length + 1)
-                    segment = speech[start : start + self.segment_length]
-                    self.segments_list.append(segment)
+                with sf.SoundFile(file_path) as audio_file:
+                    segment_frames = int(self.segment_length_s * audio_file.samplerate)
+                    if audio_file.frames < segment_frames:
+                        continue
+                    starts = np.sort(rng.integers(0, audio_file.frames - segment_frames + 1, size=self.num_segments_per_file))
+                    for start in starts:
+                        audio_file.seek(int(start))
+                        segment = audio_file.read(segment_frames, dtype="float32", always_2d=True).mean(axis=1)
+                        if audio_file.samplerate != target_sr:
+                            segment = librosa.resample(segment, orig_sr=audio_file.samplerate, target_sr=target_sr)
+                        self.segments_read += 1
+                        yield segment
             except Exception as e:
                 print(f"Advertencia: No se pudo procesar {os.path.basename(file_path)}. Error: {e}")
 
-        print(f"Generados {len(self.segments_list)} segmentos de audio para una calibración robusta.")
-        self.data_iter = iter(self.segments_list)
-
     def get_next(self):
         segment = next(self.data_iter, None)
         if segment is None:
@@ -64,7 +135,72 @@ class AudioCalibrationDataReader(CalibrationDataReader):
             return_tensors="np", 
             padding=True
         )
-        return {"input_values": inputs.input_values.astype(np.float32)}
+        input_values = inputs.input_values.astype(np.float32)
+        return {"input_values": input_values, "attention_mask": np.ones_like(input_values, dtype=np.int64)}
+
+def _peak_child_rss_mb():
+    """Pico de memoria residente de los procesos hijos ya terminados, en MB (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux informa en KB; macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _run_quantize_static(float32_path, static_quant_path, connection):
+    """
+    Cuantización estática en un proceso hijo: su pico de memoria (RUSAGE_CHILDREN)
+    es el de la calibración, no el de toda la vida del script (exportación con
+    PyTorch incluida), que es lo que mediría ru_maxrss en el proceso principal.
+    """
+    try:
+        feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(MODEL_NAME)
+        calibration_data_reader = AudioCalibrationDataReader(
+            CALIBRATION_DATA_DIR, feature_extractor,
+            num_files_to_use=CALIBRATION_NUM_FILES,
+            num_segments_per_file=CALIBRATION_SEGMENTS_PER_FILE,
+            segment_length_s=CALIBRATION_SEGMENT_LENGTH_S,
+            seed=CALIBRATION_SEED,
+        )
+        start = time.perf_counter()
+        quantize_static(
+            model_input=float32_path,
+            model_output=static_quant_path,
+            calibration_data_reader=calibration_data_reader,
+            quant_format='QDQ',
+            activation_type=QuantType.QInt8,
+            weight_type=QuantType.QInt8,
+            extra_options={"CalibMaxIntermediateOutputs": CALIBRATION_MAX_INTERMEDIATE_OUTPUTS},
+        )
+        connection.send(("ok", calibration_data_reader.segments_read, time.perf_counter() - start))
+    except Exception as e:
+        connection.send((type(e).__name__, str(e)))
+    finally:
+        connection.close()
+
+def quantize_static_in_subprocess(float32_path, static_quant_path):
+    """Devuelve (segmentos leídos, segundos, pico de memoria del hijo en MB); relanza los errores del hijo."""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_run_quantize_static, args=(float32_path, static_quant_path, sender))
+    process.start()
+    sender.close()
+    try:
+        outcome = receiver.recv()
+    except EOFError:
+        outcome = None
+    process.join()
+    if outcome is None:
+        # El hijo terminó sin responder (p. ej. lo mató el sistema por falta de memoria)
+        raise MemoryError(f"El proceso de cuantización terminó con código {process.exitcode} sin responder.")
+    status, *values = outcome
+    if status == "ValueError":
+        raise ValueError(values[0])
+    if status != "ok":
+        raise RuntimeError(f"{status}: {values[0]}")
+    segments_read, elapsed = values
+    return segments_read, elapsed, _peak_child_rss_mb()
 
 def export_models():
     """Función principal para exportar y cuantizar los modelos."""
@@ -73,24 +209,44 @@ def export_models():
     
     print("Cargando modelo base de PyTorch desde Hugging Face...")
     model = Wav2Vec2ForSequenceClassification.from_pretrained(MODEL_NAME)
-    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(MODEL_NAME)
 
     float32_path = os.path.join(ONNX_MODELS_DIR, "model_float32.onnx")
-    
+    dynamic_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_dynamic.onnx")
+    static_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_static.onnx")
+    bundle_path = os.path.join(ONNX_MODELS_DIR, BUNDLE_FILENAME)
+
+    # Paquete autocontenido: la aplicación lo usa para preprocesar sin torch ni transformers
+    print(f"\n0. Guardando parámetros de preprocesado y etiquetas en '{bundle_path}'...")
+    with open(bundle_path, "w", encoding="utf-8") as f:
+        json.dump(load_bundle_from_hub(MODEL_NAME), f, indent=2, ensure_ascii=False)
+    print("✅ Paquete de ejecución guardado.")
+
+    if os.path.exists(float32_path) and not is_batched_export(float32_path):
+        # Los modelos de versiones anteriores no admiten lotes: se regeneran junto con sus variantes cuantizadas
+        print(f"ℹ️ El modelo '{float32_path}' no tiene eje de lote dinámico. Se volverá a exportar.")
+        for stale_path in (float32_path, dynamic_quant_path, static_quant_path):
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
     if not os.path.exists(float32_path):
         print(f"\n1. Exportando modelo base a ONNX (Float32) en '{float32_path}'...")
-        dummy_input = torch.randn(1, 16000)
+        model.eval()
+        dummy_input = torch.randn(2, 16000)
+        dummy_mask = torch.ones(2, 16000, dtype=torch.int64)
         torch.onnx.export(
-            model, dummy_input, float32_path,
+            FrameLogitsWrapper(model), (dummy_input, dummy_mask), float32_path,
             opset_version=14,
-            input_names=["input_values"], output_names=["logits"],
-            dynamic_axes={"input_values": {1: "sequence_length"}, "logits": {1: "sequence_length"}}
+            input_names=["input_values", "attention_mask"], output_names=["frame_logits"],
+            dynamic_axes={
+                "input_values": {0: "batch_size", 1: "sequence_length"},
+                "attention_mask": {0: "batch_size", 1: "sequence_length"},
+                "frame_logits": {0: "batch_size", 1: "num_frames"},
+            }
         )
         print("✅ Exportación a Float32 completada.")
     else:
         print(f"ℹ️ El modelo ONNX (Float32) '{float32_path}' ya existe. Saltando exportación.")
 
-    dynamic_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_dynamic.onnx")
     if not os.path.exists(dynamic_quant_path):
         print(f"\n2. Aplicando cuantización dinámica a '{dynamic_quant_path}'...")
         quantize_dynamic(
@@ -105,28 +261,24 @@ def export_models():
     print("\n" + "="*50)
     print("PASO 3: CUANTIZACIÓN ESTÁTICA (OPCIONAL)")
     print("="*50)
-    print("Este es el paso que MÁS MEMORIA RAM CONSUME y requiere archivos de audio en la carpeta 'calibration_data'.")
-    print("Puede fallar si no tienes suficiente RAM (se recomiendan >8GB).")
+    print("Requiere archivos de audio en la carpeta 'calibration_data'. Los segmentos se leen bajo demanda y el")
+    print(f"calibrador resume las activaciones cada {CALIBRATION_MAX_INTERMEDIATE_OUTPUTS} segmentos, así que la memoria no crece con el número de archivos.")
     print("La aplicación principal funcionará correctamente sin este modelo, usando la versión 'float32'.")
     
     choice = input("¿Deseas intentar la cuantización estática? (s/n): ").lower().strip()
 
     if choice in ['s', 'si', 'y', 'yes']:
         print("\nIniciando cuantización estática...")
-        static_quant_path = os.path.join(ONNX_MODELS_DIR, "model_quant_static.onnx")
         if not os.path.exists(static_quant_path):
             print(f"Aplicando cuantización estática con calibración a '{static_quant_path}'...")
+            # El modelo de PyTorch ya no se necesita: se libera antes del paso que más memoria usa
+            del model
             try:
-                calibration_data_reader = AudioCalibrationDataReader(CALIBRATION_DATA_DIR, feature_extractor)
-                quantize_static(
-                    model_input=float32_path,
-                    model_output=static_quant_path,
-                    calibration_data_reader=calibration_data_reader,
-                    quant_format='QDQ',
-                    activation_type=QuantType.QInt8,
-                    weight_type=QuantType.QInt8,
-                )
+                segments_read, elapsed, peak_rss = quantize_static_in_subprocess(float32_path, static_quant_path)
                 print("✅ Cuantización estática completada.")
+                print(f"   Segmentos de calibración: {segments_read} | Tiempo: {elapsed:.1f}s")
+                if peak_rss is not None:
+                    print(f"   Pico de memoria de la cuantización (proceso aparte): {peak_rss:.0f} MB")
             except ValueError as e:
                 print(f"\n❌ ERROR durante la calibración estática: {e}")
                 print("   Asegúrate de haber colocado suficientes archivos .wav en la carpeta 'calibration_data'.")
@@ -0,0 +1,145 @@
+# src/analysis/emotion_aggregator.py | Agregación incremental de puntuaciones de emoción
+
+"""
+Agregador de emociones respaldado por un buffer circular de NumPy.
+
+Cada ventana mantiene sumas acumuladas de las puntuaciones y un conteo por
+etiqueta de la emoción dominante, de modo que cada actualización cuesta O(1)
+(amortizado) en lugar de recorrer todo el historial. Se pueden mantener varias
+ventanas temporales a la vez (p. ej. 2 s, 10 s y todo el enunciado) y, de forma
+opcional, una media móvil exponencial (EMA).
+
+Lo usan tanto el procesador de video de `main.py` como el análisis offline.
+"""
+
+import time
+import numpy as np
+
+class EmotionAggregator:
+    """
+    Parámetros:
+    - labels: etiquetas en orden fijo. Si es None, se toman del primer resultado.
+    - windows: {nombre: duración en segundos o None}. None acumula todo desde
+      el último `reset()` (p. ej. todo el enunciado o la sesión).
+    - capacity: número máximo de muestras guardadas; acota la memoria y, si se
+      llena, las ventanas temporales descartan las muestras más antiguas.
+    - ema_alpha: peso de la muestra nueva en la EMA; None la desactiva.
+    - primary: ventana que se devuelve en `summary()` con el formato clásico.
+    """
+    def __init__(self, labels=None, windows: dict = None, capacity: int = 512,
+                 ema_alpha: float = None, primary: str = None):
+        self.windows = windows if windows is not None else {"corto": 2.0, "medio": 10.0, "total": None}
+        if not self.windows:
+            raise ValueError("Se necesita al menos una ventana de agregación.")
+        self.primary = primary if primary is not None else next(iter(self.windows))
+        if self.primary not in self.windows:
+            raise ValueError(f"La ventana principal '{self.primary}' no está definida.")
+        self.capacity = capacity
+        self.ema_alpha = ema_alpha
+        self.labels = None
+        if labels is not None:
+            self._allocate(list(labels))
+
+    def _allocate(self, labels):
+        self.labels = labels
+        n_labels = len(labels)
+        self._label_index = {label: i for i, label in enumerate(labels)}
+        self._scores = np.zeros((self.capacity, n_labels), dtype=np.float64)
+        self._dominant = np.zeros(self.capacity, dtype=np.int64)
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        """Vacía todas las ventanas y la EMA, conservando las etiquetas."""
+        if self.labels is None:
+            return
+        n_labels = len(self.labels)
+        self._head = 0  # índice absoluto de la próxima muestra
+        self._sums = {name: np.zeros(n_labels) for name in self.windows}
+        self._counts = {name: np.zeros(n_labels, dtype=np.int64) for name in self.windows}
+        self._sizes = {name: 0 for name in self.windows}
+        self._tails = {name: 0 for name in self.windows}  # índice absoluto de la muestra más antigua
+        self._ema = None
+
+    def _to_vector(self, scores):
+        if isinstance(scores, dict):
+            if self.labels is None:
+                self._allocate(list(scores.keys()))
+            vector = np.zeros(len(self.labels))
+            for label, value in scores.items():
+                vector[self._label_index[label]] = value
+            return vector
+        if self.labels is None:
+            raise ValueError("Se necesitan etiquetas para agregar puntuaciones sin nombre.")
+        return np.asarray(scores, dtype=np.float64)
+
+    def _evict(self, name, index):
+        slot = index % self.capacity
+        self._sums[name] -= self._scores[slot]
+        self._counts[name][self._dominant[slot]] -= 1
+        self._sizes[name] -= 1
+        if self._sizes[name] == 0:
+            # Evita que se acumule error de redondeo en ventanas que se vacían
+            self._sums[name][:] = 0.0
+
+    def update(self, scores, timestamp: float = None):
+        """Añade una muestra (dict etiqueta->puntuación o vector en orden de `labels`)."""
+        vector = self._to_vector(scores)
+        now = time.monotonic() if timestamp is None else timestamp
+        dominant = int(np.argmax(vector))
+
+        for name, duration in self.windows.items():
+            if duration is None:
+                continue
+            tail = self._tails[name]
+            while tail < self._head and (self._head - tail >= self.capacity or self._timestamps[tail % self.capacity] <= now - duration):
+                self._evict(name, tail)
+                tail += 1
+            self._tails[name] = tail
+
+        slot = self._head % self.capacity
+        self._scores[slot] = vector
+        self._dominant[slot] = dominant
+        self._timestamps[slot] = now
+        self._head += 1
+
+        for name in self.windows:
+            self._sums[name] += vector
+            self._counts[name][dominant] += 1
+            self._sizes[name] += 1
+
+        if self.ema_alpha is not None:
+            self._ema = vector.copy() if self._ema is None else self.ema_alpha * vector + (1.0 - self.ema_alpha) * self._ema
+
+    def get_window(self, name: str):
+        """Devuelve el resultado agregado de una ventana o None si está vacía."""
+        if self.labels is None or self._sizes[name] == 0:
+            return None
+        averages = self._sums[name] / self._sizes[name]
+        return {
+            "stable_dominant_emotion": self.labels[int(np.argmax(self._counts[name]))],
+            "average_scores": {label: float(averages[i]) for i, label in enumerate(self.labels)},
+            "samples": self._sizes[name],
+        }
+
+    def get_ema(self):
+        """Devuelve la EMA de las puntuaciones o None si está desactivada o vacía."""
+        if self._ema is None:
+            return None
+        return {
+            "dominant_emotion": self.labels[int(np.argmax(self._ema))],
+            "scores": {label: float(self._ema[i]) for i, label in enumerate(self.labels)},
+        }
+
+    def summary(self):
+        """
+        Resultado con el formato de `_aggregate_emotions` ("stable_dominant_emotion"
+        y "average_scores" de la ventana principal), más todas las ventanas y la EMA.
+        """
+        primary = self.get_window(self.primary) if self.labels is not None else None
+        if primary is None:
+            return None
+        result = dict(primary)
+        result["windows"] = {name: self.get_window(name) for name in self.windows}
+        result["ema"] = self.get_ema()
+        return result
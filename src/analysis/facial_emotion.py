@@ -4,27 +4,341 @@
 Módulo especializado en el análisis de emociones faciales.
 Utiliza la librería FER para detectar la emoción dominante y las puntuaciones
 de un fotograma de video proporcionado.
+
+También ofrece un backend con ONNX Runtime (`ONNXFacialEmotionDetector`) que
+usa el mismo clasificador de FER exportado con `scripts/export_fer_to_onnx.py`,
+sin cargar TensorFlow. El método se elige en `initialize_detector(method=...)`.
+
+`ResolutionAdaptiveDetector` reduce el coste de la detección (que crece con el
+número de píxeles) detectando sobre un fotograma reducido o sobre una región de
+interés alrededor de la última cara, y devuelve las cajas en coordenadas del
+fotograma original.
+
+Incluye un modo de seguimiento (`TrackingFaceDetector`) que ejecuta la detección
+completa de MTCNN sólo cada cierto número de fotogramas y, entre detecciones,
+sigue la cara con un rastreador barato y clasifica únicamente el recorte.
 """
 
 import logging
+import os
+import threading
+import cv2
+import numpy as np
 
 try:
-    from fer import FER
+    import onnxruntime as ort
 except ImportError:
-    print("Por favor, instala la librería 'fer' con: pip install fer")
-    FER = None
+    ort = None
+
+# --- CONFIGURACIÓN ---
+FACIAL_MODELS_DIR = os.path.join("ai_resources", "models", "facial_emotion")
+FACE_DETECTOR_FILENAME = "face_detection_yunet.onnx"
+# Mismo orden de etiquetas que usa FER para su clasificador
+EMOTION_LABELS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+
+ONNX_FACIAL_MODELS = {
+    "onnx_fp32": "emotion_float32.onnx",
+    "onnx_dynamic": "emotion_quant_dynamic.onnx",
+    "onnx_static": "emotion_quant_static.onnx",
+}
+
+def _load_fer_class():
+    """Importa FER sólo cuando se necesita, ya que arrastra TensorFlow."""
+    try:
+        from fer import FER
+        return FER
+    except ImportError:
+        print("Por favor, instala la librería 'fer' con: pip install fer")
+        return None
 
-def initialize_detector():
+def initialize_detector(method: str = "fer", onnx_dir: str = FACIAL_MODELS_DIR):
     """
     Inicializa y devuelve el detector de emociones faciales.
+
+    Métodos soportados:
+    - "fer": modelo Keras de FER con MTCNN (TensorFlow).
+    - "onnx_fp32", "onnx_dynamic", "onnx_static": clasificador de FER exportado a ONNX.
     """
-    if FER is None:
-        return None
-    
-    print("Cargando modelo de detección facial (FER)...")
-    detector = FER(mtcnn=True)
-    print("Modelo cargado exitosamente.")
-    return detector
+    if method == "fer":
+        FER = _load_fer_class()
+        if FER is None:
+            return None
+
+        print("Cargando modelo de detección facial (FER)...")
+        detector = FER(mtcnn=True)
+        print("Modelo cargado exitosamente.")
+        return detector
+
+    elif method in ONNX_FACIAL_MODELS:
+        if ort is None:
+            print("Por favor, instala la librería 'onnxruntime' con: pip install onnxruntime")
+            return None
+        onnx_path = os.path.join(onnx_dir, ONNX_FACIAL_MODELS[method])
+        face_detector_path = os.path.join(onnx_dir, FACE_DETECTOR_FILENAME)
+        print(f"Cargando modelo de emoción facial ONNX (Método: {method})...")
+        detector = ONNXFacialEmotionDetector(onnx_path, face_detector_path=face_detector_path)
+        print("Modelo cargado exitosamente.")
+        return detector
+
+    else:
+        raise ValueError(f"Método desconocido o no soportado para el análisis facial: {method}")
+
+class ONNXFacialEmotionDetector:
+    """
+    Detector de emociones con la misma interfaz que FER (`find_faces` y
+    `detect_emotions`) y el mismo formato de salida:
+    [{"box": (x, y, w, h), "emotions": {"angry": 0.01, ...}}, ...]
+
+    Las caras se detectan con YuNet (ONNX, vía cv2.FaceDetectorYN) si el modelo
+    está disponible y, si no, con el clasificador Haar de OpenCV.
+
+    El detector se comparte entre sesiones (`st.cache_resource`) y FaceDetectorYN
+    guarda el tamaño de entrada como estado (`setInputSize` antes de `detect`):
+    cada hilo usa su propia instancia de YuNet para que dos streams con
+    resoluciones distintas no se pisen entre ambas llamadas.
+    """
+    def __init__(self, onnx_path: str, face_detector_path: str = None, offsets=(10, 10),
+                 min_face_size: int = 50, score_threshold: float = 0.8):
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"El modelo ONNX no fue encontrado en '{onnx_path}'. "
+                                    f"Por favor, ejecuta el script 'scripts/export_fer_to_onnx.py' y verifica la estructura de carpetas 'ai_resources/'.")
+        self.session = ort.InferenceSession(onnx_path)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # El clasificador de FER espera (N, 64, 64, 1)
+        self.target_size = (int(model_input.shape[2]), int(model_input.shape[1]))
+        self.offsets = offsets
+        self.min_face_size = min_face_size
+
+        self.face_detector_path = None
+        self.score_threshold = score_threshold
+        self._local = threading.local()
+        if face_detector_path and os.path.exists(face_detector_path) and hasattr(cv2, "FaceDetectorYN"):
+            self.face_detector_path = face_detector_path
+            # Se crea ya la instancia del hilo que carga el modelo: un archivo inválido falla aquí y no en el primer fotograma
+            self._yunet()
+        elif hasattr(cv2, "CascadeClassifier"):
+            cascade_file = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+            self.cascade = cv2.CascadeClassifier(cascade_file)
+        else:
+            raise FileNotFoundError(f"Esta versión de OpenCV no incluye el clasificador Haar y no se encontró YuNet en '{face_detector_path}'. "
+                                    f"Por favor, ejecuta el script 'scripts/export_fer_to_onnx.py' para descargarlo.")
+
+    def _yunet(self):
+        """Instancia de YuNet del hilo actual (se crea la primera vez que el hilo la pide)."""
+        yunet = getattr(self._local, "yunet", None)
+        if yunet is None:
+            yunet = cv2.FaceDetectorYN.create(self.face_detector_path, "", (320, 320), self.score_threshold)
+            self._local.yunet = yunet
+        return yunet
+
+    def find_faces(self, frame_np):
+        """Devuelve una lista de cajas (x, y, w, h) en coordenadas del fotograma."""
+        if self.face_detector_path is not None:
+            height, width = frame_np.shape[:2]
+            yunet = self._yunet()
+            yunet.setInputSize((width, height))
+            _, faces = yunet.detect(frame_np)
+            if faces is None:
+                return []
+            return [tuple(int(v) for v in face[:4]) for face in faces if min(face[2], face[3]) >= self.min_face_size]
+
+        gray = cv2.cvtColor(frame_np, cv2.COLOR_BGR2GRAY) if frame_np.ndim == 3 else frame_np
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
+                                              minSize=(self.min_face_size, self.min_face_size))
+        return [tuple(int(v) for v in face) for face in faces]
+
+    def _face_crop(self, gray, box):
+        """Replica el recorte de FER: caja cuadrada más un margen fijo."""
+        x, y, w, h = box
+        if h > w:
+            x -= (h - w) // 2
+            w = h
+        elif w > h:
+            y -= (w - h) // 2
+            h = w
+        x_off, y_off = self.offsets
+        x0, y0, cw, ch = _clip_box((x - x_off, y - y_off, w + 2 * x_off, h + 2 * y_off), gray.shape)
+        if cw == 0 or ch == 0:
+            return None
+        face = cv2.resize(gray[y0:y0 + ch, x0:x0 + cw], self.target_size)
+        # Misma normalización que FER (preprocess_input con v2=True): [-1, 1]
+        return (face.astype(np.float32) / 255.0 - 0.5) * 2.0
+
+    def detect_emotions(self, frame_np, face_rectangles=None):
+        if face_rectangles is None:
+            face_rectangles = self.find_faces(frame_np)
+
+        gray = cv2.cvtColor(frame_np, cv2.COLOR_BGR2GRAY) if frame_np.ndim == 3 else frame_np
+        boxes, faces = [], []
+        for box in face_rectangles:
+            face = self._face_crop(gray, box)
+            if face is not None:
+                boxes.append(tuple(box))
+                faces.append(face)
+        if not faces:
+            return []
+
+        batch = np.stack(faces)[..., np.newaxis]
+        predictions = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            {"box": box, "emotions": {EMOTION_LABELS[i]: round(float(score), 2) for i, score in enumerate(scores)}}
+            for box, scores in zip(boxes, predictions)
+        ]
+
+class TemplateFaceTracker:
+    """
+    Rastreador de caras por correlación de plantillas (cv2.matchTemplate).
+    Busca la plantilla de la última detección en una ventana alrededor de la
+    caja anterior y devuelve la nueva caja junto con la correlación normalizada,
+    que sirve como medida de confianza.
+    """
+    def __init__(self, search_margin: float = 0.5):
+        self.search_margin = search_margin
+        self.template = None
+        self.box = None
+
+    def init(self, gray_frame, box):
+        x, y, w, h = _clip_box(box, gray_frame.shape)
+        if w < 2 or h < 2:
+            self.reset()
+            return
+        self.template = gray_frame[y:y + h, x:x + w].copy()
+        self.box = (x, y, w, h)
+
+    def reset(self):
+        self.template = None
+        self.box = None
+
+    def update(self, gray_frame):
+        """Devuelve (caja, confianza). La confianza es 0.0 si no se puede rastrear."""
+        if self.template is None:
+            return None, 0.0
+        x, y, w, h = self.box
+        frame_h, frame_w = gray_frame.shape[:2]
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(frame_w, x + w + mx), min(frame_h, y + h + my)
+        region = gray_frame[y0:y1, x0:x1]
+        if region.shape[0] < h or region.shape[1] < w:
+            return None, 0.0
+
+        scores = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, max_val, _, max_loc = cv2.minMaxLoc(scores)
+        self.box = (x0 + max_loc[0], y0 + max_loc[1], w, h)
+        return self.box, float(max_val)
+
+def _clip_box(box, shape):
+    """Recorta una caja (x, y, w, h) a los límites de la imagen."""
+    frame_h, frame_w = shape[:2]
+    x, y, w, h = [int(v) for v in box]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(frame_w, x + w), min(frame_h, y + h)
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+class TrackingFaceDetector:
+    """
+    Envuelve un detector con la interfaz de FER (`detect_emotions`) y ejecuta la
+    detección completa sólo cada `redetect_every` fotogramas analizados. Entre
+    detecciones, la caja se rastrea con `TemplateFaceTracker` y sólo se ejecuta
+    el clasificador de emociones sobre el recorte rastreado. Si la confianza del
+    rastreo cae por debajo de `min_confidence`, se vuelve a detectar.
+
+    Mantiene estado de la cara seguida, por lo que debe crearse una instancia
+    por stream de video (el detector envuelto sí puede compartirse).
+    """
+    def __init__(self, detector, redetect_every: int = 10, min_confidence: float = 0.6, search_margin: float = 0.5):
+        self.detector = detector
+        self.redetect_every = max(1, redetect_every)
+        self.min_confidence = min_confidence
+        self.tracker = TemplateFaceTracker(search_margin=search_margin)
+        self.frames_since_detection = 0
+        self.stats = {"full_detections": 0, "tracked_frames": 0, "tracking_failures": 0}
+
+    def _full_detection(self, frame_np, gray):
+        self.stats["full_detections"] += 1
+        self.frames_since_detection = 0
+        detections = self.detector.detect_emotions(frame_np)
+        if detections:
+            self.tracker.init(gray, detections[0]["box"])
+        else:
+            self.tracker.reset()
+        return detections
+
+    def detect_emotions(self, frame_np, face_rectangles=None):
+        if face_rectangles is not None:
+            return self.detector.detect_emotions(frame_np, face_rectangles=face_rectangles)
+
+        gray = cv2.cvtColor(frame_np, cv2.COLOR_BGR2GRAY) if frame_np.ndim == 3 else frame_np
+        if self.tracker.box is None or self.frames_since_detection >= self.redetect_every:
+            return self._full_detection(frame_np, gray)
+
+        box, confidence = self.tracker.update(gray)
+        if box is None or confidence < self.min_confidence:
+            self.stats["tracking_failures"] += 1
+            return self._full_detection(frame_np, gray)
+
+        self.frames_since_detection += 1
+        self.stats["tracked_frames"] += 1
+        return self.detector.detect_emotions(frame_np, face_rectangles=[box])
+
+class ResolutionAdaptiveDetector:
+    """
+    Preprocesado previo a la detección de caras.
+
+    - Si hay una cara previa y `use_roi` está activo, detecta sólo en una región
+      alrededor de ella (ampliada con `roi_margin`); si ahí no encuentra nada,
+      vuelve al fotograma completo.
+    - La imagen sobre la que se detecta se reduce para que su lado mayor no
+      supere `max_side` píxeles.
+    - Las cajas se devuelven en coordenadas del fotograma original, y la
+      clasificación de emociones se hace sobre el fotograma original.
+
+    El detector envuelto debe exponer `find_faces` y `detect_emotions` con
+    `face_rectangles`, como FER y `ONNXFacialEmotionDetector`. Guarda la última
+    caja, por lo que debe crearse una instancia por stream de video.
+    """
+    def __init__(self, detector, max_side: int = 480, use_roi: bool = True, roi_margin: float = 0.6):
+        self.detector = detector
+        self.max_side = max_side
+        self.use_roi = use_roi
+        self.roi_margin = roi_margin
+        self.last_box = None
+
+    def _find_in_region(self, frame_np, x0, y0, x1, y1):
+        region = frame_np[y0:y1, x0:x1]
+        height, width = region.shape[:2]
+        scale = 1.0
+        if self.max_side and max(height, width) > self.max_side:
+            scale = self.max_side / max(height, width)
+            region = cv2.resize(region, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+        boxes = self.detector.find_faces(region)
+        return [
+            (int(x / scale) + x0, int(y / scale) + y0, int(w / scale), int(h / scale))
+            for (x, y, w, h) in boxes
+        ]
+
+    def find_faces(self, frame_np):
+        frame_h, frame_w = frame_np.shape[:2]
+        if self.use_roi and self.last_box is not None:
+            x, y, w, h = self.last_box
+            mx, my = int(w * self.roi_margin), int(h * self.roi_margin)
+            x0, y0, cw, ch = _clip_box((x - mx, y - my, w + 2 * mx, h + 2 * my), frame_np.shape)
+            if cw > 0 and ch > 0:
+                boxes = self._find_in_region(frame_np, x0, y0, x0 + cw, y0 + ch)
+                if boxes:
+                    return boxes
+        return self._find_in_region(frame_np, 0, 0, frame_w, frame_h)
+
+    def detect_emotions(self, frame_np, face_rectangles=None):
+        if face_rectangles is None:
+            face_rectangles = self.find_faces(frame_np)
+        if len(face_rectangles) == 0:
+            self.last_box = None
+            return []
+        detections = self.detector.detect_emotions(frame_np, face_rectangles=face_rectangles)
+        self.last_box = tuple(detections[0]["box"]) if detections else None
+        return detections
 
 def analyze_frame_emotions(detector, frame_np):
     """
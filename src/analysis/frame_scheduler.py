@@ -0,0 +1,133 @@
+# src/analysis/frame_scheduler.py | Planificador adaptativo del análisis facial
+
+"""
+Decide cada cuántos fotogramas se analiza la cara, en lugar de un FRAME_SKIP fijo.
+
+El intervalo se calcula para que el coste de inferencia de una sesión no supere
+su presupuesto de CPU:
+
+    intervalo = ceil(fps * latencia / presupuesto)
+
+donde `latencia` es la mediana móvil de `analyze_frame_emotions` y `presupuesto`
+es la fracción de un núcleo asignada a la sesión. Si hay un presupuesto total
+para el servidor, se reparte entre las sesiones activas, de modo que la CPU
+total dedicada al análisis facial queda acotada aunque crezca la concurrencia.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+
+class SessionRegistry:
+    """Contador de sesiones de video activas, compartido entre hilos."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def register(self):
+        with self._lock:
+            self._count += 1
+
+    def unregister(self):
+        with self._lock:
+            self._count = max(0, self._count - 1)
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+# Registro global usado por defecto por todos los planificadores del proceso
+active_sessions = SessionRegistry()
+
+class AdaptiveFrameScheduler:
+    """
+    Planificador por sesión. Se llama a `should_analyze()` con cada fotograma
+    recibido y a `record_latency()` con la duración de cada inferencia.
+    """
+    def __init__(self, cpu_budget_per_session: float = 0.5, total_cpu_budget: float = None,
+                 min_interval: int = 2, max_interval: int = 60, initial_interval: int = 5,
+                 latency_window: int = 20, registry: SessionRegistry = active_sessions):
+        self.cpu_budget_per_session = cpu_budget_per_session
+        self.total_cpu_budget = total_cpu_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.registry = registry
+        self.interval = initial_interval
+
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+        self._frames_since_analysis = 0
+        self._fps = None
+        self._last_frame_time = None
+        self._closed = False
+        self.registry.register()
+
+    def close(self):
+        """Libera el hueco de la sesión en el registro (idempotente)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.registry.unregister()
+
+    def effective_budget(self) -> float:
+        """Fracción de núcleo disponible para esta sesión."""
+        budget = self.cpu_budget_per_session
+        if self.total_cpu_budget is not None:
+            budget = min(budget, self.total_cpu_budget / max(1, self.registry.count))
+        return budget
+
+    def _update_fps(self, now: float):
+        if self._last_frame_time is not None:
+            delta = now - self._last_frame_time
+            if delta > 0:
+                instant_fps = 1.0 / delta
+                self._fps = instant_fps if self._fps is None else 0.9 * self._fps + 0.1 * instant_fps
+        self._last_frame_time = now
+
+    def _recompute_interval(self):
+        if not self._latencies or not self._fps:
+            return
+        latency = sorted(self._latencies)[len(self._latencies) // 2]
+        budget = self.effective_budget()
+        if budget <= 0:
+            self.interval = self.max_interval
+            return
+        interval = math.ceil(self._fps * latency / budget)
+        self.interval = max(self.min_interval, min(self.max_interval, interval))
+
+    def should_analyze(self, now: float = None) -> bool:
+        """Registra un fotograma recibido y decide si debe analizarse."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._update_fps(now)
+            self._frames_since_analysis += 1
+            if self._frames_since_analysis < self.interval:
+                return False
+            self._frames_since_analysis = 0
+            # El número de sesiones cambia con el tiempo: se recalcula en cada análisis
+            self._recompute_interval()
+            return True
+
+    def record_latency(self, seconds: float):
+        """Añade la duración de una inferencia a la ventana móvil."""
+        with self._lock:
+            self._latencies.append(seconds)
+            self._recompute_interval()
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            budget = self.effective_budget()
+            latency = latencies[len(latencies) // 2] if latencies else None
+            analyses_per_s = (self._fps / self.interval) if self._fps else None
+            return {
+                "interval_frames": self.interval,
+                "fps": self._fps,
+                "latency_median_ms": latency * 1000 if latency is not None else None,
+                "cpu_budget": budget,
+                "estimated_cpu_usage": (analyses_per_s * latency) if (analyses_per_s and latency) else None,
+                "active_sessions": self.registry.count,
+            }
@@ -0,0 +1,179 @@
+# src/analysis/inference_service.py | Servicio de inferencia vocal compartido entre sesiones
+
+"""
+Servicio de micro-lotes delante del reconocedor de emoción vocal.
+
+El reconocedor se comparte entre todas las sesiones de Streamlit
+(`st.cache_resource`). En lugar de que cada sesión llame a `predict` sobre la
+misma sesión ONNX, las peticiones se encolan y un pool de workers las agrupa:
+cada worker toma la primera petición disponible y espera como mucho
+`max_wait_ms` (contados desde que esa petición entró en la cola) a que lleguen
+más, hasta `max_batch_size`. El lote se infiere con una llamada a
+`predict_arrays` y cada petición recibe su resultado en su propio `Future`.
+
+Dentro del lote sólo comparten `session.run` los segmentos de la misma
+longitud exacta (ver `ONNXEmotionRecognizer._predict_logits_batch`): con
+relleno, la GroupNorm de wav2vec2-base haría que el resultado de una sesión
+dependiera de los enunciados de otras sesiones que coincidieron en el lote.
+
+La cola está acotada: si se llena, `submit` espera hasta `timeout` y después
+lanza `queue.Full`, de modo que la carga excesiva se nota en quien la genera en
+lugar de acumularse sin límite.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+METRICS_WINDOW = 200
+
+class _Request:
+    __slots__ = ("speech_array", "future", "enqueued_at")
+
+    def __init__(self, speech_array):
+        self.speech_array = speech_array
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+_STOP = object()
+
+class VoiceEmotionService:
+    """
+    Parámetros:
+    - recognizer: reconocedor con `predict_arrays` (ver BaseEmotionRecognizer).
+    - max_batch_size: número máximo de enunciados por lote.
+    - max_wait_ms: tiempo máximo que la primera petición de un lote espera a las demás.
+    - num_workers: hilos que ejecutan lotes en paralelo sobre el mismo reconocedor.
+    - max_queue_size: peticiones pendientes admitidas antes de aplicar contrapresión.
+    - chunk_length_s: longitud de segmento para los enunciados largos.
+    """
+    def __init__(self, recognizer, max_batch_size: int = 8, max_wait_ms: float = 15.0, num_workers: int = 1,
+                 max_queue_size: int = 64, chunk_length_s: float = 10.0):
+        if max_batch_size < 1 or num_workers < 1:
+            raise ValueError("max_batch_size y num_workers deben ser al menos 1.")
+        self.recognizer = recognizer
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self.chunk_length_s = chunk_length_s
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._running = True
+
+        # Métricas
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._queue_waits = deque(maxlen=METRICS_WINDOW)
+        self._batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self._batch_latencies = deque(maxlen=METRICS_WINDOW)
+
+        self._workers = [threading.Thread(target=self._run, name=f"voice-emotion-{i}", daemon=True)
+                         for i in range(num_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, speech_array, timeout: float = None) -> Future:
+        """
+        Encola un enunciado (PCM a `target_sampling_rate`) y devuelve un Future
+        con la lista de predicciones. Lanza `queue.Full` si la cola sigue llena
+        tras `timeout` segundos.
+        """
+        if not self._running:
+            raise RuntimeError("El servicio de emoción vocal está detenido.")
+        request = _Request(speech_array)
+        self._queue.put(request, timeout=timeout)
+        with self._lock:
+            self._requests += 1
+        return request.future
+
+    def predict_array(self, speech_array, timeout: float = None):
+        """Atajo bloqueante: encola el enunciado y espera su resultado."""
+        return self.submit(speech_array, timeout=timeout).result(timeout=timeout)
+
+    def _collect_batch(self, first):
+        """Devuelve (lote, detener): `detener` indica que se recibió la señal de parada."""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect_batch(first)
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.monotonic()
+        # Los segmentos se agrupan por longitud exacta en `predict_arrays`: los de 10 s de todas las
+        # peticiones van juntos y cada resto de distinta longitud va en su propia inferencia
+        try:
+            results = self.recognizer.predict_arrays([request.speech_array for request in batch],
+                                                     chunk_length_s=self.chunk_length_s)
+        except Exception as e:
+            logging.error(f"Error en el servicio de emoción vocal: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            with self._lock:
+                self._failed += len(batch)
+            return
+        elapsed = time.monotonic() - started
+
+        for request, result in zip(batch, results):
+            request.future.set_result(result)
+        with self._lock:
+            self._batches += 1
+            self._completed += len(batch)
+            self._batch_sizes.append(len(batch))
+            self._batch_latencies.append(elapsed)
+            self._queue_waits.extend(started - request.enqueued_at for request in batch)
+
+    @staticmethod
+    def _percentile_ms(values, fraction):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(fraction * len(values)))] * 1000 if values else None
+
+    def get_metrics(self) -> dict:
+        """Resumen de carga: profundidad de la cola, espera en cola y tamaño de lote."""
+        with self._lock:
+            waits = list(self._queue_waits)
+            sizes = list(self._batch_sizes)
+            latencies = list(self._batch_latencies)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "completed": self._completed,
+                "failed": self._failed,
+                "batches": self._batches,
+                "batch_size_avg": sum(sizes) / len(sizes) if sizes else None,
+                "batch_size_max": max(sizes) if sizes else None,
+                "queue_wait_avg_ms": sum(waits) / len(waits) * 1000 if waits else None,
+                "queue_wait_p95_ms": self._percentile_ms(waits, 0.95),
+                "batch_latency_avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else None,
+                "batch_latency_p95_ms": self._percentile_ms(latencies, 0.95),
+            }
+
+    def stop(self, timeout: float = 5.0):
+        """Deja de aceptar peticiones, termina las ya encoladas y detiene los workers."""
+        self._running = False
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join(timeout=timeout)
@@ -0,0 +1,129 @@
+# src/analysis/inference_worker.py | Hilo dedicado para la inferencia facial fuera del bucle de WebRTC
+
+"""
+Worker de inferencia facial con política "el último fotograma gana".
+
+El procesador de video entrega el fotograma más reciente con `submit()` y sigue
+devolviendo fotogramas sin esperar. Si llega un fotograma nuevo mientras otro
+sigue pendiente, el pendiente se descarta: nunca se analiza contenido obsoleto.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from src.analysis.facial_emotion import analyze_frame_emotions
+
+LATENCY_WINDOW = 50
+
+class FacialInferenceWorker:
+    """
+    Ejecuta `analyze_frame_emotions` en un hilo propio.
+
+    `on_result` se invoca desde el hilo del worker con el resultado de cada
+    fotograma analizado (o None si no se detectó ninguna cara).
+    """
+    def __init__(self, detector, on_result=None, name: str = "facial-inference"):
+        self.detector = detector
+        self.on_result = on_result
+        self._condition = threading.Condition()
+        self._pending_frame = None
+        self._running = True
+        self._busy = False
+
+        # Métricas
+        self._submitted = 0
+        self._processed = 0
+        self._dropped = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._last_result = None
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_np) -> bool:
+        """
+        Entrega un fotograma al worker sin bloquear.
+        Devuelve False si reemplazó a un fotograma pendiente (que se descarta).
+        """
+        with self._condition:
+            if not self._running:
+                return False
+            replaced = self._pending_frame is not None
+            if replaced:
+                self._dropped += 1
+            self._pending_frame = frame_np
+            self._submitted += 1
+            self._condition.notify()
+        return not replaced
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._pending_frame is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                frame_np = self._pending_frame
+                self._pending_frame = None
+                self._busy = True
+
+            start = time.perf_counter()
+            try:
+                result = analyze_frame_emotions(self.detector, frame_np)
+            except Exception as e:
+                logging.error(f"Error en el worker de inferencia facial: {e}")
+                result = None
+            elapsed = time.perf_counter() - start
+
+            with self._condition:
+                self._busy = False
+                self._processed += 1
+                self._latencies.append(elapsed)
+                self._last_result = result
+
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    logging.error(f"Error en el callback del worker de inferencia facial: {e}")
+
+    @property
+    def last_result(self):
+        with self._condition:
+            return self._last_result
+
+    @property
+    def last_latency(self):
+        """Duración en segundos de la última inferencia, o None si aún no hubo ninguna."""
+        with self._condition:
+            return self._latencies[-1] if self._latencies else None
+
+    def get_metrics(self) -> dict:
+        """Devuelve un resumen de la carga del worker para dimensionar hardware."""
+        with self._condition:
+            latencies = sorted(self._latencies)
+            queue_depth = int(self._pending_frame is not None) + int(self._busy)
+            metrics = {
+                "queue_depth": queue_depth,
+                "submitted_frames": self._submitted,
+                "processed_frames": self._processed,
+                "dropped_frames": self._dropped,
+                "latency_last_ms": None,
+                "latency_avg_ms": None,
+                "latency_p95_ms": None,
+            }
+            if latencies:
+                metrics["latency_last_ms"] = self._latencies[-1] * 1000
+                metrics["latency_avg_ms"] = sum(latencies) / len(latencies) * 1000
+                metrics["latency_p95_ms"] = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000
+            return metrics
+
+    def stop(self, timeout: float = 1.0):
+        """Detiene el hilo. Los fotogramas pendientes se descartan."""
+        with self._condition:
+            self._running = False
+            self._pending_frame = None
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
@@ -0,0 +1,109 @@
+# src/analysis/voice_activity.py | Detección de actividad de voz (VAD) por energía
+
+"""
+VAD ligero, sólo CPU y sin dependencias nuevas, pensado para los clips de
+"mantener para hablar" de `audiorecorder`, que suelen traer silencio al
+principio y al final.
+
+El audio se divide en tramas cortas y se calcula su energía en dB. Una trama es
+de voz si supera un umbral adaptativo: el suelo de ruido del propio clip (un
+percentil bajo de la energía) más un margen, y nunca por debajo de un mínimo
+absoluto. Los huecos cortos entre tramas de voz se rellenan (pausas entre
+palabras), los fragmentos de voz demasiado cortos se descartan (golpes, clics)
+y cada segmento se amplía con un pequeño margen para no cortar consonantes.
+"""
+
+import numpy as np
+
+class EnergyVAD:
+    """
+    Parámetros:
+    - frame_ms: duración de cada trama de análisis.
+    - threshold_db: margen sobre el suelo de ruido estimado del clip.
+    - min_energy_db: energía mínima (dBFS) para considerar voz, aunque el clip sea muy silencioso.
+    - noise_percentile: percentil de la energía de las tramas usado como suelo de ruido.
+    - min_speech_ms: los segmentos de voz más cortos se descartan.
+    - min_silence_ms: los silencios más cortos entre segmentos de voz se unen.
+    - padding_ms: margen añadido a cada lado de cada segmento.
+    """
+    def __init__(self, frame_ms: float = 30.0, threshold_db: float = 12.0, min_energy_db: float = -50.0,
+                 noise_percentile: float = 10.0, min_speech_ms: float = 150.0, min_silence_ms: float = 300.0,
+                 padding_ms: float = 150.0):
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.min_energy_db = min_energy_db
+        self.noise_percentile = noise_percentile
+        self.min_speech_ms = min_speech_ms
+        self.min_silence_ms = min_silence_ms
+        self.padding_ms = padding_ms
+
+    def _frame_energy_db(self, samples: np.ndarray, frame_length: int) -> np.ndarray:
+        n_frames = len(samples) // frame_length
+        frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+    def detect(self, samples: np.ndarray, sample_rate: int) -> dict:
+        """
+        Analiza audio mono en float (rango [-1, 1]) y devuelve:
+        - "segments": lista de (inicio, fin) en muestras de los tramos con voz,
+        - "speech_s", "total_s" y "speech_ratio" para ajustar los parámetros.
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        total_s = len(samples) / sample_rate if sample_rate else 0.0
+        frame_length = max(1, int(sample_rate * self.frame_ms / 1000))
+        result = {"segments": [], "speech_s": 0.0, "total_s": total_s, "speech_ratio": 0.0}
+        if len(samples) < frame_length:
+            return result
+
+        energy_db = self._frame_energy_db(samples, frame_length)
+        noise_floor_db = float(np.percentile(energy_db, self.noise_percentile))
+        threshold = max(self.min_energy_db, noise_floor_db + self.threshold_db)
+        voiced = energy_db > threshold
+        result["threshold_db"] = threshold
+
+        # Tramos contiguos de tramas con voz, en índices de trama [inicio, fin)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        runs = list(zip(edges[::2], edges[1::2]))
+
+        # Unir pausas cortas y descartar fragmentos demasiado breves
+        min_silence = int(np.ceil(self.min_silence_ms / self.frame_ms))
+        min_speech = int(np.ceil(self.min_speech_ms / self.frame_ms))
+        merged = []
+        for start, end in runs:
+            if merged and start - merged[-1][1] < min_silence:
+                merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        merged = [(start, end) for start, end in merged if end - start >= min_speech]
+
+        # Pasar a muestras, con margen, uniendo los segmentos que se solapen al ampliarlos
+        padding = int(sample_rate * self.padding_ms / 1000)
+        segments = []
+        for start, end in merged:
+            start = max(0, start * frame_length - padding)
+            end = min(len(samples), end * frame_length + padding)
+            if segments and start <= segments[-1][1]:
+                segments[-1] = (segments[-1][0], end)
+            else:
+                segments.append((start, end))
+
+        speech_samples = sum(end - start for start, end in segments)
+        result["segments"] = segments
+        result["speech_s"] = speech_samples / sample_rate
+        result["speech_ratio"] = speech_samples / len(samples)
+        return result
+
+def trim_to_speech(samples: np.ndarray, segments: list) -> np.ndarray:
+    """Recorta el silencio inicial y final: del inicio del primer segmento al final del último."""
+    if not segments:
+        return samples[:0]
+    return samples[segments[0][0]:segments[-1][1]]
+
+def voiced_samples(samples: np.ndarray, segments: list) -> np.ndarray:
+    """Concatena sólo los tramos con voz (sin las pausas largas intermedias)."""
+    if not segments:
+        return samples[:0]
+    if len(segments) == 1:
+        return samples[segments[0][0]:segments[0][1]]
+    return np.concatenate([samples[start:end] for start, end in segments])
@@ -1,33 +1,123 @@
 # src/analysis/voice_emotion.py | Lógica para analizar emociones vocales con Wav2Vec2.0
 
-import torch
-import librosa
+"""
+Reconocimiento de emociones vocales con Wav2Vec2 exportado a ONNX.
+
+En ejecución sólo se necesitan NumPy y ONNX Runtime (más soundfile para leer
+WAV): los parámetros de preprocesado, la frecuencia de muestreo y el mapa de
+etiquetas se leen del paquete `voice_emotion_bundle.json` que genera
+`scripts/export_to_onnx.py` junto a los modelos. `librosa` sólo se importa si
+hay que remuestrear, y `transformers` sólo como respaldo cuando falta el paquete.
+"""
+
+import json
 import numpy as np
 import os
 import onnxruntime as ort
 from abc import ABC, abstractmethod
-from transformers import Wav2Vec2FeatureExtractor, AutoConfig
 import io  # <--- NUEVO: para manejo de bytes en memoria
 import soundfile as sf # <--- NUEVO: para leer los bytes
 
 # --- CONFIGURACIÓN ---
 MODEL_NAME = "superb/wav2vec2-base-superb-er"
 MODELS_BASE_DIR = os.path.join("ai_resources", "models", "voice_emotion")
+BUNDLE_FILENAME = "voice_emotion_bundle.json"
+
+def load_bundle_from_hub(model_name: str) -> dict:
+    """
+    Construye el paquete de ejecución desde Hugging Face (requiere transformers).
+    Lo usan el script de exportación y el respaldo cuando no existe el archivo.
+    """
+    from transformers import Wav2Vec2FeatureExtractor, AutoConfig
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
+    config = AutoConfig.from_pretrained(model_name)
+    return {
+        "model_name": model_name,
+        "sampling_rate": feature_extractor.sampling_rate,
+        "do_normalize": feature_extractor.do_normalize,
+        "padding_value": feature_extractor.padding_value,
+        "id2label": {str(i): label for i, label in config.id2label.items()},
+    }
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+
+def build_session_options(intra_op_threads: int = 0, inter_op_threads: int = 0, execution_mode: str = "sequential",
+                          graph_optimization_level: str = "all") -> ort.SessionOptions:
+    """
+    Opciones de sesión de ONNX Runtime. Un valor 0 de hilos deja que ORT use
+    todos los núcleos; en servidores con varias sesiones conviene fijar pocos
+    hilos por sesión para no sobresuscribir la CPU.
+    """
+    if execution_mode not in EXECUTION_MODES:
+        raise ValueError(f"Modo de ejecución desconocido: {execution_mode}")
+    if graph_optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Nivel de optimización desconocido: {graph_optimization_level}")
+    sess_options = ort.SessionOptions()
+    sess_options.intra_op_num_threads = intra_op_threads
+    sess_options.inter_op_num_threads = inter_op_threads
+    sess_options.execution_mode = EXECUTION_MODES[execution_mode]
+    sess_options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[graph_optimization_level]
+    return sess_options
+
+def _resample(speech_array: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    import librosa
+    return librosa.resample(y=speech_array, orig_sr=orig_sr, target_sr=target_sr)
 
 class BaseEmotionRecognizer(ABC):
     """Clase base abstracta para los reconocedores de emociones vocales."""
-    def __init__(self, model_name: str, **kwargs):
-        print(f"Inicializando procesador de características para '{model_name}'...")
-        self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
-        config = AutoConfig.from_pretrained(model_name)
-        self.id2label = config.id2label
-        self.target_sampling_rate = self.feature_extractor.sampling_rate
+    def __init__(self, model_name: str, bundle_path: str = None, **kwargs):
+        if bundle_path and os.path.exists(bundle_path):
+            print(f"Cargando parámetros de preprocesado desde '{bundle_path}'...")
+            with open(bundle_path, "r", encoding="utf-8") as f:
+                bundle = json.load(f)
+        else:
+            print(f"Aviso: no se encontró '{bundle_path}'. Descargando la configuración de '{model_name}' con transformers; "
+                  f"ejecuta 'scripts/export_to_onnx.py' para trabajar sin conexión.")
+            bundle = load_bundle_from_hub(model_name)
+        self.id2label = {int(i): label for i, label in bundle["id2label"].items()}
+        self.target_sampling_rate = int(bundle["sampling_rate"])
+        self.do_normalize = bool(bundle["do_normalize"])
+        self.padding_value = float(bundle["padding_value"])
 
     @abstractmethod
     def _predict_logits(self, processed_audio: np.ndarray):
         """Método abstracto para la inferencia, implementado por las subclases."""
         pass
 
+    def _predict_logits_batch(self, chunks: list) -> np.ndarray:
+        """
+        Devuelve los logits de varios segmentos, con forma (n_segmentos, n_etiquetas).
+        Por defecto infiere segmento a segmento; las subclases pueden agruparlos.
+        """
+        return np.concatenate([self._predict_logits(chunk) for chunk in chunks], axis=0)
+
+    def _extract_features(self, chunks: list):
+        """
+        Equivalente en NumPy de Wav2Vec2FeatureExtractor: normaliza cada segmento
+        a media cero y varianza unitaria sobre sus muestras válidas y rellena
+        hasta el más largo. Devuelve (input_values, attention_mask). El
+        reconocedor ONNX sólo le pasa segmentos de la misma longitud (sin relleno).
+        """
+        max_length = max(len(chunk) for chunk in chunks)
+        input_values = np.full((len(chunks), max_length), self.padding_value, dtype=np.float32)
+        attention_mask = np.zeros((len(chunks), max_length), dtype=np.int64)
+        for i, chunk in enumerate(chunks):
+            chunk = np.asarray(chunk, dtype=np.float32)
+            if self.do_normalize:
+                chunk = (chunk - chunk.mean()) / np.sqrt(chunk.var() + 1e-7)
+            input_values[i, :len(chunk)] = chunk
+            attention_mask[i, :len(chunk)] = 1
+        return input_values, attention_mask
+
     def _preprocess_audio(self, audio_bytes: bytes):
         """
         Preprocesa audio desde bytes en memoria sin escribir en disco.
@@ -36,27 +126,22 @@ class BaseEmotionRecognizer(ABC):
         speech_array, samplerate = sf.read(audio_buffer)
         
         if samplerate != self.target_sampling_rate:
-            speech_array = librosa.resample(y=speech_array, orig_sr=samplerate, target_sr=self.target_sampling_rate)
+            speech_array = _resample(speech_array, samplerate, self.target_sampling_rate)
             
         return speech_array
 
-    def predict(self, audio_bytes: bytes, chunk_length_s: float = 10.0):
-        """
-        Realiza la predicción de emociones a partir de datos de audio en bytes.
-        """
-        processed_audio = self._preprocess_audio(audio_bytes)
-        
-        if len(processed_audio) <= int(chunk_length_s * self.target_sampling_rate):
-            all_logits = self._predict_logits(processed_audio)
-        else:
-            print(f"Audio largo detectado. Procesando en segmentos de {chunk_length_s}s...")
-            chunk_size = int(chunk_length_s * self.target_sampling_rate)
-            num_chunks = int(np.ceil(len(processed_audio) / chunk_size))
-            
-            chunk_logits = [self._predict_logits(processed_audio[i*chunk_size:(i+1)*chunk_size]) for i in range(num_chunks)]
-            all_logits = np.mean(np.array(chunk_logits), axis=0)
+    def _split_chunks(self, speech_array: np.ndarray, chunk_length_s: float) -> list:
+        """Divide el audio en segmentos consecutivos de `chunk_length_s` segundos (el último puede ser más corto)."""
+        chunk_size = int(chunk_length_s * self.target_sampling_rate)
+        if len(speech_array) <= chunk_size:
+            return [speech_array]
+        num_chunks = int(np.ceil(len(speech_array) / chunk_size))
+        return [speech_array[i*chunk_size:(i+1)*chunk_size] for i in range(num_chunks)]
 
-        scores = torch.nn.functional.softmax(torch.from_numpy(all_logits), dim=1).numpy()[0]
+    def _format_predictions(self, logits: np.ndarray):
+        """Convierte logits de forma (1, n_etiquetas) en la lista ordenada de predicciones."""
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        scores = (shifted / shifted.sum(axis=1, keepdims=True))[0]
         
         predictions = sorted(
             [{"label": self.id2label[i].upper(), "score": float(score)} for i, score in enumerate(scores)],
@@ -65,43 +150,269 @@ class BaseEmotionRecognizer(ABC):
         )
         return predictions
 
+    def predict_array(self, speech_array: np.ndarray, chunk_length_s: float = 10.0):
+        """
+        Realiza la predicción de emociones a partir de audio PCM ya remuestreado
+        a `target_sampling_rate`. Los audios largos se dividen en segmentos que se
+        infieren por lotes de la misma longitud y se promedian sus logits.
+        """
+        chunks = self._split_chunks(speech_array, chunk_length_s)
+        if len(chunks) > 1:
+            print(f"Audio largo detectado. Procesando {len(chunks)} segmentos de {chunk_length_s}s en lote...")
+        chunk_logits = self._predict_logits_batch(chunks)
+        all_logits = np.mean(chunk_logits, axis=0, keepdims=True)
+        return self._format_predictions(all_logits)
+
+    def predict_arrays(self, speech_arrays: list, chunk_length_s: float = 10.0) -> list:
+        """
+        Predice varios enunciados independientes juntos: los segmentos de todos
+        ellos se infieren por lotes de la misma longitud (ver
+        `_predict_logits_batch`), así que el resultado de un enunciado no depende
+        de los que lo acompañan, y cada enunciado promedia sólo los logits de sus
+        propios segmentos. Devuelve una lista de
+        predicciones en el mismo orden que `speech_arrays`.
+        """
+        chunks_per_array = [self._split_chunks(speech_array, chunk_length_s) for speech_array in speech_arrays]
+        chunk_logits = self._predict_logits_batch([chunk for chunks in chunks_per_array for chunk in chunks])
+        boundaries = np.cumsum([0] + [len(chunks) for chunks in chunks_per_array])
+        return [self._format_predictions(np.mean(chunk_logits[start:end], axis=0, keepdims=True))
+                for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+    def predict(self, audio_bytes: bytes, chunk_length_s: float = 10.0):
+        """
+        Realiza la predicción de emociones a partir de datos de audio en bytes.
+        """
+        processed_audio = self._preprocess_audio(audio_bytes)
+        return self.predict_array(processed_audio, chunk_length_s=chunk_length_s)
+
+    def start_stream(self, input_sampling_rate: int = None, chunk_length_s: float = 10.0,
+                     window_s: float = 3.0, hop_s: float = 1.5):
+        """Crea una sesión de análisis incremental (ver `StreamingEmotionSession`)."""
+        return StreamingEmotionSession(self, input_sampling_rate=input_sampling_rate, chunk_length_s=chunk_length_s,
+                                       window_s=window_s, hop_s=hop_s)
+
+class StreamingEmotionSession:
+    """
+    Análisis de emoción vocal mientras el usuario sigue hablando.
+
+    - `push(pcm)` acepta fragmentos PCM a medida que llegan (float en [-1, 1],
+      int16 o bytes int16 little-endian). Cada vez que se completa un segmento
+      de `chunk_length_s` segundos se infieren sus logits, igual que haría
+      `predict()`, de modo que al terminar la grabación sólo queda el resto.
+    - Cada `hop_s` segundos de audio nuevo se calcula una estimación móvil sobre
+      los últimos `window_s` segundos, que `push()` devuelve (o None). Con
+      `hop_s=None` no se calculan estimaciones móviles.
+    - `finish()` devuelve el resultado del enunciado completo con el mismo
+      formato que `predict()`.
+
+    Si los fragmentos llegan a otra frecuencia de muestreo se remuestrean uno a
+    uno; para reproducir exactamente `predict()` conviene enviarlos ya a
+    `target_sampling_rate`.
+    """
+    def __init__(self, recognizer: BaseEmotionRecognizer, input_sampling_rate: int = None,
+                 chunk_length_s: float = 10.0, window_s: float = 3.0, hop_s: float = 1.5):
+        self.recognizer = recognizer
+        self.sampling_rate = recognizer.target_sampling_rate
+        self.input_sampling_rate = input_sampling_rate or self.sampling_rate
+        self.chunk_size = int(chunk_length_s * self.sampling_rate)
+        self.window_size = int(window_s * self.sampling_rate)
+        self.hop_size = int(hop_s * self.sampling_rate) if hop_s else None
+
+        self._buffer = np.zeros(self.chunk_size, dtype=np.float32)
+        self._length = 0
+        self._chunk_logits = []
+        self._next_hop = self.hop_size
+        self.rolling_estimates = []
+        self.finished = False
+
+    @property
+    def duration_s(self) -> float:
+        return self._length / self.sampling_rate
+
+    def _to_float(self, pcm) -> np.ndarray:
+        if isinstance(pcm, (bytes, bytearray, memoryview)):
+            pcm = np.frombuffer(pcm, dtype=np.int16)
+        pcm = np.asarray(pcm)
+        if pcm.dtype == np.int16:
+            pcm = pcm.astype(np.float32) / 32768.0
+        if pcm.ndim > 1:
+            pcm = pcm.mean(axis=1)
+        if self.input_sampling_rate != self.sampling_rate:
+            pcm = _resample(pcm.astype(np.float32), self.input_sampling_rate, self.sampling_rate)
+        return pcm.astype(np.float32, copy=False)
+
+    def _append(self, pcm: np.ndarray):
+        needed = self._length + len(pcm)
+        if needed > len(self._buffer):
+            grown = np.zeros(max(needed, 2 * len(self._buffer)), dtype=np.float32)
+            grown[:self._length] = self._buffer[:self._length]
+            self._buffer = grown
+        self._buffer[self._length:needed] = pcm
+        self._length = needed
+
+    def push(self, pcm):
+        """Añade un fragmento de audio. Devuelve una estimación móvil nueva o None."""
+        if self.finished:
+            raise RuntimeError("La sesión de streaming ya fue finalizada.")
+        self._append(self._to_float(pcm))
+
+        # Segmentos completos: mismos límites que usa predict()
+        while (len(self._chunk_logits) + 1) * self.chunk_size <= self._length:
+            start = len(self._chunk_logits) * self.chunk_size
+            chunk = self._buffer[start:start + self.chunk_size]
+            self._chunk_logits.append(self.recognizer._predict_logits_batch([chunk]))
+
+        estimate = None
+        if self.hop_size and self._length >= self._next_hop:
+            window = self._buffer[max(0, self._length - self.window_size):self._length]
+            estimate = self.recognizer._format_predictions(self.recognizer._predict_logits_batch([window]))
+            self.rolling_estimates.append({"time_s": self.duration_s, "predictions": estimate})
+            while self._next_hop <= self._length:
+                self._next_hop += self.hop_size
+        return estimate
+
+    def finish(self):
+        """Infiere el resto pendiente y devuelve el resultado del enunciado (formato de `predict()`)."""
+        self.finished = True
+        if self._length == 0:
+            return []
+        tail_start = len(self._chunk_logits) * self.chunk_size
+        logits = list(self._chunk_logits)
+        if tail_start < self._length:
+            logits.append(self.recognizer._predict_logits_batch([self._buffer[tail_start:self._length]]))
+        all_logits = np.mean(np.concatenate(logits, axis=0), axis=0, keepdims=True)
+        return self.recognizer._format_predictions(all_logits)
+
 class ONNXEmotionRecognizer(BaseEmotionRecognizer):
-    """Reconocedor usando un modelo ONNX optimizado."""
-    def __init__(self, model_name: str, onnx_path: str, **kwargs):
-        super().__init__(model_name)
+    """
+    Reconocedor usando un modelo ONNX optimizado.
+
+    Con los modelos exportados por lotes (salida 'frame_logits' de forma
+    (lote, frames, etiquetas)), los segmentos de la misma longitud exacta se
+    infieren juntos con una sola llamada a `session.run` y la media de los
+    frames se hace aquí. Los segmentos no se rellenan: wav2vec2-base usa
+    `feat_extract_norm="group"`, cuya primera convolución normaliza con
+    GroupNorm sobre todo el eje temporal, relleno incluido, así que el relleno
+    cambiaría las características de los frames válidos y ni la
+    `attention_mask` ni la media enmascarada lo corrigen. En la práctica, los
+    segmentos completos de `chunk_length_s` van en un lote y cada resto va en
+    el suyo. Los modelos exportados con la versión anterior del script siguen
+    funcionando, segmento a segmento.
+    """
+    def __init__(self, model_name: str, onnx_path: str, bundle_path: str = None, session_config: dict = None,
+                 optimized_cache_dir: str = None, **kwargs):
+        super().__init__(model_name, bundle_path=bundle_path)
         print(f"Cargando sesión de inferencia de ONNX Runtime desde '{onnx_path}'...")
         if not os.path.exists(onnx_path):
              raise FileNotFoundError(f"El modelo ONNX no fue encontrado en '{onnx_path}'. "
                                    f"Por favor, ejecuta el script 'scripts/export_to_onnx.py' y verifica la estructura de carpetas 'ai_resources/'.")
-        self.session = ort.InferenceSession(onnx_path)
+        self.session_config = dict(session_config or {})
+        self.session = self._create_session(onnx_path, optimized_cache_dir)
         self.input_name = self.session.get_inputs()[0].name
+        input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.has_attention_mask = "attention_mask" in input_names
+        self.frame_level_outputs = len(self.session.get_outputs()[0].shape) == 3
+        if not self.frame_level_outputs:
+            print("Aviso: modelo ONNX sin soporte de lotes. Vuelve a ejecutar 'scripts/export_to_onnx.py' para inferir segmentos en lote.")
         print("¡Sesión ONNX cargada!")
 
+    def _optimized_cache_path(self, onnx_path: str, cache_dir: str) -> str:
+        """El nombre incluye el nivel de optimización y la versión de ORT: un grafo optimizado no es portable entre versiones."""
+        level = self.session_config.get("graph_optimization_level", "all")
+        base_name = os.path.splitext(os.path.basename(onnx_path))[0]
+        return os.path.join(cache_dir, f"{base_name}.opt-{level}.ort-{ort.__version__}.onnx")
+
+    def _create_session(self, onnx_path: str, cache_dir: str = None):
+        """
+        Crea la sesión. Con `cache_dir`, el grafo optimizado se guarda en disco la
+        primera vez y en los arranques siguientes se carga directamente, sin volver
+        a optimizarlo.
+        """
+        sess_options = build_session_options(**self.session_config)
+        if not cache_dir:
+            return ort.InferenceSession(onnx_path, sess_options=sess_options)
+
+        cache_path = self._optimized_cache_path(onnx_path, cache_dir)
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(onnx_path):
+            print(f"Usando el grafo optimizado en caché '{cache_path}'.")
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            try:
+                return ort.InferenceSession(cache_path, sess_options=sess_options)
+            except Exception as e:
+                print(f"Aviso: no se pudo cargar el grafo en caché ({e}). Se volverá a optimizar.")
+                sess_options = build_session_options(**self.session_config)
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # Se escribe en un archivo temporal y se renombra: otro proceso nunca lee un grafo a medio escribir
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        sess_options.optimized_model_filepath = tmp_path
+        session = ort.InferenceSession(onnx_path, sess_options=sess_options)
+        if os.path.exists(tmp_path):
+            os.replace(tmp_path, cache_path)
+            print(f"Grafo optimizado guardado en '{cache_path}'.")
+        return session
+
+    def warmup(self, lengths_s=(1.0, 5.0)):
+        """Ejecuta inferencias con audio sintético para que la primera petición real no pague el arranque."""
+        rng = np.random.default_rng(0)
+        for length_s in lengths_s:
+            dummy_audio = rng.normal(0.0, 0.01, int(length_s * self.target_sampling_rate)).astype(np.float32)
+            self.predict_array(dummy_audio)
+
     def _predict_logits(self, chunk: np.ndarray):
-        inputs = self.feature_extractor(chunk, sampling_rate=self.target_sampling_rate, return_tensors="np", padding=True)
-        onnx_inputs = {self.input_name: inputs.input_values.astype(np.float32)}
+        if self.frame_level_outputs:
+            return self._predict_logits_batch([chunk])
+        input_values, _ = self._extract_features([chunk])
+        onnx_inputs = {self.input_name: input_values}
         logits = self.session.run(None, onnx_inputs)[0]
         return logits
 
-def get_recognizer(method: str = "onnx_fp32", model_name: str = MODEL_NAME, onnx_dir: str = MODELS_BASE_DIR):
+    def _predict_logits_batch(self, chunks: list) -> np.ndarray:
+        if not self.frame_level_outputs:
+            return super()._predict_logits_batch(chunks)
+
+        # Un lote por longitud exacta: sin relleno, el resultado de cada segmento no depende de los demás
+        buckets = {}
+        for index, chunk in enumerate(chunks):
+            buckets.setdefault(len(chunk), []).append(index)
+        chunk_logits = [None] * len(chunks)
+        for indices in buckets.values():
+            input_values, attention_mask = self._extract_features([chunks[index] for index in indices])
+            onnx_inputs = {self.input_name: input_values}
+            if self.has_attention_mask:
+                onnx_inputs["attention_mask"] = attention_mask
+            frame_logits = self.session.run(None, onnx_inputs)[0]
+            for index, logits in zip(indices, frame_logits.mean(axis=1)):
+                chunk_logits[index] = logits
+        return np.stack(chunk_logits)
+
+ONNX_MODEL_FILES = {
+    "onnx_dynamic": "model_quant_dynamic.onnx",
+    "onnx_static": "model_quant_static.onnx",
+    "onnx_fp32": "model_float32.onnx",
+}
+
+def get_recognizer(method: str = "onnx_fp32", model_name: str = MODEL_NAME, onnx_dir: str = MODELS_BASE_DIR,
+                   session_config: dict = None, optimized_cache_dir: str = None, warmup_lengths_s=()):
     """
     Función de fábrica que devuelve el tipo correcto de reconocedor según el método.
+
+    - session_config: argumentos de `build_session_options` (hilos, modo de ejecución, nivel de optimización).
+    - optimized_cache_dir: carpeta donde persistir el grafo optimizado entre arranques.
+    - warmup_lengths_s: duraciones (s) de audio sintético con las que calentar el modelo antes de devolverlo.
     """
     print("-" * 20)
     print(f"Cargando modelo de emoción vocal (Método: {method})")
     print("-" * 20)
+    bundle_path = os.path.join(onnx_dir, BUNDLE_FILENAME)
 
-    if method == "onnx_dynamic": 
-        onnx_path = os.path.join(onnx_dir, "model_quant_dynamic.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    elif method == "onnx_static":
-        onnx_path = os.path.join(onnx_dir, "model_quant_static.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    elif method == "onnx_fp32":
-        onnx_path = os.path.join(onnx_dir, "model_float32.onnx")
-        return ONNXEmotionRecognizer(model_name, onnx_path=onnx_path)
-        
-    else:
-        raise ValueError(f"Método desconocido o no soportado en la aplicación: {method}")
\ No newline at end of file
+    if method not in ONNX_MODEL_FILES:
+        raise ValueError(f"Método desconocido o no soportado en la aplicación: {method}")
+
+    onnx_path = os.path.join(onnx_dir, ONNX_MODEL_FILES[method])
+    recognizer = ONNXEmotionRecognizer(model_name, onnx_path=onnx_path, bundle_path=bundle_path,
+                                       session_config=session_config, optimized_cache_dir=optimized_cache_dir)
+    if warmup_lengths_s:
+        print(f"Calentando el modelo con audios de {', '.join(f'{s:g}s' for s in warmup_lengths_s)}...")
+        recognizer.warmup(warmup_lengths_s)
+    return recognizer
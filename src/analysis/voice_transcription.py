@@ -1,36 +1,172 @@
 # src/analysis/voice_transcription.py | Lógica para transcribir voz a texto
 
-from deepgram import Deepgram
 import asyncio
+import json
+import time
+from urllib.parse import urlencode
+import aiohttp
+from websockets.asyncio.client import connect as ws_connect
+from websockets.exceptions import ConnectionClosed
 import config
+from src.utils.async_runtime import get_runtime, run_async
 
-# Inicializar el cliente de Deepgram
-try:
-    dg_client = Deepgram(config.DEEPGRAM_API_KEY)
-except Exception as e:
-    print(f"Error al inicializar el cliente de Deepgram: {e}")
-    dg_client = None
+PRERECORDED_OPTIONS = {"punctuate": "true", "language": "es", "model": "nova-3", "smart_format": "true"}
+PRERECORDED_TIMEOUT_S = 30.0
 
-async def transcribe_audio_deepgram(audio_data: bytes) -> str | None:
+async def transcribe_audio_deepgram(audio_data: bytes, mimetype: str = "audio/wav") -> str | None:
     """
     Transcribe audio usando Deepgram. Devuelve el texto o None en caso de error.
+
+    La petición sale por la sesión HTTP compartida del bucle persistente: la
+    conexión TLS con Deepgram se reutiliza entre turnos en lugar de abrirse en
+    cada llamada.
     """
-    if not dg_client:
-        print("Error: El cliente de Deepgram no está inicializado.")
+    if not config.DEEPGRAM_API_KEY:
+        print("Error: Falta la clave de API de Deepgram.")
         return None
 
     try:
-        source = {"buffer": audio_data, "mimetype": "audio/wav"}
-        response = await dg_client.transcription.prerecorded(
-            source, 
-            {"punctuate": True, "language": "es", "model": "nova-3", "smart_format": True}
-        )
-        transcript = response["results"]["channels"][0]["alternatives"][0]["transcript"]
+        session = await get_runtime().get_http_session()
+        async with session.post(
+            config.DEEPGRAM_API_URL,
+            params=PRERECORDED_OPTIONS,
+            data=audio_data,
+            headers={"Authorization": f"Token {config.DEEPGRAM_API_KEY}", "Content-Type": mimetype},
+            timeout=aiohttp.ClientTimeout(total=PRERECORDED_TIMEOUT_S),
+        ) as response:
+            response.raise_for_status()
+            body = await response.json()
+        transcript = body["results"]["channels"][0]["alternatives"][0]["transcript"]
         return transcript
     except Exception as e:
         print(f"Error durante la transcripción con Deepgram: {e}")
         return None # Devolver None es una señal de error explícita
         
-def run_transcription(audio_data: bytes) -> str | None:
-    """Función de conveniencia para ejecutar el código asíncrono desde Streamlit."""
-    return asyncio.run(transcribe_audio_deepgram(audio_data))
\ No newline at end of file
+def run_transcription(audio_data: bytes, mimetype: str = "audio/wav") -> str | None:
+    """Función de conveniencia para ejecutar el código asíncrono desde Streamlit (en el bucle compartido)."""
+    return run_async(transcribe_audio_deepgram(audio_data, mimetype=mimetype))
+
+# --- TRANSCRIPCIÓN EN STREAMING ---
+# Se habla directamente el protocolo de la interfaz en vivo de Deepgram (/v1/listen por WebSocket):
+# el audio se envía como mensajes binarios, {"type": "CloseStream"} indica el final y el servidor
+# responde con mensajes "Results" (provisionales o finales) y un "Metadata" antes de cerrar.
+LIVE_OPTIONS = {
+    "language": "es", "model": "nova-3", "punctuate": "true", "smart_format": "true",
+    "interim_results": "true", "encoding": "linear16", "channels": 1,
+}
+
+class LiveTranscriber:
+    """
+    Cliente asíncrono de transcripción en vivo.
+
+    Mientras el usuario habla se envían los fragmentos de PCM con `send()`; los
+    resultados provisionales y finales llegan en paralelo, de modo que al llamar
+    a `finish()` sólo falta el último tramo y la transcripción final está lista
+    casi en cuanto el usuario deja de hablar.
+
+    `on_transcript(texto, es_final)` se invoca con cada resultado recibido.
+    """
+    def __init__(self, sample_rate: int = 16000, url: str = None, api_key: str = None,
+                 options: dict = None, on_transcript=None):
+        self.url = url or config.DEEPGRAM_LIVE_URL
+        self.api_key = api_key if api_key is not None else config.DEEPGRAM_API_KEY
+        self.options = {**LIVE_OPTIONS, **(options or {}), "sample_rate": sample_rate}
+        self.on_transcript = on_transcript
+        self.final_segments = []
+        self.interim_transcript = ""
+        self.metadata = None
+        self.sent_bytes = 0
+        self.finish_latency_s = None
+        self._socket = None
+        self._receiver = None
+
+    @property
+    def transcript(self) -> str:
+        """Transcripción final acumulada hasta el momento."""
+        return " ".join(segment for segment in self.final_segments if segment).strip()
+
+    async def start(self):
+        query = urlencode({key: str(value) for key, value in self.options.items()})
+        self._socket = await ws_connect(f"{self.url}?{query}",
+                                        additional_headers={"Authorization": f"Token {self.api_key}"})
+        self._receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def send(self, pcm_bytes: bytes):
+        """Envía un fragmento de audio PCM de 16 bits (mono, a `sample_rate`)."""
+        await self._socket.send(pcm_bytes)
+        self.sent_bytes += len(pcm_bytes)
+
+    async def _receive(self):
+        try:
+            async for message in self._socket:
+                response = json.loads(message)
+                if response.get("type") == "Metadata":
+                    self.metadata = response
+                    continue
+                if response.get("type") != "Results":
+                    continue
+                text = response["channel"]["alternatives"][0]["transcript"]
+                is_final = bool(response.get("is_final"))
+                if is_final:
+                    self.final_segments.append(text)
+                    self.interim_transcript = ""
+                else:
+                    self.interim_transcript = text
+                if self.on_transcript is not None:
+                    self.on_transcript(text, is_final)
+        except ConnectionClosed:
+            pass
+
+    async def finish(self, timeout: float = 10.0) -> str:
+        """Indica el final del audio, espera los últimos resultados y devuelve la transcripción final."""
+        started = time.perf_counter()
+        try:
+            await self._socket.send(json.dumps({"type": "CloseStream"}))
+            await asyncio.wait_for(asyncio.shield(self._receiver), timeout)
+        finally:
+            await self._socket.close()
+        self.finish_latency_s = time.perf_counter() - started
+        return self.transcript
+
+class LiveTranscriptionSession:
+    """
+    Puente síncrono para usar `LiveTranscriber` desde código que no es asíncrono
+    (Streamlit, callbacks de audio): el cliente corre en el bucle compartido de
+    la aplicación y `push()` no bloquea. Un único emisor envía los fragmentos en
+    el orden en que llegaron.
+    """
+    def __init__(self, sample_rate: int = 16000, **kwargs):
+        self._runtime = get_runtime()
+        self.transcriber = LiveTranscriber(sample_rate=sample_rate, **kwargs)
+        self._pending = asyncio.Queue()
+        self._runtime.run(self.transcriber.start())
+        self._sender = self._runtime.submit(self._send_pending())
+
+    async def _send_pending(self):
+        while True:
+            pcm_bytes = await self._pending.get()
+            if pcm_bytes is None:
+                return
+            await self.transcriber.send(pcm_bytes)
+
+    def push(self, pcm_bytes: bytes):
+        """Encola un fragmento para enviarlo sin esperar a que salga por la red."""
+        self._runtime.loop.call_soon_threadsafe(self._pending.put_nowait, pcm_bytes)
+
+    @property
+    def interim_transcript(self) -> str:
+        return self.transcriber.interim_transcript
+
+    async def _finish(self, timeout: float):
+        await self._pending.put(None)
+        await asyncio.wrap_future(self._sender)
+        return await self.transcriber.finish(timeout)
+
+    def finish(self, timeout: float = 10.0) -> str | None:
+        """Envía lo pendiente, cierra el stream y devuelve la transcripción final (None si falla)."""
+        try:
+            return self._runtime.run(self._finish(timeout), timeout + 1.0)
+        except Exception as e:
+            print(f"Error durante la transcripción en vivo con Deepgram: {e}")
+            return None
@@ -0,0 +1,48 @@
+# src/audio/audio_ingestion.py | Decodificación única del audio del turno y codificación para subirlo
+
+"""
+Ingesta del audio de cada turno.
+
+- `decode_audio_segment` convierte el `pydub.AudioSegment` de `audiorecorder`
+  una sola vez a PCM mono float32 a la frecuencia del modelo. El resultado es
+  el único búfer del turno: el VAD, el recorte y el reconocedor de emoción
+  trabajan sobre vistas de él (sin WAV intermedio ni nuevo `sf.read`).
+- `encode_audio` codifica el tramo a transcribir en un formato compacto
+  (FLAC sin pérdidas por defecto; Opus es aún más pequeño pero con pérdidas).
+"""
+
+import io
+import numpy as np
+import soundfile as sf
+
+# formato -> (contenedor de soundfile, subtipo, mimetype para Deepgram)
+UPLOAD_FORMATS = {
+    "wav": ("WAV", "PCM_16", "audio/wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac"),
+    "opus": ("OGG", "OPUS", "audio/ogg"),
+}
+
+def decode_audio_segment(audio_segment, sample_rate: int) -> np.ndarray:
+    """
+    Decodifica un `pydub.AudioSegment` a PCM mono float32 en [-1, 1] a la
+    frecuencia pedida. Las muestras de 16 bits se leen como vista sobre los
+    datos del segmento y se convierten con una única reserva de memoria.
+    """
+    if audio_segment.channels != 1:
+        audio_segment = audio_segment.set_channels(1)
+    if audio_segment.frame_rate != sample_rate:
+        audio_segment = audio_segment.set_frame_rate(sample_rate)
+    if audio_segment.sample_width != 2:
+        audio_segment = audio_segment.set_sample_width(2)
+    samples = np.frombuffer(audio_segment.raw_data, dtype=np.int16).astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
+
+def encode_audio(samples: np.ndarray, sample_rate: int, upload_format: str = "flac"):
+    """Codifica PCM float en memoria. Devuelve (bytes, mimetype)."""
+    if upload_format not in UPLOAD_FORMATS:
+        raise ValueError(f"Formato de subida desconocido: '{upload_format}'. Opciones: {', '.join(UPLOAD_FORMATS)}.")
+    container, subtype, mimetype = UPLOAD_FORMATS[upload_format]
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue(), mimetype
@@ -0,0 +1,157 @@
+# src/audio/tts_pipeline.py | Síntesis de voz por frases mientras el LLM sigue generando
+
+"""
+En lugar de esperar la respuesta completa y sintetizarla en un único MP3, los
+tokens del LLM se van cortando en frases. Cada frase completa se sintetiza en
+cuanto aparece, varias a la vez en el bucle de eventos compartido, y los
+segmentos de audio se entregan en orden por `segments` (un `StageStream`) a
+medida que están listos.
+
+El primer audio llega tras la primera frase del LLM más una llamada corta de
+TTS, no tras toda la respuesta más la síntesis completa.
+"""
+
+import asyncio
+import re
+import threading
+import time
+
+from src.audio.tts_player import synthesize_segment_edge
+from src.chat.turn_pipeline import StageStream
+from src.utils.async_runtime import get_runtime
+
+# Fin de frase: puntuación final (con comillas o paréntesis de cierre) seguida de espacio, o un salto de línea
+_SENTENCE_END = re.compile(r'[.!?…]+["»”\')\]]*\s+|\n+')
+
+class SentenceSplitter:
+    """
+    Acumula texto y devuelve las frases completas. Las frases más cortas que
+    `min_chars` se unen con la siguiente para no sintetizar fragmentos sueltos
+    (p. ej. "Sí.").
+    """
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            sentence = self._buffer[start:match.end()].strip()
+            if len(sentence) >= self.min_chars:
+                sentences.append(sentence)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """Devuelve el texto pendiente (la última frase, aunque no termine en puntuación)."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+class SentenceTTSPipeline:
+    """
+    - synthesize: corrutina `(texto) -> (bytes, duración_s)` o None si falla.
+    - max_concurrency: frases sintetizándose a la vez.
+    - min_sentence_chars: longitud mínima de cada frase enviada a sintetizar.
+
+    `feed(token)` y `finish()` se llaman desde el hilo que lee el LLM; `segments`
+    entrega dicts {"index", "text", "audio", "duration_s"} en el orden de las frases
+    y se cierra cuando termina la última síntesis.
+    """
+    def __init__(self, synthesize=None, max_concurrency: int = 3, min_sentence_chars: int = 20, runtime=None):
+        self.synthesize = synthesize or synthesize_segment_edge
+        self.segments = StageStream()
+        self._splitter = SentenceSplitter(min_sentence_chars)
+        self._runtime = runtime or get_runtime()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._futures = []
+        self._delivered = []
+        self._next = 0
+        self._finished = False
+        self._done = threading.Event()
+        self._lock = threading.RLock()
+        self._started = time.perf_counter()
+        self._first_token_at = None
+        self._first_sentence_at = None
+        self._first_audio_at = None
+        self._synthesis_ms = []
+
+    def feed(self, text: str):
+        if self._finished:
+            return
+        if self._first_token_at is None:
+            self._first_token_at = time.perf_counter()
+        for sentence in self._splitter.feed(text):
+            self._schedule(sentence)
+
+    def finish(self):
+        """Envía el texto pendiente y cierra `segments` cuando se entregue el último segmento. Idempotente."""
+        with self._lock:
+            if self._finished:
+                return
+            rest = self._splitter.flush()
+            if rest:
+                self._schedule(rest)
+            self._finished = True
+        self._deliver()
+
+    def _schedule(self, sentence: str):
+        if self._first_sentence_at is None:
+            self._first_sentence_at = time.perf_counter()
+        index = len(self._futures)
+        future = self._runtime.submit(self._synthesize(index, sentence))
+        self._futures.append(future)
+        future.add_done_callback(lambda _: self._deliver())
+
+    async def _synthesize(self, index: int, sentence: str):
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                result = await self.synthesize(sentence)
+            except Exception as e:
+                print(f"Error durante la síntesis de voz: {e}")
+                result = None
+            self._synthesis_ms.append((time.perf_counter() - start) * 1000)
+        if not result:
+            return None
+        audio, duration_s = result
+        return {"index": index, "text": sentence, "audio": audio, "duration_s": duration_s}
+
+    def _deliver(self):
+        # Entrega en orden: un segmento sólo sale cuando todos los anteriores ya salieron
+        with self._lock:
+            while self._next < len(self._futures) and self._futures[self._next].done():
+                future = self._futures[self._next]
+                segment = future.result() if not future.cancelled() and future.exception() is None else None
+                if segment is not None:
+                    if self._first_audio_at is None:
+                        self._first_audio_at = time.perf_counter()
+                    self._delivered.append(segment)
+                    self.segments.put(segment)
+                self._next += 1
+            if self._finished and self._next == len(self._futures) and not self._done.is_set():
+                self.segments.close()
+                self._done.set()
+
+    def result(self, timeout: float = None) -> list:
+        """Espera a que termine la síntesis de todas las frases y devuelve los segmentos entregados."""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"La síntesis por frases no terminó en {timeout}s.")
+        return list(self._delivered)
+
+    def get_metrics(self) -> dict:
+        """Tiempos desde la creación del pipeline (≈ inicio del turno) hasta la primera frase y el primer audio."""
+        def since_start(moment):
+            return (moment - self._started) * 1000 if moment is not None else None
+        with self._lock:
+            return {
+                "first_token_ms": since_start(self._first_token_at),
+                "first_sentence_ms": since_start(self._first_sentence_at),
+                "first_audio_ms": since_start(self._first_audio_at),
+                "sentences": len(self._futures),
+                "segments": len(self._delivered),
+                "audio_s": sum(segment["duration_s"] for segment in self._delivered),
+                "synthesis_ms": list(self._synthesis_ms),
+            }
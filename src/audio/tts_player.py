@@ -6,11 +6,20 @@ import tempfile
 from edge_tts import Communicate
 from pydub import AudioSegment
 import config
+from src.utils.async_runtime import run_async
 
-async def synthesize_speech_edge(text: str):
+def _boost_volume(mp3_path: str):
+    """Decodifica el MP3, sube el volumen y lo vuelve a codificar. Devuelve (bytes MP3, duración en segundos)."""
+    audio = AudioSegment.from_file(mp3_path, format="mp3")
+    audio = audio.apply_gain(+6)
+    return audio.export(format="mp3").read(), len(audio) / 1000
+
+async def synthesize_segment_edge(text: str):
     """
-    Sintetiza el texto a voz usando Edge-TTS y devuelve los datos de audio en bytes.
+    Sintetiza el texto a voz usando Edge-TTS y devuelve (bytes MP3, duración en segundos),
+    o None si falla. La duración permite encadenar segmentos en el reproductor.
     """
+    tmp_path = None
     try:
         communicate = Communicate(text, config.EDGE_VOICE)
         
@@ -20,22 +29,25 @@ async def synthesize_speech_edge(text: str):
 
         await communicate.save(tmp_path)
         
-        # Aumentar volumen y leer los bytes
-        audio = AudioSegment.from_file(tmp_path, format="mp3")
-        audio = audio.apply_gain(+6)
-        
-        # Exportar a un buffer en memoria
-        buffer = audio.export(format="mp3").read()
-
-        # Limpiar el archivo temporal
-        os.remove(tmp_path)
-        
-        return buffer
+        # La decodificación y recodificación con ffmpeg bloquean: se hacen en un hilo para no
+        # detener el bucle compartido (streams del LLM, Deepgram y el resto de segmentos)
+        return await asyncio.to_thread(_boost_volume, tmp_path)
 
     except Exception as e:
         print(f"Error durante la síntesis de voz: {e}")
         return None
+    finally:
+        # Limpiar el archivo temporal
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+async def synthesize_speech_edge(text: str):
+    """
+    Sintetiza el texto a voz usando Edge-TTS y devuelve los datos de audio en bytes.
+    """
+    segment = await synthesize_segment_edge(text)
+    return segment[0] if segment else None
 
-# Función de conveniencia para ejecutar desde Streamlit
+# Función de conveniencia para ejecutar desde Streamlit (en el bucle compartido, sin crear uno por llamada)
 def run_synthesis(text: str) -> bytes:
-    return asyncio.run(synthesize_speech_edge(text))
+    return run_async(synthesize_speech_edge(text))
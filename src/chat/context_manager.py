@@ -0,0 +1,195 @@
+# src/chat/context_manager.py | Ventana de contexto del LLM con presupuesto de tokens y resumen incremental
+
+"""
+Sin límite, cada turno envía toda la historia de la sesión y el prompt crece
+sin parar. `ConversationContext` mantiene cada prompt dentro de un presupuesto
+fijo de tokens:
+
+    [system: prompt + memoria]  [system: resumen]  [turnos recientes literales]  [user: mensaje actual]
+
+- El prompt de sistema (con la memoria) va primero y no cambia entre turnos:
+  es el prefijo estable que el caché de prompts del proveedor puede reutilizar.
+- Los turnos recientes se copian tal cual, tantos como quepan en el presupuesto.
+- Cuando la historia pendiente ya no cabe, los mensajes más antiguos se pliegan
+  en el resumen con una llamada al LLM en segundo plano. Se pliegan hasta dejar
+  la historia en `fold_target` del espacio disponible, de modo que el resumen
+  (y con él el resto del prompt) cambia cada varios turnos, no en cada uno.
+- Mientras el resumen se actualiza, los mensajes que no caben simplemente no se
+  envían.
+- Si la parte fija (prompt de sistema, resumen y mensaje actual) ya no cabe, el
+  resumen se recorta o se omite. Si el prompt de sistema y el mensaje actual por
+  sí solos superan el presupuesto, el prompt se envía igualmente, se registra un
+  aviso y `last_metrics["over_budget"]` lo indica.
+
+Los tokens se cuentan en local con una estimación (sin tokenizador ni llamada a la API).
+"""
+
+import logging
+import re
+import threading
+
+from src.chat.llm_client import summarize_conversation
+from src.chat.prompt_builder import build_summary_prompt
+
+# Palabras y signos sueltos; una palabra larga cuenta como varios tokens (≈ 4 caracteres por token)
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+# Tokens de formato que añade la plantilla de chat a cada mensaje
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimación local del número de tokens de un texto."""
+    if not text:
+        return 0
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _TOKEN_PATTERN.findall(text))
+
+def summarize_with_llm(previous_summary: str, messages: list, max_tokens: int = 300) -> str:
+    """Resumidor por defecto: actualiza el resumen anterior con los mensajes plegados."""
+    return summarize_conversation(build_summary_prompt(previous_summary, messages, max_words=max_tokens * 2 // 3),
+                                  max_tokens=max_tokens)
+
+class ConversationContext:
+    """
+    Parámetros:
+    - token_budget: tokens máximos del prompt completo (sin contar la respuesta).
+    - summary_max_tokens: longitud máxima del resumen.
+    - fold_target: fracción del espacio disponible que ocupa la historia literal tras plegar.
+    - summarize: función `(resumen_anterior, mensajes) -> resumen`.
+    - count_tokens: función de conteo de tokens.
+    - background: si False, el resumen se actualiza en el mismo hilo (útil en pruebas).
+    """
+    def __init__(self, token_budget: int = 3000, summary_max_tokens: int = 300, fold_target: float = 0.5,
+                 summarize=None, count_tokens=None, background: bool = True):
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.fold_target = fold_target
+        self.summarize = summarize or (lambda previous, messages: summarize_with_llm(previous, messages, summary_max_tokens))
+        self.count_tokens = count_tokens or estimate_tokens
+        self.background = background
+        self.summary = ""
+        self.summarized_upto = 0
+        self.last_metrics = {}
+        self._summarizing = False
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+
+    def message_tokens(self, message: dict) -> int:
+        return MESSAGE_OVERHEAD_TOKENS + self.count_tokens(message["content"])
+
+    def build_messages(self, system_prompt: str, chat_history: list, user_content: str) -> list:
+        """Devuelve los mensajes del turno dentro del presupuesto. `chat_history` no incluye el mensaje actual."""
+        with self._lock:
+            if self.summarized_upto > len(chat_history):
+                # Historia reiniciada (nueva sesión): el resumen ya no corresponde
+                self.summary, self.summarized_upto = "", 0
+            summary, start = self.summary, self.summarized_upto
+
+        system = {"role": "system", "content": system_prompt}
+        final = {"role": "user", "content": user_content}
+        fixed_tokens = self.message_tokens(system) + self.message_tokens(final)
+        # El resumen guardado no se toca: sólo se recorta la copia que se envía en este turno
+        sent_summary = summary
+        summary_message = self._summary_message(sent_summary)
+        if sent_summary and fixed_tokens + self.message_tokens(summary_message) > self.token_budget:
+            # La parte fija no cabe: se recorta el resumen a lo que queda libre, o se omite si no queda nada
+            room = self.token_budget - fixed_tokens - (self.message_tokens(summary_message) - self.count_tokens(sent_summary))
+            sent_summary = self._truncate(sent_summary, room) if room > 0 else ""
+            summary_message = self._summary_message(sent_summary)
+        prefix = [system] + ([summary_message] if sent_summary else [])
+        if sent_summary:
+            fixed_tokens += self.message_tokens(summary_message)
+        over_budget = fixed_tokens > self.token_budget
+        if over_budget:
+            logging.warning(f"El prompt de sistema y el mensaje actual ocupan {fixed_tokens} tokens estimados, "
+                            f"más que el presupuesto de {self.token_budget}; se envían sin historia.")
+        available = max(0, self.token_budget - fixed_tokens)
+
+        # Cola literal: los mensajes más recientes que quepan, empezando por un mensaje del usuario
+        pending = chat_history[start:]
+        pending_tokens = [self.message_tokens(message) for message in pending]
+        first, used = len(pending), 0
+        while first > 0 and used + pending_tokens[first - 1] <= available:
+            first -= 1
+            used += pending_tokens[first]
+        while first < len(pending) and pending[first]["role"] != "user":
+            used -= pending_tokens[first]
+            first += 1
+
+        if sum(pending_tokens) > available:
+            self._schedule_fold(chat_history, start, summary, pending_tokens, available)
+
+        messages = prefix + pending[first:] + [final]
+        with self._lock:
+            self.last_metrics = {
+                "prompt_tokens": fixed_tokens + used,
+                "token_budget": self.token_budget,
+                "over_budget": over_budget,
+                "prefix_tokens": self.message_tokens(system),
+                "summary_tokens": self.count_tokens(sent_summary),
+                "recent_messages": len(pending) - first,
+                "dropped_messages": first,
+                "summarized_messages": start,
+            }
+        return messages
+
+    def get_metrics(self) -> dict:
+        """Métricas del último prompt construido."""
+        with self._lock:
+            return dict(self.last_metrics)
+
+    @staticmethod
+    def _summary_message(summary: str) -> dict:
+        return {"role": "system", "content": f"Resumen de la conversación anterior:\n{summary}"}
+
+    def _schedule_fold(self, chat_history, start, summary, pending_tokens, available):
+        """Pliega en el resumen los mensajes más antiguos hasta dejar la historia en `fold_target` del espacio."""
+        with self._lock:
+            if self._summarizing:
+                return
+            remaining = sum(pending_tokens)
+            end = start
+            while end < len(chat_history) and remaining > available * self.fold_target:
+                remaining -= pending_tokens[end - start]
+                end += 1
+            # El siguiente tramo literal empieza en un mensaje del usuario
+            while end < len(chat_history) and chat_history[end]["role"] != "user":
+                end += 1
+            if end == start:
+                return
+            self._summarizing = True
+            self._idle.clear()
+        messages = list(chat_history[start:end])
+        if self.background:
+            threading.Thread(target=self._fold, args=(summary, start, end, messages),
+                             name="context-summary", daemon=True).start()
+        else:
+            self._fold(summary, start, end, messages)
+
+    def _fold(self, previous_summary, start, end, messages):
+        new_summary = None
+        try:
+            new_summary = self.summarize(previous_summary, messages)
+        except Exception as e:
+            logging.error(f"Error al actualizar el resumen de la conversación: {e}")
+        with self._lock:
+            if new_summary and self.summarized_upto == start:
+                self.summary = self._truncate(new_summary)
+                self.summarized_upto = end
+                logging.info(f"Resumen de la conversación actualizado: {end} mensajes plegados, "
+                             f"{self.count_tokens(self.summary)} tokens.")
+            self._summarizing = False
+            self._idle.set()
+
+    def _truncate(self, summary: str, max_tokens: int = None) -> str:
+        """Recorta el resumen por palabras a `max_tokens` (por defecto `summary_max_tokens`), por si el modelo se extiende."""
+        max_tokens = self.summary_max_tokens if max_tokens is None else max_tokens
+        if self.count_tokens(summary) <= max_tokens:
+            return summary
+        words = summary.split()
+        while words and self.count_tokens(" ".join(words)) > max_tokens:
+            words = words[:max(1, len(words) * 9 // 10)] if len(words) > 10 else words[:-1]
+        return " ".join(words)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Espera a que termine la actualización del resumen en curso, si la hay."""
+        return self._idle.wait(timeout)
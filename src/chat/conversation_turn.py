@@ -0,0 +1,207 @@
+# src/chat/conversation_turn.py | Grafo de etapas de un turno de conversación
+
+"""
+Define las etapas del ciclo de conversación sobre `TurnPipeline`:
+
+    Ruta crítica:      decode ─┬─ transcription ─┬─ llm ── tts (sintetiza por frases durante llm)
+                               └─ vocal_emotion ─┘
+    En segundo plano:  save_user (tras transcription y vocal_emotion)
+                       save_assistant (tras llm y save_user)
+                       memory (tras llm; encola el turno en el `MemoryExtractionWorker`)
+
+La transcripción y la emoción vocal corren en paralelo; las escrituras en la
+base de datos y la extracción de memoria no retrasan la respuesta.
+
+Entradas del turno: audio_segment, session_id, chat_history, long_term_memory
+(dict que la etapa de memoria actualiza), facial_emotion y result_container.
+Opcionalmente:
+- response_stream: un `StageStream` en el que la etapa llm publica los tokens a
+  medida que llegan.
+- conversation_context: un `ConversationContext` de la sesión que ajusta la
+  historia al presupuesto de tokens (resumen + turnos recientes).
+- speech_pipeline: un `SentenceTTSPipeline` al que la etapa llm pasa los tokens,
+  de modo que la síntesis por frases empieza antes de que termine la respuesta;
+  la etapa tts sólo espera a la última frase.
+La etapa llm cierra ambos al terminar; si la etapa se omite no llega a
+ejecutarse, así que quien los crea también debe cerrarlos (`on_stage_done`).
+"""
+
+import concurrent.futures
+import logging
+import queue
+import time
+
+from src.analysis.voice_activity import trim_to_speech, voiced_samples
+from src.analysis.voice_transcription import run_transcription
+from src.audio.audio_ingestion import decode_audio_segment, encode_audio
+from src.audio.tts_player import run_synthesis
+from src.chat.llm_client import stream_groq_response, extract_memory_from_text, get_chat_client
+from src.chat.memory_worker import has_memory_cues
+from src.chat.prompt_builder import build_llm_prompt, build_batch_memory_extraction_prompt
+from src.chat.turn_pipeline import Stage, StageSkipped, TurnPipeline
+from src.database.data_manager import save_interaction_encrypted, save_memory_facts
+
+def build_conversation_pipeline(voice_activity_detector, voice_service, sample_rate: int,
+                                voice_timeout_s: float = 30.0, upload_format: str = "flac",
+                                tts_timeout_s: float = 60.0, memory_worker=None) -> TurnPipeline:
+    """Construye el grafo una vez; se ejecuta en cada turno con `pipeline.run(entradas)`."""
+
+    def decode(ctx):
+        # Decodificar una sola vez y detectar la voz: el silencio no se envía a Deepgram ni al modelo
+        cpu_start = time.thread_time()
+        speech_array = decode_audio_segment(ctx["audio_segment"], sample_rate)
+        decode_cpu_ms = (time.thread_time() - cpu_start) * 1000
+        vad_result = voice_activity_detector.detect(speech_array, sample_rate)
+        voice_activity = {key: vad_result[key] for key in ("speech_ratio", "speech_s", "total_s")}
+        ctx["result_container"].set_data("voice_activity", voice_activity)
+        logging.info(f"Actividad de voz: {vad_result['speech_s']:.2f}s de {vad_result['total_s']:.2f}s "
+                     f"({vad_result['speech_ratio']:.0%}) en {len(vad_result['segments'])} segmento(s)")
+        if not vad_result["segments"]:
+            logging.info("No se detectó voz en el audio; se omiten la transcripción y el análisis vocal.")
+            raise StageSkipped()
+        return {"speech_array": speech_array, "segments": vad_result["segments"], "decode_cpu_ms": decode_cpu_ms}
+
+    def transcription(ctx):
+        # Sólo el tramo con voz (sin silencio inicial ni final)
+        decoded = ctx["decode"]
+        speech = trim_to_speech(decoded["speech_array"], decoded["segments"])
+        cpu_start = time.thread_time()
+        audio_data, mimetype = encode_audio(speech, sample_rate, upload_format)
+        encode_cpu_ms = (time.thread_time() - cpu_start) * 1000
+        ingestion = {
+            "upload_format": upload_format,
+            "upload_bytes": len(audio_data),
+            "wav_equivalent_bytes": 44 + 2 * len(speech),
+            "decode_cpu_ms": decoded["decode_cpu_ms"],
+            "encode_cpu_ms": encode_cpu_ms,
+        }
+        ctx["result_container"].set_data("audio_ingestion", ingestion)
+        logging.info(f"Audio subido: {ingestion['upload_bytes']} bytes en {upload_format} "
+                     f"(WAV: {ingestion['wav_equivalent_bytes']}) | CPU decodificación {decoded['decode_cpu_ms']:.1f} ms, "
+                     f"codificación {encode_cpu_ms:.1f} ms")
+        user_text = run_transcription(audio_data, mimetype=mimetype)
+        if not user_text or user_text.strip() == "":
+            logging.warning("La transcripción falló o devolvió un texto vacío.")
+            raise StageSkipped()
+        logging.info(f"Usuario transcribió: '{user_text}'")
+        return user_text
+
+    def vocal_emotion(ctx):
+        # Sólo las tramas con voz, a través de la cola de micro-lotes compartida
+        speech_array, segments = ctx["decode"]["speech_array"], ctx["decode"]["segments"]
+        vocal_emotions_result = None
+        try:
+            vocal_emotions_result = voice_service.predict_array(voiced_samples(speech_array, segments), timeout=voice_timeout_s)
+        except (queue.Full, TimeoutError, concurrent.futures.TimeoutError) as e:
+            # Con el servicio saturado el turno sigue sin emoción vocal en lugar de bloquearse
+            # (antes de Python 3.11, concurrent.futures.TimeoutError no es el TimeoutError integrado)
+            logging.warning(f"Servicio de emoción vocal saturado, se omite el análisis vocal: {e!r}")
+        except Exception as e:
+            # La emoción vocal es opcional: un fallo del modelo no debe impedir la respuesta
+            logging.error(f"Error en el análisis vocal, se responde sin emoción vocal: {e!r}")
+        ctx["result_container"].set_data("voice_service_metrics", voice_service.get_metrics())
+        ctx["result_container"].set_data("vocal_emotion", {"vocal_emotions": vocal_emotions_result})
+        logging.info(f"Emoción vocal detectada: {vocal_emotions_result[0] if vocal_emotions_result else 'Ninguna'}")
+        return vocal_emotions_result
+
+    def llm(ctx):
+        facial_emotion_data = ctx["facial_emotion"]
+        prompt_context_data = {
+            "facial_dominant": facial_emotion_data.get("stable_dominant_emotion") if facial_emotion_data else None,
+            "vocal_emotions": ctx["vocal_emotion"],
+        }
+        # El mensaje actual lo añade build_llm_prompt (con el contexto emocional); la historia no lo incluye.
+        # Copia de la memoria: el worker de memoria puede actualizarla mientras se construye el prompt
+        conversation_context = ctx.get("conversation_context")
+        prompt_messages = build_llm_prompt(ctx["chat_history"], ctx["transcription"], prompt_context_data,
+                                           dict(ctx["long_term_memory"]), context=conversation_context)
+        if conversation_context is not None:
+            context_metrics = conversation_context.get_metrics()
+            ctx["result_container"].set_data("context_metrics", context_metrics)
+            logging.info(f"Prompt: {context_metrics['prompt_tokens']} tokens estimados "
+                         f"de {context_metrics['token_budget']}")
+        # Los tokens se publican según llegan; el texto completo es el resultado de la etapa
+        response_stream, speech_pipeline = ctx.get("response_stream"), ctx.get("speech_pipeline")
+        llm_metrics = {}
+        tokens = []
+        try:
+            for token in stream_groq_response(prompt_messages, metrics=llm_metrics):
+                tokens.append(token)
+                if response_stream is not None:
+                    response_stream.put(token)
+                if speech_pipeline is not None:
+                    speech_pipeline.feed(token)
+        finally:
+            if response_stream is not None:
+                response_stream.close()
+            if speech_pipeline is not None:
+                speech_pipeline.finish()
+        ai_response = "".join(tokens)
+        ctx["result_container"].set_data("llm_metrics", llm_metrics)
+        # La respuesta cortada a medias se muestra y se guarda marcada como incompleta
+        ctx["result_container"].set_data("llm_truncated", bool(llm_metrics.get("truncated")))
+        # Histogramas de latencia, reintentos, duplicados y respaldos por modelo
+        ctx["result_container"].set_data("llm_client_metrics", get_chat_client().get_metrics())
+        if llm_metrics.get("ttft_ms") is not None:
+            logging.info(f"LLM: primer token en {llm_metrics['ttft_ms']:.0f} ms, {llm_metrics['completion_tokens']} tokens "
+                         f"en {llm_metrics['total_ms']:.0f} ms ({llm_metrics['tokens_per_s'] or 0:.0f} tokens/s)")
+        logging.info(f"IA respondió: '{ai_response}'")
+        return ai_response
+
+    def tts(ctx):
+        speech_pipeline = ctx.get("speech_pipeline")
+        if speech_pipeline is None:
+            return run_synthesis(ctx["llm"])
+        # La síntesis ya avanzó frase a frase durante la etapa llm
+        segments = speech_pipeline.result(timeout=tts_timeout_s)
+        tts_metrics = speech_pipeline.get_metrics()
+        ctx["result_container"].set_data("tts_metrics", tts_metrics)
+        if tts_metrics["first_audio_ms"] is not None:
+            logging.info(f"TTS por frases: primer audio a los {tts_metrics['first_audio_ms']:.0f} ms, "
+                         f"{tts_metrics['segments']}/{tts_metrics['sentences']} frases sintetizadas")
+        return segments
+
+    def save_user(ctx):
+        facial_emotion_data = ctx["facial_emotion"]
+        user_interaction_data = {
+            "text": ctx["transcription"],
+            "facial_dominant": facial_emotion_data.get("stable_dominant_emotion") if facial_emotion_data else None,
+            "facial_scores": facial_emotion_data.get("average_scores") if facial_emotion_data else None,
+            "vocal_analysis": ctx["vocal_emotion"],
+        }
+        return save_interaction_encrypted(ctx["session_id"], 'user', user_interaction_data)
+
+    def save_assistant(ctx):
+        truncated = bool(ctx["result_container"].get_data("llm_truncated"))
+        return save_interaction_encrypted(ctx["session_id"], 'assistant', {"text": ctx["llm"], "truncated": truncated})
+
+    def memory(ctx):
+        publish = lambda facts: ctx["result_container"].set_data("memory_update", facts)
+        if memory_worker is not None:
+            # Se encola y vuelve enseguida: la extracción se agrupa con otros turnos en el worker
+            return memory_worker.submit(ctx["transcription"], ctx["llm"], ctx["long_term_memory"], on_update=publish)
+        if not has_memory_cues(ctx["transcription"]):
+            return {}
+        memory_prompt = build_batch_memory_extraction_prompt([(ctx["transcription"], ctx["llm"])],
+                                                             known_memory=dict(ctx["long_term_memory"]))
+        extracted_facts = extract_memory_from_text(memory_prompt)
+        if extracted_facts:
+            logging.info(f"Hechos de memoria extraídos: {extracted_facts}")
+            if not save_memory_facts(extracted_facts):
+                raise RuntimeError("No se pudieron guardar los hechos de memoria en la base de datos.")
+            # Una sola actualización: la siguiente consulta ve todos los hechos nuevos o ninguno
+            ctx["long_term_memory"].update(extracted_facts)
+            publish(extracted_facts)
+        return extracted_facts
+
+    return TurnPipeline([
+        Stage("decode", decode),
+        Stage("transcription", transcription, deps=("decode",)),
+        Stage("vocal_emotion", vocal_emotion, deps=("decode",)),
+        Stage("llm", llm, deps=("transcription", "vocal_emotion")),
+        Stage("tts", tts, deps=("llm",)),
+        # El orden user -> assistant se conserva en la tabla de interacciones
+        Stage("save_user", save_user, deps=("transcription", "vocal_emotion"), critical=False),
+        Stage("save_assistant", save_assistant, deps=("llm", "save_user"), critical=False),
+        Stage("memory", memory, deps=("llm",), critical=False),
+    ])
@@ -3,35 +3,119 @@
 from groq import Groq
 import config
 import json
+import logging
+import threading
+import time
+from src.chat.resilient_client import ResilientChatClient
 
 try:
-    groq_client = Groq(api_key=config.GROQ_API_KEY)
+    # Sin reintentos en el SDK: la política de reintentos, plazos y respaldos es de ResilientChatClient
+    groq_client = Groq(api_key=config.GROQ_API_KEY, base_url=config.GROQ_BASE_URL, max_retries=0)
 except Exception as e:
     print(f"Error al inicializar el cliente de Groq: {e}")
     groq_client = None
 
-def get_groq_response(messages: list):
-    """Envía una lista de mensajes al LLM de Groq y devuelve la respuesta."""
+_chat_client = None
+_chat_client_lock = threading.Lock()
+
+def get_chat_client() -> ResilientChatClient:
+    """Cliente con la política de `config.LLM_CLIENT` sobre `groq_client` (se recrea si éste cambia)."""
+    global _chat_client
+    with _chat_client_lock:
+        if _chat_client is None or _chat_client.client is not groq_client:
+            _chat_client = ResilientChatClient(groq_client, **config.LLM_CLIENT)
+        return _chat_client
+
+def stream_groq_response(messages: list, metrics: dict = None):
+    """
+    Envía una lista de mensajes al LLM de Groq y devuelve los fragmentos de texto
+    a medida que llegan. Si se pasa `metrics`, se rellena al terminar con:
+    - "ttft_ms": tiempo hasta el primer token,
+    - "total_ms": duración total de la respuesta,
+    - "completion_tokens": tokens generados (los que informa Groq o, si no, el número de fragmentos),
+    - "tokens_per_s": velocidad de generación desde el primer token,
+    - "model": modelo que respondió,
+    - "truncated": True si el stream falló después del primer token (el texto recibido está incompleto),
+    - "error": descripción del fallo, o None.
+    """
     if not groq_client:
-        return "Error: Cliente de Groq no inicializado."
+        yield "Error: Cliente de Groq no inicializado."
+        return
+    start = time.perf_counter()
+    first_token_at = None
+    chunks = 0
+    usage = None
+    model = None
+    error = None
     try:
-        response = groq_client.chat.completions.create(
+        stream = get_chat_client().create(
             messages=messages,
-            model="llama-3.1-8b-instant"
+            stream=True
         )
-        return response.choices[0].message.content
+        for chunk in stream:
+            # El último fragmento trae el uso de tokens en `x_groq`
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+            # Con modelos de respaldo, el que respondió puede no ser el primero de la lista
+            model = getattr(chunk, "model", None) or model
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if not content:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            chunks += 1
+            yield content
     except Exception as e:
+        error = repr(e)
         print(f"Error al comunicarse con la API de Groq: {e}")
-        return "Lo siento, tuve un problema al generar una respuesta."
+        if first_token_at is None:
+            yield "Lo siento, tuve un problema al generar una respuesta."
+        else:
+            logging.warning(f"El stream del LLM se cortó tras {chunks} fragmentos; la respuesta queda incompleta: {e!r}")
+    finally:
+        if metrics is not None:
+            end = time.perf_counter()
+            completion_tokens = getattr(usage, "completion_tokens", None) or chunks
+            generation_s = end - first_token_at if first_token_at is not None else 0.0
+            metrics.update({
+                "ttft_ms": (first_token_at - start) * 1000 if first_token_at is not None else None,
+                "total_ms": (end - start) * 1000,
+                "completion_tokens": completion_tokens,
+                "tokens_per_s": completion_tokens / generation_s if generation_s > 0 else None,
+                "model": model,
+                "truncated": error is not None and first_token_at is not None,
+                "error": error,
+            })
+
+def get_groq_response(messages: list):
+    """Envía una lista de mensajes al LLM de Groq y devuelve la respuesta completa."""
+    return "".join(stream_groq_response(messages))
+
+def summarize_conversation(prompt: str, max_tokens: int = 300) -> str:
+    """Envía un prompt de resumen y devuelve el texto, o None si falla."""
+    if not groq_client:
+        return None
+    try:
+        response = get_chat_client().create(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content.strip()
+    except Exception as e:
+        print(f"Error al resumir la conversación: {e}")
+        return None
 
 def extract_memory_from_text(prompt: str) -> dict:
     """Envía un prompt de extracción y espera una respuesta JSON."""
     if not groq_client:
         return {}
     try:
-        response = groq_client.chat.completions.create(
+        response = get_chat_client().create(
             messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
             temperature=0.0,
             response_format={"type": "json_object"}
         )
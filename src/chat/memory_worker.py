@@ -0,0 +1,218 @@
+# src/chat/memory_worker.py | Extracción de memoria a largo plazo en segundo plano y por lotes
+
+"""
+La extracción de hechos sobre el usuario es una segunda llamada al LLM que no
+hace falta para responder. En lugar de hacerla en cada turno:
+
+- Un filtro barato descarta los turnos que claramente no aportan hechos
+  (respuestas muy cortas o sin ninguna expresión típica de un hecho sobre el usuario).
+- Los turnos restantes se encolan y un hilo los agrupa: tras el primero espera
+  hasta `max_wait_s` a que lleguen más, hasta `max_batch_turns`, y extrae los
+  hechos de todo el lote con una sola llamada.
+- Los hechos del lote se guardan en una sola transacción y después se publican
+  en el dict `long_term_memory` de la sesión, de una vez.
+"""
+
+import logging
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+from src.chat.llm_client import extract_memory_from_text
+from src.chat.prompt_builder import build_batch_memory_extraction_prompt
+from src.database.data_manager import save_memory_facts
+
+METRICS_WINDOW = 200
+
+# Expresiones que acompañan a un hecho de las claves que se extraen (nombre, edad, gustos, metas,
+# temas recurrentes) o a datos de trabajo, estudios y residencia. Las palabras sueltas ("mi",
+# "quiero", "nunca"...) aparecen en casi cualquier frase y dejarían pasar casi todos los turnos.
+MEMORY_CUES = re.compile(
+    r"\b(me llamo|mi nombre|ll[aá]mame|tengo \d+ años|cumpl[oí] \d+|"
+    r"me gustan?|me encantan?|odio|prefiero|no soporto|"
+    r"mi (meta|objetivo|sueño)|quiero (ser|aprender|dejar|conseguir|lograr|empezar)|planeo|"
+    r"trabajo (como|en|de)|estudio (en|para)|estoy estudiando|vivo (en|con|sol[oa])|soy de|"
+    r"me preocupa|me cuesta|sufro de|tengo (ansiedad|depresi[oó]n|insomnio))\b",
+    re.IGNORECASE,
+)
+
+def has_memory_cues(user_text: str, min_words: int = 3) -> bool:
+    """Filtro previo: False si el turno claramente no contiene hechos nuevos sobre el usuario."""
+    if not user_text or len(user_text.split()) < min_words:
+        return False
+    return MEMORY_CUES.search(user_text) is not None
+
+class _Turn:
+    __slots__ = ("user_text", "ai_response", "long_term_memory", "on_update", "enqueued_at")
+
+    def __init__(self, user_text, ai_response, long_term_memory, on_update):
+        self.user_text = user_text
+        self.ai_response = ai_response
+        self.long_term_memory = long_term_memory
+        self.on_update = on_update
+        self.enqueued_at = time.monotonic()
+
+class _Flush:
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+_STOP = object()
+
+class MemoryExtractionWorker:
+    """
+    Parámetros:
+    - extract: función `(prompt) -> dict` que llama al LLM.
+    - save: función `(hechos) -> bool` que los guarda en una sola transacción; si devuelve
+      False, la memoria de la sesión no se actualiza y el lote cuenta como fallido.
+    - max_batch_turns: turnos por llamada de extracción.
+    - max_wait_s: tiempo máximo que el primer turno de un lote espera a los demás.
+    - min_words: los turnos más cortos no se analizan.
+    - max_queue_size: turnos pendientes; con la cola llena el turno se descarta (la memoria no es crítica).
+    """
+    def __init__(self, extract=None, save=None, max_batch_turns: int = 4, max_wait_s: float = 20.0,
+                 min_words: int = 3, max_queue_size: int = 64):
+        if max_batch_turns < 1:
+            raise ValueError("max_batch_turns debe ser al menos 1.")
+        self.extract = extract or extract_memory_from_text
+        self.save = save or save_memory_facts
+        self.max_batch_turns = max_batch_turns
+        self.max_wait_s = max_wait_s
+        self.min_words = min_words
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._running = True
+
+        # Métricas
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._filtered = 0
+        self._dropped = 0
+        self._extractions = 0
+        self._failed = 0
+        self._facts_saved = 0
+        self._batch_sizes = deque(maxlen=METRICS_WINDOW)
+        self._extraction_latencies = deque(maxlen=METRICS_WINDOW)
+
+        self._worker = threading.Thread(target=self._run, name="memory-extraction", daemon=True)
+        self._worker.start()
+
+    def submit(self, user_text: str, ai_response: str, long_term_memory: dict, on_update=None) -> bool:
+        """
+        Encola un turno sin bloquear. Devuelve False si el filtro previo lo descarta
+        o la cola está llena. `on_update(hechos)` se invoca tras guardar los hechos del lote.
+        """
+        if not self._running:
+            raise RuntimeError("El worker de memoria está detenido.")
+        with self._lock:
+            self._submitted += 1
+        if not has_memory_cues(user_text, self.min_words):
+            with self._lock:
+                self._filtered += 1
+            return False
+        try:
+            self._queue.put_nowait(_Turn(user_text, ai_response, long_term_memory, on_update))
+        except queue.Full:
+            logging.warning("Cola de extracción de memoria llena; se descarta el turno.")
+            with self._lock:
+                self._dropped += 1
+            return False
+        return True
+
+    def _collect_batch(self, first):
+        """Devuelve (lote, señal): la señal es un `_Flush` o `_STOP` que cortó la espera, o None."""
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait_s
+        while len(batch) < self.max_batch_turns:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP or isinstance(item, _Flush):
+                return batch, item
+            batch.append(item)
+        return batch, None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            if isinstance(item, _Flush):
+                item.done.set()
+                continue
+            batch, signal = self._collect_batch(item)
+            self._run_batch(batch)
+            if signal is _STOP:
+                return
+            if signal is not None:
+                signal.done.set()
+
+    def _run_batch(self, batch):
+        # Un lote por dict de memoria: los turnos de sesiones distintas no se mezclan en el mismo prompt
+        groups = {}
+        for turn in batch:
+            groups.setdefault(id(turn.long_term_memory), []).append(turn)
+        for turns in groups.values():
+            long_term_memory = turns[0].long_term_memory
+            prompt = build_batch_memory_extraction_prompt([(turn.user_text, turn.ai_response) for turn in turns],
+                                                          known_memory=dict(long_term_memory))
+            started = time.monotonic()
+            try:
+                extracted_facts = self.extract(prompt) or {}
+                facts = {key: value for key, value in extracted_facts.items() if value not in (None, "")}
+                if facts:
+                    # La memoria de la sesión sólo cambia si los hechos quedaron guardados
+                    if not self.save(facts):
+                        raise RuntimeError("No se pudieron guardar los hechos de memoria en la base de datos.")
+                    # Una sola actualización: la siguiente consulta ve todos los hechos nuevos o ninguno
+                    long_term_memory.update(facts)
+                    logging.info(f"Hechos de memoria extraídos de {len(turns)} turno(s): {facts}")
+            except Exception as e:
+                logging.error(f"Error en la extracción de memoria: {e}")
+                with self._lock:
+                    self._failed += 1
+                continue
+            with self._lock:
+                self._extractions += 1
+                self._facts_saved += len(facts)
+                self._batch_sizes.append(len(turns))
+                self._extraction_latencies.append(time.monotonic() - started)
+            for turn in turns:
+                if turn.on_update is not None:
+                    try:
+                        turn.on_update(facts)
+                    except Exception as e:
+                        logging.error(f"Error en el callback de memoria: {e}")
+
+    def flush(self, timeout: float = None) -> bool:
+        """Procesa ya los turnos pendientes sin esperar a `max_wait_s`. Devuelve False si no terminó a tiempo."""
+        flush = _Flush()
+        self._queue.put(flush)
+        return flush.done.wait(timeout)
+
+    def get_metrics(self) -> dict:
+        """Turnos recibidos, filtrados y descartados; llamadas de extracción y turnos por llamada."""
+        with self._lock:
+            sizes = list(self._batch_sizes)
+            latencies = list(self._extraction_latencies)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "submitted": self._submitted,
+                "filtered": self._filtered,
+                "dropped": self._dropped,
+                "extractions": self._extractions,
+                "failed": self._failed,
+                "facts_saved": self._facts_saved,
+                "turns_per_extraction_avg": sum(sizes) / len(sizes) if sizes else None,
+                "extraction_latency_avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else None,
+            }
+
+    def stop(self, timeout: float = 30.0):
+        """Deja de aceptar turnos, extrae los ya encolados y detiene el hilo."""
+        self._running = False
+        self._queue.put(_STOP)
+        self._worker.join(timeout=timeout)
@@ -1,8 +1,11 @@
 # src/chat/prompt_builder.py
 
-def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: dict, long_term_memory: dict) -> list:
-    """Construye la lista de mensajes para el LLM, incluyendo historia y contexto."""
-    
+def build_system_prompt(long_term_memory: dict) -> str:
+    """
+    Prompt de sistema con la memoria a largo plazo. No incluye nada que cambie en cada
+    turno (la emoción va en el mensaje del usuario), así que es un prefijo estable que
+    el caché de prompts del proveedor puede reutilizar entre turnos.
+    """
     system_prompt = (
         "Eres PsyAI, un asistente de IA compasivo y empático. Tu objetivo es escuchar, "
         "ofrecer apoyo y mantener una conversación constructiva. Responde de forma concisa "
@@ -10,13 +13,15 @@ def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: di
         "recomienda buscar ayuda profesional inmediatamente."
     )
     
-    # Añadir memoria a largo plazo al contexto
+    # Añadir memoria a largo plazo al contexto (ordenada, para que el texto no cambie si no cambian los hechos)
     if long_term_memory:
-        memory_str = "\n".join([f"- {key.replace('_', ' ').capitalize()}: {value}" for key, value in long_term_memory.items()])
+        memory_str = "\n".join([f"- {key.replace('_', ' ').capitalize()}: {value}" for key, value in sorted(long_term_memory.items())])
         system_prompt += f"\n\n### Datos clave recordados sobre el usuario:\n{memory_str}"
+    return system_prompt
 
-    # Construir el prompt del usuario con contexto emocional multimodal
-    facial_emotion = emotion_data.get('facial_dominant', 'neutral')
+def build_user_content(latest_user_text: str, emotion_data: dict) -> str:
+    """Mensaje del usuario con el contexto emocional multimodal del turno."""
+    facial_emotion = emotion_data.get('facial_dominant') or 'neutral'
     vocal_emotion_data = emotion_data.get('vocal_emotions', [])
     
     # Seleccionar la emoción vocal más probable
@@ -28,7 +33,19 @@ def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: di
         f"- Tono de voz: {vocal_emotion.capitalize()}"
     )
     
-    final_user_content = f"{emotional_context}\n\nMensaje del usuario: \"{latest_user_text}\""
+    return f"{emotional_context}\n\nMensaje del usuario: \"{latest_user_text}\""
+
+def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: dict, long_term_memory: dict,
+                     context=None) -> list:
+    """
+    Construye la lista de mensajes para el LLM, incluyendo historia y contexto.
+    `chat_history` no incluye el mensaje actual. Con un `ConversationContext`, la
+    historia se ajusta a su presupuesto de tokens (resumen + turnos recientes).
+    """
+    system_prompt = build_system_prompt(long_term_memory)
+    final_user_content = build_user_content(latest_user_text, emotion_data)
+    if context is not None:
+        return context.build_messages(system_prompt, chat_history, final_user_content)
     
     # Construir el historial completo para enviar a la API
     messages = [{"role": "system", "content": system_prompt}]
@@ -37,18 +54,46 @@ def build_llm_prompt(chat_history: list, latest_user_text: str, emotion_data: di
     
     return messages
 
-def build_memory_extraction_prompt(user_text: str, ai_response: str) -> str:
-    """Construye un prompt para que el LLM extraiga hechos en formato JSON."""
-    
+def build_batch_memory_extraction_prompt(turns: list, known_memory: dict = None) -> str:
+    """
+    Construye un único prompt de extracción para varios turnos (pares usuario/PsyAI).
+    Los hechos ya conocidos se incluyen para que sólo se devuelvan los nuevos o cambiados.
+    """
+    conversation = "".join(
+        f"\nUsuario: \"{user_text}\"\nPsyAI: \"{ai_response}\"" for user_text, ai_response in turns
+    )
+    known = ""
+    if known_memory:
+        known = "\n--- HECHOS YA CONOCIDOS ---" + "".join(f"\n{key}: {value}" for key, value in known_memory.items())
     prompt = (
         "Analiza la siguiente conversación y extrae hechos clave sobre el usuario. "
         "Devuelve SÓLO un objeto JSON. Claves válidas son: 'nombre', 'edad', "
         "'tema_recurrente', 'preferencia_personal', 'meta_u_objetivo'. "
-        "Si no se mencionan hechos nuevos o relevantes, devuelve un JSON vacío {}."
+        "Si un hecho cambia a lo largo de la conversación, usa el valor más reciente. "
+        "Devuelve sólo los hechos nuevos o que cambian respecto a los ya conocidos; "
+        "si no hay ninguno, devuelve un JSON vacío {}."
+        f"{known}"
         "\n--- CONVERSACIÓN ---"
-        f"\nUsuario: \"{user_text}\""
-        f"\nPsyAI: \"{ai_response}\""
+        f"{conversation}"
         "\n--- FIN DE LA CONVERSACIÓN ---"
         "\nJSON extraído:"
     )
-    return prompt
\ No newline at end of file
+    return prompt
+
+def build_summary_prompt(previous_summary: str, messages: list, max_words: int = 200) -> str:
+    """Construye un prompt para actualizar el resumen de la conversación con los mensajes más antiguos."""
+    conversation = "".join(
+        f"\n{'Usuario' if message['role'] == 'user' else 'PsyAI'}: \"{message['content']}\"" for message in messages
+    )
+    prompt = (
+        "Actualiza el resumen de una sesión de apoyo emocional entre el usuario y PsyAI. "
+        "Conserva los temas tratados, cómo se ha sentido el usuario y lo acordado; omite saludos y detalles menores. "
+        f"Escribe en tercera persona, en un solo párrafo de como máximo {max_words} palabras, y devuelve SÓLO el resumen."
+        "\n--- RESUMEN ANTERIOR ---"
+        f"\n{previous_summary or '(vacío)'}"
+        "\n--- NUEVOS MENSAJES ---"
+        f"{conversation}"
+        "\n--- FIN ---"
+        "\nResumen actualizado:"
+    )
+    return prompt
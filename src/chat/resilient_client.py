@@ -0,0 +1,261 @@
+# src/chat/resilient_client.py | Llamadas al LLM con plazo, reintentos, peticiones duplicadas y modelos de respaldo
+
+"""
+Una llamada lenta a Groq no debe bloquear el turno entero. `ResilientChatClient`
+envuelve `client.chat.completions.create` con una política de latencia:
+
+- Plazo total por llamada (`deadline_s`) y tiempo máximo por intento
+  (`attempt_timeout_s`); al agotarse el plazo se lanza `TimeoutError`.
+- Reintentos de los errores transitorios (tiempo agotado, conexión, 429, 5xx)
+  con espera exponencial con jitter completo.
+- Petición duplicada ("hedge"): si el intento no respondió tras el p95 reciente
+  del modelo, se lanza una segunda petición idéntica y gana la primera que
+  responda. La perdedora se descarta (y se cierra, si es un stream).
+- Modelos de respaldo: si un modelo agota sus reintentos o devuelve un error
+  no transitorio (p. ej. modelo retirado), se prueba el siguiente de la lista.
+
+En streaming, la política cubre hasta el primer fragmento: una vez llegan
+tokens, la respuesta sigue con esa conexión (reintentar duplicaría el texto).
+
+Por cada modelo se registran dos histogramas de latencia, uno hasta la
+respuesta completa (sin streaming) y otro hasta el primer fragmento (con
+streaming), además de los errores, reintentos y duplicados. Cada tipo de
+llamada calcula su espera antes del duplicado con su propio histograma: los
+resúmenes y extracciones de memoria en segundo plano no alteran el p95 del
+primer fragmento del chat.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import groq
+
+METRICS_WINDOW = 200
+# Límites superiores de los cubos del histograma, en milisegundos (el último recoge el resto)
+LATENCY_BUCKETS_MS = (100, 200, 400, 800, 1600, 3200, 6400)
+# Muestras mínimas antes de usar el p95 medido como espera del duplicado
+HEDGE_MIN_SAMPLES = 10
+
+TRANSIENT_ERRORS = (groq.APITimeoutError, groq.APIConnectionError, groq.RateLimitError, groq.InternalServerError,
+                    TimeoutError, ConnectionError)
+
+def is_transient(error: Exception) -> bool:
+    """Errores que merece la pena reintentar con el mismo modelo."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+class LatencyHistogram:
+    """Histograma acumulado por cubos más una ventana reciente para los percentiles."""
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS, window: int = METRICS_WINDOW):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self._recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        latency_ms = seconds * 1000
+        index = next((i for i, bound in enumerate(self.buckets_ms) if latency_ms <= bound), len(self.buckets_ms))
+        self.counts[index] += 1
+        self._recent.append(seconds)
+
+    def __len__(self):
+        return len(self._recent)
+
+    def quantile(self, fraction: float):
+        values = sorted(self._recent)
+        return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound}ms" for bound in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {
+            "count": sum(self.counts),
+            "buckets": dict(zip(labels, self.counts)),
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+        }
+
+class _ModelStats:
+    def __init__(self):
+        # Latencia hasta la respuesta completa y hasta el primer fragmento: no son comparables
+        self.latency = {False: LatencyHistogram(), True: LatencyHistogram()}
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallback_calls = 0
+
+class ResilientChatClient:
+    """
+    Parámetros:
+    - client: cliente de Groq (conviene crearlo con `max_retries=0`: los reintentos son de esta capa).
+    - models: modelos en orden de preferencia; los siguientes son de respaldo.
+    - deadline_s: plazo total de una llamada, sumando reintentos y respaldos.
+    - attempt_timeout_s: tiempo máximo de cada intento.
+    - max_retries: reintentos por modelo ante errores transitorios.
+    - backoff_base_s / backoff_max_s: espera exponencial con jitter entre reintentos.
+    - hedge: activa la petición duplicada.
+    - hedge_quantile: percentil de la latencia reciente tras el que se duplica la petición.
+    - hedge_min_delay_s: espera mínima antes de duplicar.
+    - hedge_default_delay_s: espera antes de duplicar mientras no hay suficientes muestras.
+    """
+    def __init__(self, client, models, deadline_s: float = 20.0, attempt_timeout_s: float = 8.0,
+                 max_retries: int = 2, backoff_base_s: float = 0.25, backoff_max_s: float = 2.0,
+                 hedge: bool = True, hedge_quantile: float = 0.95, hedge_min_delay_s: float = 0.3,
+                 hedge_default_delay_s: float = 1.5, max_workers: int = 16):
+        if not models:
+            raise ValueError("Se necesita al menos un modelo.")
+        self.client = client
+        self.models = list(models)
+        self.deadline_s = deadline_s
+        self.attempt_timeout_s = attempt_timeout_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_s = hedge_min_delay_s
+        self.hedge_default_delay_s = hedge_default_delay_s
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-call")
+        self._stats = {model: _ModelStats() for model in self.models}
+        self._lock = threading.Lock()
+
+    def create(self, messages: list, stream: bool = False, deadline_s: float = None, **kwargs):
+        """
+        Igual que `chat.completions.create` pero sin `model`: lo elige la política.
+        Sin streaming devuelve la respuesta; con streaming, un iterador de fragmentos.
+        Lanza `TimeoutError` si se agota el plazo y el último error si fallan todos los modelos.
+        """
+        deadline = time.monotonic() + (deadline_s if deadline_s is not None else self.deadline_s)
+        last_error = None
+        for position, model in enumerate(self.models):
+            if position > 0:
+                logging.warning(f"LLM: se usa el modelo de respaldo '{model}' tras: {last_error!r}")
+                with self._lock:
+                    self._stats[model].fallback_calls += 1
+            for attempt in range(self.max_retries + 1):
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Plazo de la llamada al LLM agotado; último error: {last_error!r}")
+                try:
+                    result = self._hedged_attempt(model, messages, stream, kwargs, deadline)
+                except Exception as e:
+                    last_error = e
+                    if isinstance(e, TimeoutError) and time.monotonic() >= deadline:
+                        raise
+                    if not is_transient(e):
+                        break
+                    if attempt < self.max_retries:
+                        with self._lock:
+                            self._stats[model].retries += 1
+                        # Jitter completo: espera aleatoria en [0, base * 2^intento], acotada y dentro del plazo
+                        backoff = random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+                        time.sleep(max(0.0, min(backoff, deadline - time.monotonic())))
+                    continue
+                return self._chain(result) if stream else result
+        raise last_error
+
+    @staticmethod
+    def _chain(result):
+        first_chunk, stream = result
+        if first_chunk is not None:
+            yield first_chunk
+        yield from stream
+
+    def _call(self, model, messages, stream, kwargs, timeout):
+        """Un intento: la respuesta completa o, en streaming, (primer fragmento, resto del stream)."""
+        started = time.monotonic()
+        with self._lock:
+            self._stats[model].requests += 1
+        try:
+            response = self.client.chat.completions.create(messages=messages, model=model, stream=stream,
+                                                           timeout=timeout, **kwargs)
+            if stream:
+                iterator = iter(response)
+                response = (next(iterator, None), iterator)
+        except Exception:
+            with self._lock:
+                self._stats[model].errors += 1
+            raise
+        with self._lock:
+            self._stats[model].latency[stream].record(time.monotonic() - started)
+        return response
+
+    def _hedge_delay(self, model, stream: bool) -> float:
+        with self._lock:
+            latency = self._stats[model].latency[stream]
+            measured = latency.quantile(self.hedge_quantile) if len(latency) >= HEDGE_MIN_SAMPLES else None
+        return max(self.hedge_min_delay_s, measured if measured is not None else self.hedge_default_delay_s)
+
+    @staticmethod
+    def _discard(future):
+        """Cierra el stream de una petición perdedora cuando termine."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        if isinstance(result, tuple) and hasattr(result[1], "close"):
+            try:
+                result[1].close()
+            except Exception:
+                pass
+
+    def _hedged_attempt(self, model, messages, stream, kwargs, deadline):
+        timeout = max(0.01, min(self.attempt_timeout_s, deadline - time.monotonic()))
+        attempt_deadline = time.monotonic() + timeout
+        pending = {self._executor.submit(self._call, model, messages, stream, kwargs, timeout): False}
+        hedge_at = time.monotonic() + self._hedge_delay(model, stream) if self.hedge else None
+        first_error = None
+        while pending:
+            now = time.monotonic()
+            wake_at = min(attempt_deadline, hedge_at) if hedge_at is not None else attempt_deadline
+            done, _ = wait(list(pending), timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                is_hedge = pending.pop(future)
+                if future.exception() is not None:
+                    first_error = first_error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(self._discard)
+                if is_hedge:
+                    with self._lock:
+                        self._stats[model].hedge_wins += 1
+                return future.result()
+            if hedge_at is not None and time.monotonic() >= hedge_at and pending:
+                # El intento tarda más que el p95 reciente: se duplica una sola vez
+                hedge_at = None
+                remaining = attempt_deadline - time.monotonic()
+                if remaining > 0:
+                    with self._lock:
+                        self._stats[model].hedges += 1
+                    pending[self._executor.submit(self._call, model, messages, stream, kwargs, remaining)] = True
+                continue
+            if not done and time.monotonic() >= attempt_deadline:
+                for loser in pending:
+                    loser.add_done_callback(self._discard)
+                raise TimeoutError(f"El modelo '{model}' no respondió en {timeout:.1f}s.")
+        raise first_error
+
+    def get_metrics(self) -> dict:
+        """
+        Por modelo: histogramas de latencia (`latency` hasta la respuesta completa y
+        `first_chunk_latency` hasta el primer fragmento en streaming), peticiones,
+        errores, reintentos, duplicados y usos como respaldo.
+        """
+        with self._lock:
+            return {
+                model: {
+                    "latency": stats.latency[False].snapshot(),
+                    "first_chunk_latency": stats.latency[True].snapshot(),
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "hedges": stats.hedges,
+                    "hedge_wins": stats.hedge_wins,
+                    "fallback_calls": stats.fallback_calls,
+                }
+                for model, stats in self._stats.items()
+            }
@@ -0,0 +1,308 @@
+# src/chat/turn_pipeline.py | Orquestador de las etapas de un turno como grafo de dependencias
+
+"""
+Ejecuta las etapas de un turno de conversación según sus dependencias.
+
+- Cada etapa empieza en cuanto terminan todas las etapas de las que depende, así
+  que las etapas independientes (p. ej. transcripción y emoción vocal) corren en
+  paralelo.
+- Las etapas críticas forman la ruta de respuesta: `run()` vuelve en cuanto
+  terminan; `start()` vuelve enseguida para mostrar resultados parciales (p. ej.
+  los tokens del LLM a través de un `StageStream`) mientras el turno avanza. Las no críticas (escrituras en la base de datos, extracción de
+  memoria) siguen en un pool de fondo compartido y no retrasan la respuesta.
+- Las etapas críticas de cada turno corren en hilos propios del turno: el grafo
+  se comparte entre sesiones (`st.cache_resource`) y las etapas llm y tts ocupan
+  su hilo mientras dura la respuesta, así que un pool común haría que un turno
+  esperase a que terminasen los de otras sesiones.
+- Una etapa puede lanzar `StageSkipped` para indicar que no aplica (p. ej. no
+  hubo voz); las etapas que dependen de una etapa omitida o fallida se omiten.
+
+Cada etapa recibe un dict con las entradas del turno y los resultados de las
+etapas ya completadas, y se registra su inicio, fin y estado.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+class StageSkipped(Exception):
+    """La etapa no aplica en este turno; sus dependientes tampoco se ejecutan."""
+
+class Stage:
+    """
+    - name: nombre único de la etapa (también es la clave de su resultado).
+    - func: callable que recibe el dict de contexto y devuelve el resultado.
+    - deps: nombres de las etapas que deben terminar antes.
+    - critical: si False, la etapa no bloquea la respuesta del turno.
+    """
+    def __init__(self, name: str, func, deps=(), critical: bool = True):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.critical = critical
+
+class StageStream:
+    """
+    Canal entre una etapa (productor, en su hilo) y el script de Streamlit
+    (consumidor): `put()` publica elementos y la iteración termina al llamar a `close()`.
+    """
+    _CLOSED = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        self._queue.put(item)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(self._CLOSED)
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if item is self._CLOSED:
+                return
+            yield item
+
+def merge_stage_streams(streams: dict, poll_interval_s: float = None):
+    """
+    Itera varios `StageStream` a la vez y devuelve (nombre, elemento) en orden de
+    llegada hasta que se cierren todos. Con `poll_interval_s`, devuelve (None, None)
+    si no llega nada en ese intervalo, para que el consumidor pueda hacer otras tareas.
+    """
+    merged = queue.Queue()
+    closed = object()
+
+    def forward(name, stream):
+        for item in stream:
+            merged.put((name, item))
+        merged.put((name, closed))
+
+    for name, stream in streams.items():
+        threading.Thread(target=forward, args=(name, stream), name=f"stream-{name}", daemon=True).start()
+    remaining = len(streams)
+    while remaining:
+        try:
+            name, item = merged.get(timeout=poll_interval_s)
+        except queue.Empty:
+            yield None, None
+            continue
+        if item is closed:
+            remaining -= 1
+            continue
+        yield name, item
+
+class TurnResult:
+    """Resultados y tiempos de un turno. Las etapas de fondo se completan después de `run()`."""
+    def __init__(self, inputs: dict):
+        self.values = dict(inputs)
+        self.status = {}
+        self.errors = {}
+        self.timings = {}
+        self.critical_ms = None
+        self._futures = {}
+        self._critical = []
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, default=None):
+        with self._lock:
+            return self.values.get(name, default)
+
+    def _record(self, name, status, start, end, value=None, error=None):
+        with self._lock:
+            self.status[name] = status
+            if status == "ok":
+                self.values[name] = value
+            if error is not None:
+                self.errors[name] = error
+            self.timings[name] = {
+                "start_ms": (start - self._started) * 1000,
+                "end_ms": (end - self._started) * 1000,
+                "duration_ms": (end - start) * 1000,
+            }
+
+    def _context(self):
+        with self._lock:
+            return dict(self.values)
+
+    def wait_stage(self, name: str, timeout: float = None):
+        """Espera a que termine una etapa y devuelve su estado ("ok", "skipped", "error") o None si no terminó a tiempo."""
+        done, _ = wait([self._futures[name]], timeout=timeout)
+        if not done:
+            return None
+        with self._lock:
+            return self.status.get(name)
+
+    def on_stage_done(self, name: str, callback):
+        """Invoca `callback(self)` cuando termine la etapa `name`, con cualquier estado."""
+        self._futures[name].add_done_callback(lambda _: callback(self))
+
+    def wait_critical(self, timeout: float = None):
+        """Espera a las etapas críticas; lanza TimeoutError si no terminaron a tiempo."""
+        _, not_done = wait(self._critical, timeout=timeout)
+        if not_done:
+            raise TimeoutError(f"Las etapas críticas del turno no terminaron en {timeout}s.")
+        if self.critical_ms is None:
+            self.critical_ms = (time.perf_counter() - self._started) * 1000
+        return self
+
+    def wait_background(self, timeout: float = None) -> bool:
+        """Espera a que terminen todas las etapas (también las de fondo). Devuelve False si no terminaron a tiempo."""
+        _, not_done = wait(list(self._futures.values()), timeout=timeout)
+        return not not_done
+
+    def on_complete(self, callback):
+        """Invoca `callback(self)` cuando terminen todas las etapas, incluidas las de fondo."""
+        futures = list(self._futures.values())
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                try:
+                    callback(self)
+                except Exception as e:
+                    logging.error(f"Error en el callback de fin de turno: {e}")
+        for future in futures:
+            future.add_done_callback(done)
+
+    def timings_summary(self) -> dict:
+        """Tiempos por etapa (con su estado) más la duración de la ruta crítica."""
+        with self._lock:
+            stages = {name: dict(timing, status=self.status.get(name)) for name, timing in self.timings.items()}
+            return {"critical_ms": self.critical_ms, "stages": stages}
+
+# Pool compartido para las etapas no críticas: sobrevive al final del script (p. ej. `st.rerun()`)
+_background_executor = None
+_background_lock = threading.Lock()
+
+def _get_background_executor() -> ThreadPoolExecutor:
+    global _background_executor
+    with _background_lock:
+        if _background_executor is None:
+            _background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="turn-background")
+        return _background_executor
+
+class TurnPipeline:
+    """
+    Grafo de etapas validado una vez y ejecutable en cada turno con `run(inputs)`.
+    `max_workers` limita los hilos de las etapas críticas de un turno (por defecto, uno por etapa crítica).
+    """
+    def __init__(self, stages: list, max_workers: int = None, background_executor: ThreadPoolExecutor = None):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Etapa duplicada: '{stage.name}'.")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"La etapa '{stage.name}' depende de '{dep}', que no existe.")
+                if stage.critical and not self.stages[dep].critical:
+                    raise ValueError(f"La etapa crítica '{stage.name}' no puede depender de la etapa de fondo '{dep}'.")
+        self._check_acyclic()
+        self.max_workers = max_workers or max(1, sum(stage.critical for stage in stages))
+        self._background_executor = background_executor
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Ciclo de dependencias en la etapa '{name}'.")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+        for name in self.stages:
+            visit(name)
+
+    def _execute(self, stage: Stage, result: TurnResult):
+        start = time.perf_counter()
+        try:
+            value = stage.func(result._context())
+        except StageSkipped:
+            result._record(stage.name, "skipped", start, time.perf_counter())
+            raise
+        except Exception as e:
+            logging.error(f"Error en la etapa '{stage.name}' del turno: {e}")
+            result._record(stage.name, "error", start, time.perf_counter(), error=e)
+            raise
+        result._record(stage.name, "ok", start, time.perf_counter(), value=value)
+        return value
+
+    def _launch(self, stage: Stage, result: TurnResult, future: Future, executor: ThreadPoolExecutor):
+        """Ejecuta la etapa si todas sus dependencias terminaron bien; si no, la marca como omitida."""
+        if any(result.status.get(dep) != "ok" for dep in stage.deps):
+            now = time.perf_counter()
+            result._record(stage.name, "skipped", now, now)
+            future.set_exception(StageSkipped(f"Dependencia omitida o fallida de '{stage.name}'."))
+            return
+        if not stage.critical:
+            executor = self._background_executor or _get_background_executor()
+
+        def task():
+            try:
+                future.set_result(self._execute(stage, result))
+            except BaseException as e:
+                future.set_exception(e)
+        executor.submit(task)
+
+    def start(self, inputs: dict = None) -> TurnResult:
+        """Lanza el turno y vuelve enseguida; `wait_critical()` espera la respuesta."""
+        result = TurnResult(inputs or {})
+        result._futures = {name: Future() for name in self.stages}
+        result._critical = [result._futures[name] for name, stage in self.stages.items() if stage.critical]
+        pending = {name: len(stage.deps) for name, stage in self.stages.items()}
+        pending_lock = threading.Lock()
+
+        # Hilos propios del turno para sus etapas críticas; se liberan cuando terminan todas
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="turn-stage")
+        critical_left = [len(result._critical)]
+
+        def on_critical_done(_):
+            with pending_lock:
+                critical_left[0] -= 1
+                finished = critical_left[0] == 0
+            if finished:
+                executor.shutdown(wait=False)
+        for future in result._critical:
+            future.add_done_callback(on_critical_done)
+        if not result._critical:
+            executor.shutdown(wait=False)
+
+        def on_done(dep_name):
+            ready = []
+            with pending_lock:
+                for name, stage in self.stages.items():
+                    if dep_name in stage.deps:
+                        pending[name] -= 1
+                        if pending[name] == 0:
+                            ready.append(stage)
+            for stage in ready:
+                self._launch(stage, result, result._futures[stage.name], executor)
+
+        for name, future in result._futures.items():
+            future.add_done_callback(lambda _, name=name: on_done(name))
+        for stage in self.stages.values():
+            if not stage.deps:
+                self._launch(stage, result, result._futures[stage.name], executor)
+        return result
+
+    def run(self, inputs: dict = None, timeout: float = None) -> TurnResult:
+        """Ejecuta el turno y vuelve al terminar las etapas críticas."""
+        return self.start(inputs).wait_critical(timeout)
@@ -72,6 +72,7 @@ def setup_database():
         facial_emotion_dominant TEXT,
         facial_emotion_scores_json TEXT,
         vocal_analysis_json TEXT,
+        truncated INTEGER NOT NULL DEFAULT 0,
         FOREIGN KEY (session_id) REFERENCES sessions (session_id)
     );
     """
@@ -88,6 +89,10 @@ def setup_database():
         cursor.execute(sql_create_sessions_table)
         cursor.execute(sql_create_interactions_table)
         cursor.execute(sql_create_memory_table)
+        # Bases de datos creadas antes de la columna 'truncated' (respuestas cortadas a medias)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(interactions)")}
+        if "truncated" not in columns:
+            cursor.execute("ALTER TABLE interactions ADD COLUMN truncated INTEGER NOT NULL DEFAULT 0")
         conn.commit()
     except Error as e:
         print(f"Error al crear las tablas: {e}")
@@ -95,7 +100,7 @@ def setup_database():
         if conn:
             conn.close()
 
-def start_new_session(model_used="llama-3.1-8b-instant", settings=None):
+def start_new_session(model_used=config.LLM_CLIENT["models"][0], settings=None):
     """Inicia una nueva sesión y devuelve su ID. Maneja su propia conexión."""
     conn = create_connection()
     if conn is None: return None
@@ -120,8 +125,9 @@ def start_new_session(model_used="llama-3.1-8b-instant", settings=None):
 def _save_interaction_internal(conn, session_id, role, data):
     """Función interna para guardar una interacción. Reutiliza una conexión."""
     sql = '''INSERT INTO interactions(session_id, timestamp, role, text_content, 
-                                      facial_emotion_dominant, facial_emotion_scores_json, vocal_analysis_json)
-             VALUES(?,?,?,?,?,?,?)'''
+                                      facial_emotion_dominant, facial_emotion_scores_json, vocal_analysis_json,
+                                      truncated)
+             VALUES(?,?,?,?,?,?,?,?)'''
     try:
         cursor = conn.cursor()
         timestamp = data.get("timestamp", datetime.now().isoformat())
@@ -130,7 +136,7 @@ def _save_interaction_internal(conn, session_id, role, data):
         
         data_tuple = (
             session_id, timestamp, role, data.get("text"),
-            data.get("facial_dominant"), scores_json, vocal_json
+            data.get("facial_dominant"), scores_json, vocal_json, int(bool(data.get("truncated")))
         )
         cursor.execute(sql, data_tuple)
         conn.commit()
@@ -154,7 +160,8 @@ def save_interaction_encrypted(session_id, role, data):
             "text": encrypted_data.get("text"),
             "facial_dominant": data.get("facial_dominant"),
             "facial_scores": data.get("facial_scores"),
-            "vocal_analysis": data.get("vocal_analysis")
+            "vocal_analysis": data.get("vocal_analysis"),
+            "truncated": data.get("truncated")
         }
         interaction_id = _save_interaction_internal(conn, session_id, role, db_payload)
     finally:
@@ -162,23 +169,33 @@ def save_interaction_encrypted(session_id, role, data):
             conn.close()
     return interaction_id
 
-def save_memory_fact(key: str, value):
+def save_memory_fact(key: str, value) -> bool:
     """Guarda o actualiza un hecho en memoria. Maneja su propia conexión."""
+    return save_memory_facts({key: value})
+
+def save_memory_facts(facts: dict) -> bool:
+    """
+    Guarda o actualiza varios hechos en una sola transacción. Maneja su propia conexión.
+    Devuelve True si quedaron guardados (o no había nada que guardar) y False si falló.
+    """
+    if not facts:
+        return True
     conn = create_connection()
-    if conn is None: return
-    
-    # Asegura que el valor sea siempre un string antes de cifrar
-    value_str = str(value)
+    if conn is None: return False
     
     sql = '''INSERT OR REPLACE INTO user_memory(key, value, last_updated)
              VALUES(?,?,?)'''
     try:
-        encrypted_value = cipher.encrypt(value_str)
-        cursor = conn.cursor()
-        cursor.execute(sql, (key, encrypted_value, datetime.now().isoformat()))
-        conn.commit()
+        last_updated = datetime.now().isoformat()
+        # Asegura que el valor sea siempre un string antes de cifrar
+        rows = [(key, cipher.encrypt(str(value)), last_updated) for key, value in facts.items()]
+        # Un solo commit: se guardan todos los hechos o ninguno
+        with conn:
+            conn.executemany(sql, rows)
+        return True
     except Error as e:
         print(f"Error al guardar en memoria: {e}")
+        return False
     finally:
         if conn:
             conn.close()
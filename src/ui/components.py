@@ -1,8 +1,12 @@
 # src/ui/components.py
 
+import base64
+import json
 import streamlit as st
+import streamlit.components.v1 as components
 import time
 from streamlit_webrtc import webrtc_streamer
+from src.chat.turn_pipeline import merge_stage_streams
 
 def render_video_feed(processor_factory, async_processing: bool = False):
     """Renderiza el componente de la cámara y el análisis en vivo."""
@@ -51,6 +55,82 @@ def render_chat_history():
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
+            if message.get("truncated"):
+                st.caption("⚠️ Respuesta incompleta: se perdió la conexión con el modelo.")
+
+# Cola de reproducción que vive en la página principal: sobrevive a los reruns de Streamlit, que
+# eliminan los iframes de los componentes, y encadena cada clip con el evento `ended` del anterior
+_AUDIO_QUEUE_JS = """
+(function () {
+    if (window.psyaiAudioQueue) { return; }
+    const player = new Audio();
+    const pending = [];
+    let playing = false;
+    function playNext() {
+        if (!pending.length) { playing = false; return; }
+        playing = true;
+        player.src = pending.shift();
+        player.play().catch(playNext);
+    }
+    player.addEventListener("ended", playNext);
+    player.addEventListener("error", playNext);
+    window.psyaiAudioQueue = {
+        push: function (src) { pending.push(src); if (!playing) { playNext(); } }
+    };
+})();
+"""
+
+class SequentialAudioPlayer:
+    """
+    Reproduce segmentos de audio uno tras otro con una cola en el navegador.
+
+    Cada `enqueue` añade un componente HTML invisible que entrega el clip (en
+    base64) a un único elemento `Audio` de la página; el siguiente clip empieza
+    en el evento `ended` del anterior. El servidor no controla los tiempos, así
+    que no hay cortes ni silencios por la latencia de la red, y el audio sigue
+    sonando aunque la aplicación haga `st.rerun()`.
+    """
+    def __init__(self, audio_format: str = "audio/mp3"):
+        self.audio_format = audio_format
+        self._container = st.container()
+
+    def enqueue(self, segment: dict):
+        source = f"data:{self.audio_format};base64,{base64.b64encode(segment['audio']).decode()}"
+        script = (
+            "<script>\n"
+            "const page = window.parent;\n"
+            "if (!page.psyaiAudioQueue) {\n"
+            "    const loader = page.document.createElement('script');\n"
+            f"    loader.textContent = {json.dumps(_AUDIO_QUEUE_JS)};\n"
+            "    page.document.head.appendChild(loader);\n"
+            "}\n"
+            f"page.psyaiAudioQueue.push({json.dumps(source)});\n"
+            "</script>"
+        )
+        with self._container:
+            components.html(script, height=0)
+
+def render_streaming_response(token_stream, audio_segments=None):
+    """
+    Renderiza la respuesta del asistente añadiendo los tokens a medida que llegan
+    y, si se pasan `audio_segments`, reproduce cada frase en cuanto se sintetiza.
+    Devuelve el texto completo.
+    """
+    with st.chat_message("assistant"):
+        placeholder = st.empty()
+        player = SequentialAudioPlayer() if audio_segments is not None else None
+        streams = {"token": token_stream}
+        if audio_segments is not None:
+            streams["audio"] = audio_segments
+        response = ""
+        for kind, item in merge_stage_streams(streams, poll_interval_s=0.05):
+            if kind == "token":
+                response += item
+                placeholder.markdown(response + "▌")
+            elif kind == "audio":
+                player.enqueue(item)
+        placeholder.markdown(response)
+    return response
 
 def render_audio_player():
     """Renderiza el reproductor de audio si hay audio de IA para reproducir."""
@@ -0,0 +1,111 @@
+# src/ui/frame_overlay.py | Dibujo de la caja y la emoción sobre los fotogramas de video
+
+"""
+Ruta de fotogramas sin reservas de memoria por fotograma para el procesador de video.
+
+- Sin nada que dibujar, el fotograma original se devuelve intacto.
+- En fotogramas YUV planares (lo que entrega el decodificador de WebRTC), la caja
+  y el texto se dibujan sobre un fotograma de salida propio, sin convertir a BGR.
+  El fotograma decodificado no se modifica nunca: el decodificador puede
+  compartir sus búferes con las imágenes de referencia y con otros consumidores
+  del mismo track, y una caja dibujada en ellos aparecería en otros fotogramas.
+- Los fotogramas de salida se reservan una vez y se reutilizan en rotación
+  (`output_frames`); cada uno debe bastar para cubrir los fotogramas que el
+  codificador aún no ha consumido. Los planos de entrada se copian en ellos con
+  una copia por plano: la imagen entera cambia de un fotograma a otro.
+- La conversión a BGR sólo se hace en los fotogramas que se analizan
+  (`to_bgr`), o como respaldo para formatos no planares.
+
+Lleva la cuenta de los bytes reservados para informar de la tasa de asignación.
+"""
+
+import time
+import av
+import cv2
+import numpy as np
+
+GREEN_BGR = (0, 255, 0)
+# Verde en YUV BT.601 de rango limitado
+GREEN_YUV = (145, 54, 34)
+PLANAR_YUV420_FORMATS = {"yuv420p", "yuvj420p"}
+
+def _plane_view(plane) -> np.ndarray:
+    """Vista 2D sobre un plano del fotograma (respeta el relleno de línea)."""
+    buffer = np.frombuffer(plane, dtype=np.uint8)
+    return buffer[:plane.line_size * plane.height].reshape(plane.height, plane.line_size)[:, :plane.width]
+
+def _draw(img, box, label, color, scale: float = 1.0):
+    x, y, w, h = [int(v * scale) for v in box]
+    thickness = max(1, int(round(2 * scale)))
+    cv2.rectangle(img, (x, y), (x + w, y + h), color, thickness)
+    cv2.putText(img, label, (x, y - int(10 * scale)), cv2.FONT_HERSHEY_SIMPLEX, 0.9 * scale, color, thickness)
+
+class FrameOverlay:
+    """Dibuja la última detección sobre los fotogramas salientes."""
+    def __init__(self, output_frames: int = 4):
+        self.output_frames = output_frames
+        self.allocated_bytes = 0
+        self.frames = 0
+        self.converted_frames = 0
+        self._outputs = []
+        self._next_output = 0
+        self._started = time.monotonic()
+
+    def _output_frame(self, frame: av.VideoFrame) -> av.VideoFrame:
+        """Siguiente fotograma de salida propio; se reservan de nuevo sólo si cambia el formato o el tamaño."""
+        shape = (frame.format.name, frame.width, frame.height)
+        if not self._outputs or (self._outputs[0].format.name, self._outputs[0].width, self._outputs[0].height) != shape:
+            self._outputs = [av.VideoFrame(frame.width, frame.height, frame.format.name) for _ in range(self.output_frames)]
+            self.allocated_bytes += sum(plane.buffer_size for output in self._outputs for plane in output.planes)
+            self._next_output = 0
+        output = self._outputs[self._next_output]
+        self._next_output = (self._next_output + 1) % len(self._outputs)
+        return output
+
+    def to_bgr(self, frame: av.VideoFrame) -> np.ndarray:
+        """Convierte a BGR sólo cuando hace falta (fotogramas que se analizan)."""
+        img = frame.to_ndarray(format="bgr24")
+        self.allocated_bytes += img.nbytes
+        self.converted_frames += 1
+        return img
+
+    def annotate(self, frame: av.VideoFrame, detection) -> av.VideoFrame:
+        """Devuelve el fotograma con la caja y la emoción dibujadas (o intacto si no hay detección)."""
+        self.frames += 1
+        if not detection:
+            return frame
+
+        box = detection["bounding_box"]
+        label = detection["dominant_emotion"].capitalize()
+        if frame.format.name in PLANAR_YUV420_FORMATS:
+            output = self._output_frame(frame)
+            y_plane, u_plane, v_plane = (_plane_view(plane) for plane in output.planes)
+            for source, target in zip(frame.planes, (y_plane, u_plane, v_plane)):
+                np.copyto(target, _plane_view(source))
+            _draw(y_plane, box, label, GREEN_YUV[0])
+            # Los planos de crominancia tienen la mitad de resolución
+            _draw(u_plane, box, label, GREEN_YUV[1], scale=0.5)
+            _draw(v_plane, box, label, GREEN_YUV[2], scale=0.5)
+            output.pts = frame.pts
+            if frame.time_base is not None:
+                output.time_base = frame.time_base
+            return output
+
+        # Respaldo para otros formatos: la ruta clásica con conversión y fotograma nuevo
+        img = self.to_bgr(frame)
+        _draw(img, box, label, GREEN_BGR)
+        new_frame = av.VideoFrame.from_ndarray(img, format="bgr24")
+        self.allocated_bytes += img.nbytes
+        new_frame.pts = frame.pts
+        new_frame.time_base = frame.time_base
+        return new_frame
+
+    def get_metrics(self) -> dict:
+        elapsed = max(1e-6, time.monotonic() - self._started)
+        return {
+            "frames": self.frames,
+            "converted_frames": self.converted_frames,
+            "allocated_mb": self.allocated_bytes / 1e6,
+            "allocation_rate_mb_s": self.allocated_bytes / 1e6 / elapsed,
+            "allocated_bytes_per_frame": self.allocated_bytes / max(1, self.frames),
+        }
@@ -0,0 +1,90 @@
+# src/utils/async_runtime.py | Bucle de eventos persistente compartido por toda la aplicación
+
+"""
+Un único bucle de asyncio vive en un hilo de fondo durante toda la vida del
+proceso. El código síncrono (Streamlit, callbacks) ejecuta corrutinas en él con
+`run_async`, en lugar de crear y destruir un bucle con `asyncio.run` en cada
+llamada.
+
+Como el bucle no desaparece entre turnos, los clientes HTTP creados sobre él se
+pueden reutilizar: `get_http_session()` devuelve una `aiohttp.ClientSession`
+compartida con un pool de conexiones keep-alive, de modo que las conexiones TCP
+y TLS con los servicios externos se abren una vez y no en cada turno.
+"""
+
+import asyncio
+import atexit
+import threading
+
+import aiohttp
+
+# Pool de conexiones HTTP compartido
+HTTP_POOL_LIMIT = 32
+HTTP_KEEPALIVE_TIMEOUT_S = 60.0
+HTTP_DNS_CACHE_TTL_S = 300
+
+class AsyncRuntime:
+    """Bucle de eventos en un hilo propio con un puente síncrono (`run`) y recursos compartidos."""
+    def __init__(self, name: str = "psyai-async"):
+        self.loop = asyncio.new_event_loop()
+        self._http_session = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        """Programa la corrutina en el bucle y devuelve un `concurrent.futures.Future`."""
+        if self._closed:
+            coroutine.close()
+            raise RuntimeError("El bucle de eventos compartido está cerrado.")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine, timeout: float = None):
+        """Ejecuta la corrutina en el bucle compartido y espera su resultado (desde otro hilo)."""
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("`run` no se puede llamar desde el propio bucle; usa `await`.")
+        return self.submit(coroutine).result(timeout)
+
+    async def get_http_session(self) -> aiohttp.ClientSession:
+        """Sesión HTTP compartida (se crea dentro del bucle la primera vez que se pide)."""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_POOL_LIMIT, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT_S,
+                                             ttl_dns_cache=HTTP_DNS_CACHE_TTL_S)
+            self._http_session = aiohttp.ClientSession(connector=connector)
+        return self._http_session
+
+    async def _close_resources(self):
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+
+    def close(self, timeout: float = 5.0):
+        """Cierra la sesión HTTP y detiene el bucle."""
+        if self._closed:
+            return
+        try:
+            self.run(self._close_resources(), timeout=timeout)
+        finally:
+            self._closed = True
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=timeout)
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+def get_runtime() -> AsyncRuntime:
+    """Devuelve el bucle compartido del proceso, creándolo la primera vez."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = AsyncRuntime()
+            atexit.register(_runtime.close)
+        return _runtime
+
+def run_async(coroutine, timeout: float = None):
+    """Atajo: ejecuta una corrutina en el bucle compartido desde código síncrono."""
+    return get_runtime().run(coroutine, timeout=timeout)
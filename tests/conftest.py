@@ -0,0 +1,11 @@
+# tests/conftest.py | Entorno común de las pruebas
+
+import os
+
+from cryptography.fernet import Fernet
+
+# Ninguna prueba llama a los servicios reales; config.py exige que las variables existan
+# y data_manager necesita una clave Fernet válida al importarse
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY"):
+    os.environ.setdefault(variable, "standin")
+os.environ.setdefault("ENCRYPTION_KEY", Fernet.generate_key().decode())
@@ -0,0 +1,55 @@
+# tests/integration/test_live_transcription.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+# El sustituto local no valida la clave; config.py exige que las variables existan
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY", "ENCRYPTION_KEY"):
+    os.environ.setdefault(variable, "standin")
+
+import time
+import numpy as np
+from tests.standins.deepgram_live import DeepgramLiveStandIn
+from src.analysis.voice_transcription import LiveTranscriptionSession
+
+SAMPLE_RATE = 16000
+SCRIPT = [(1.0, "Hola, ¿cómo estás?"), (2.5, "Hoy me siento bastante tranquilo.")]
+
+def _pcm_chunks(seconds: float, chunk_s: float = 0.1):
+    samples = (np.random.default_rng(0).normal(0, 0.1, int(seconds * SAMPLE_RATE)) * 32767).astype(np.int16)
+    step = int(chunk_s * SAMPLE_RATE)
+    return [samples[i:i + step].tobytes() for i in range(0, len(samples), step)]
+
+def test_streaming_collects_interim_and_final_transcripts():
+    received = []
+    with DeepgramLiveStandIn(script=SCRIPT) as standin:
+        session = LiveTranscriptionSession(sample_rate=SAMPLE_RATE, url=standin.url, api_key="clave",
+                                           on_transcript=lambda text, is_final: received.append((text, is_final)))
+        for chunk in _pcm_chunks(3.0):
+            session.push(chunk)
+        transcript = session.finish(timeout=5.0)
+
+    assert transcript == "Hola, ¿cómo estás? Hoy me siento bastante tranquilo."
+    assert any(not is_final for _, is_final in received)
+    assert [text for text, is_final in received if is_final] == [text for _, text in SCRIPT]
+
+    connection = standin.connections[0]
+    assert connection["authorization"] == "Token clave"
+    assert connection["params"]["sample_rate"] == "16000"
+    assert connection["params"]["interim_results"] == "true"
+    assert connection["received_bytes"] == 3 * SAMPLE_RATE * 2
+
+def test_final_transcript_is_ready_right_after_the_last_chunk():
+    # El servidor tarda 0.2 s por segundo de audio: en streaming ese coste se paga mientras se graba
+    with DeepgramLiveStandIn(script=SCRIPT, processing_rtf=0.2) as standin:
+        session = LiveTranscriptionSession(sample_rate=SAMPLE_RATE, url=standin.url)
+        for chunk in _pcm_chunks(3.0):
+            session.push(chunk)
+            time.sleep(0.1)  # ritmo de grabación en tiempo real
+        transcript = session.finish(timeout=5.0)
+
+    assert transcript.startswith("Hola")
+    assert session.transcriber.finish_latency_s < 0.3
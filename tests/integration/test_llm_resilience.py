@@ -0,0 +1,99 @@
+# tests/integration/test_llm_resilience.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import time
+import pytest
+from groq import Groq
+from tests.standins.groq_chat import GroqChatStandIn
+from src.chat import llm_client
+from src.chat.resilient_client import HEDGE_MIN_SAMPLES, ResilientChatClient
+
+PRIMARY, FALLBACK = "modelo-rapido", "modelo-respaldo"
+MESSAGES = [{"role": "user", "content": "hola"}]
+
+def _client(standin, **policy):
+    settings = dict(models=[PRIMARY, FALLBACK], deadline_s=5.0, attempt_timeout_s=2.0, max_retries=2,
+                    backoff_base_s=0.01, backoff_max_s=0.05, hedge=False)
+    settings.update(policy)
+    return ResilientChatClient(Groq(api_key="standin", base_url=standin.base_url, max_retries=0), **settings)
+
+def test_hedged_request_wins_when_the_first_one_stalls():
+    # La primera petición se queda colgada; el duplicado responde enseguida
+    behavior = lambda model, index: {"delay_s": 1.5 if index == 0 else 0.05}
+    with GroqChatStandIn(behavior) as standin:
+        client = _client(standin, hedge=True, hedge_default_delay_s=0.2, hedge_min_delay_s=0.1)
+        start = time.monotonic()
+        response = client.create(MESSAGES)
+        elapsed = time.monotonic() - start
+
+    assert response.model == PRIMARY
+    assert elapsed < 0.8
+    metrics = client.get_metrics()[PRIMARY]
+    assert metrics["hedges"] == 1 and metrics["hedge_wins"] == 1
+    assert metrics["latency"]["count"] >= 1
+
+def test_background_calls_do_not_change_the_stream_hedge_delay():
+    # Llamadas sin streaming lentas (resúmenes, memoria) y streams cuyo primer fragmento llega enseguida
+    behavior = lambda model, index: {"delay_s": 0.15 if index < HEDGE_MIN_SAMPLES else 0.0}
+    with GroqChatStandIn(behavior) as standin:
+        client = _client(standin, hedge_default_delay_s=0.5, hedge_min_delay_s=0.05)
+        for _ in range(HEDGE_MIN_SAMPLES):
+            client.create(MESSAGES)
+        assert client._hedge_delay(PRIMARY, stream=True) == 0.5
+        for _ in range(HEDGE_MIN_SAMPLES):
+            list(client.create(MESSAGES, stream=True))
+
+    assert client._hedge_delay(PRIMARY, stream=True) < 0.1
+    assert client._hedge_delay(PRIMARY, stream=False) >= 0.15
+    metrics = client.get_metrics()[PRIMARY]
+    assert metrics["latency"]["count"] == HEDGE_MIN_SAMPLES
+    assert metrics["first_chunk_latency"]["count"] == HEDGE_MIN_SAMPLES
+
+def test_transient_errors_are_retried_then_the_fallback_model_answers():
+    def behavior(model, index):
+        if model == PRIMARY:
+            return {"status": 500 if index == 0 else 503}
+        return {"content": "Respuesta del respaldo."}
+
+    with GroqChatStandIn(behavior) as standin:
+        client = _client(standin)
+        response = client.create(MESSAGES)
+        assert standin.count(PRIMARY) == 3 and standin.count(FALLBACK) == 1
+
+    assert response.choices[0].message.content == "Respuesta del respaldo."
+    metrics = client.get_metrics()
+    assert metrics[PRIMARY]["retries"] == 2 and metrics[PRIMARY]["errors"] == 3
+    assert metrics[FALLBACK]["fallback_calls"] == 1
+
+def test_non_transient_errors_skip_straight_to_the_fallback():
+    behavior = lambda model, index: {"status": 404} if model == PRIMARY else {}
+    with GroqChatStandIn(behavior) as standin:
+        client = _client(standin)
+        client.create(MESSAGES)
+        assert standin.count(PRIMARY) == 1 and standin.count(FALLBACK) == 1
+
+def test_deadline_bounds_the_whole_call():
+    with GroqChatStandIn(lambda model, index: {"delay_s": 2.0}) as standin:
+        client = _client(standin, attempt_timeout_s=0.3)
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            client.create(MESSAGES, deadline_s=0.8)
+        assert time.monotonic() - start < 1.2
+
+def test_streaming_through_llm_client_uses_the_policy(monkeypatch):
+    behavior = lambda model, index: {"status": 429} if model == PRIMARY else {"content": "Estoy aquí contigo."}
+    with GroqChatStandIn(behavior) as standin:
+        monkeypatch.setattr(llm_client, "groq_client", Groq(api_key="standin", base_url=standin.base_url, max_retries=0))
+        monkeypatch.setitem(llm_client.config.LLM_CLIENT, "models", [PRIMARY, FALLBACK])
+        monkeypatch.setitem(llm_client.config.LLM_CLIENT, "backoff_base_s", 0.01)
+        metrics = {}
+        tokens = list(llm_client.stream_groq_response(MESSAGES, metrics=metrics))
+
+    assert "".join(tokens) == "Estoy aquí contigo."
+    assert metrics["model"] == FALLBACK and metrics["completion_tokens"] == 3
+    assert llm_client.get_chat_client().get_metrics()[PRIMARY]["errors"] == 3
@@ -0,0 +1,146 @@
+# tests/standins/conversation_stages.py | Servicios del turno de conversación con tiempos fijos y sin red
+
+"""
+Sustitutos de los servicios externos que usa `build_conversation_pipeline`
+(Deepgram, servicio de emoción vocal, Groq, Edge TTS y la base de datos), para
+pruebas y bancos de pruebas sin red. Cada servicio espera un tiempo fijo y
+registra sus llamadas.
+
+`ConversationStandIns.install(setattr)` reemplaza las funciones importadas en
+`src.chat.conversation_turn`; en pruebas conviene pasar `monkeypatch.setattr`
+para que se restauren al terminar.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.chat import conversation_turn
+
+# Tiempos por etapa de los servicios reales, aproximados (segundos)
+STAGE_DELAYS_S = {"transcription": 0.4, "vocal_emotion": 0.3, "llm": 0.5, "tts": 0.3, "memory": 0.5, "db": 0.05}
+USER_TEXT = "Hola, me llamo Ana y trabajo como enfermera en el hospital."
+RESPONSE_TOKENS = ["Encantada, ", "Ana. ", "¿Cómo ", "te ", "sientes ", "hoy?"]
+
+class FakeVAD:
+    """Detector de voz que marca todo el audio como voz, o nada si `speech` es False."""
+    def __init__(self, speech: bool = True):
+        self.speech = speech
+
+    def detect(self, samples, sample_rate):
+        total_s = len(samples) / sample_rate
+        segments = [(0, len(samples))] if self.speech else []
+        return {"segments": segments, "speech_s": total_s if self.speech else 0.0, "total_s": total_s,
+                "speech_ratio": 1.0 if self.speech else 0.0}
+
+class FakeVoiceService:
+    """Servicio de emoción vocal; con `error` lanza esa excepción en vez de devolver el resultado."""
+    def __init__(self, delay_s: float, error: Exception = None):
+        self.delay_s = delay_s
+        self.error = error
+        self.calls = 0
+
+    def predict_array(self, speech_array, timeout=None):
+        self.calls += 1
+        time.sleep(self.delay_s)
+        if self.error is not None:
+            raise self.error
+        return [{"label": "NEU", "score": 0.8}, {"label": "SAD", "score": 0.2}]
+
+    def get_metrics(self):
+        return {"requests": self.calls}
+
+class _FakeChatClient:
+    def get_metrics(self):
+        return {}
+
+class ResultContainer:
+    """Equivalente mínimo del `AnalysisResult` de main.py."""
+    def __init__(self):
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def set_data(self, key, value):
+        with self._lock:
+            self.data[key] = value
+
+    def get_data(self, key=None):
+        with self._lock:
+            return self.data.get(key) if key else dict(self.data)
+
+class ConversationStandIns:
+    def __init__(self, delays: dict = None, truncate_after: int = None):
+        self.delays = dict(STAGE_DELAYS_S, **(delays or {}))
+        # Con `truncate_after`, el stream del LLM se corta tras ese número de tokens, como un fallo de red
+        self.truncate_after = truncate_after
+        self.saved_roles = []
+        self.saved_interactions = []
+        self.llm_calls = 0
+        self.memory_facts = []
+        self._lock = threading.Lock()
+
+    def install(self, setattr=setattr):
+        replacements = {
+            "decode_audio_segment": lambda audio_bytes, sample_rate: np.zeros(sample_rate, dtype=np.float32),
+            "encode_audio": lambda speech, sample_rate, upload_format: (b"audio", f"audio/{upload_format}"),
+            "run_transcription": self._transcribe,
+            "stream_groq_response": self._stream,
+            "get_chat_client": _FakeChatClient,
+            "run_synthesis": self._synthesize,
+            "save_interaction_encrypted": self._save,
+            "extract_memory_from_text": self._extract_memory,
+            "save_memory_facts": self._save_memory,
+        }
+        for name, replacement in replacements.items():
+            setattr(conversation_turn, name, replacement)
+        return self
+
+    def build_pipeline(self, sample_rate: int = 16000, speech: bool = True, voice_error: Exception = None):
+        voice_service = FakeVoiceService(self.delays["vocal_emotion"], error=voice_error)
+        return conversation_turn.build_conversation_pipeline(FakeVAD(speech), voice_service, sample_rate)
+
+    def turn_inputs(self, memory: dict = None) -> dict:
+        return {
+            "audio_segment": b"audio",
+            "session_id": 1,
+            "chat_history": [],
+            "long_term_memory": dict(memory or {}),
+            "facial_emotion": {"stable_dominant_emotion": "neutral", "average_scores": {"neutral": 0.9}},
+            "result_container": ResultContainer(),
+        }
+
+    def _transcribe(self, audio_data, mimetype=None):
+        time.sleep(self.delays["transcription"])
+        return USER_TEXT
+
+    def _stream(self, messages, metrics=None):
+        with self._lock:
+            self.llm_calls += 1
+        tokens = RESPONSE_TOKENS[:self.truncate_after] if self.truncate_after is not None else RESPONSE_TOKENS
+        for token in tokens:
+            time.sleep(self.delays["llm"] / len(RESPONSE_TOKENS))
+            yield token
+        if metrics is not None:
+            truncated = self.truncate_after is not None
+            metrics.update({"truncated": truncated, "error": "ConnectionError('corte')" if truncated else None})
+
+    def _synthesize(self, text):
+        time.sleep(self.delays["tts"])
+        return b"mp3"
+
+    def _save(self, session_id, role, data):
+        time.sleep(self.delays["db"])
+        with self._lock:
+            self.saved_roles.append(role)
+            self.saved_interactions.append((role, dict(data)))
+        return True
+
+    def _extract_memory(self, prompt):
+        time.sleep(self.delays["memory"])
+        return {"nombre": "Ana", "profesion": "enfermera"}
+
+    def _save_memory(self, facts):
+        with self._lock:
+            self.memory_facts.append(dict(facts))
+        return True
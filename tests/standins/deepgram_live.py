@@ -0,0 +1,155 @@
+# tests/standins/deepgram_live.py | Servidor local que imita la interfaz en vivo de Deepgram
+
+"""
+Sustituto local de `wss://api.deepgram.com/v1/listen` para pruebas y bancos de
+pruebas sin red.
+
+Reproduce un guion de transcripciones: cada entrada es (segundo_final, texto).
+A medida que "procesa" el audio recibido (a `processing_rtf` segundos de cómputo
+por segundo de audio), emite resultados provisionales con las palabras ya
+alcanzadas y un resultado final cuando el audio procesado supera el final del
+tramo. Con {"type": "CloseStream"} termina de procesar, emite lo que falte,
+envía un "Metadata" y cierra la conexión, como el servicio real.
+
+Uso como script:
+    python tests/standins/deepgram_live.py --port 8765
+    DEEPGRAM_LIVE_URL=ws://127.0.0.1:8765/v1/listen streamlit run main.py
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+from urllib.parse import urlparse, parse_qs
+from websockets.asyncio.server import serve
+
+DEFAULT_SCRIPT = [
+    (1.5, "Hola, ¿cómo estás?"),
+    (4.0, "Hoy me siento un poco cansado pero tranquilo."),
+]
+
+class DeepgramLiveStandIn:
+    """Servidor en un hilo propio; `url` queda disponible tras `start()`."""
+    def __init__(self, script=None, processing_rtf: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.script = list(script or DEFAULT_SCRIPT)
+        self.processing_rtf = processing_rtf
+        self.host = host
+        self.port = port
+        self.connections = []
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v1/listen"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve_forever, name="deepgram-standin", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._thread.join(timeout=5.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve_forever(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        async def main():
+            async with serve(self._handle, self.host, self.port) as server:
+                self._server = server
+                self.port = server.sockets[0].getsockname()[1]
+                self._ready.set()
+                await server.wait_closed()
+
+        self._loop.run_until_complete(main())
+        self._loop.close()
+
+    def _result(self, text: str, start_s: float, end_s: float, is_final: bool) -> str:
+        return json.dumps({
+            "type": "Results", "start": start_s, "duration": end_s - start_s,
+            "is_final": is_final, "speech_final": is_final,
+            "channel": {"alternatives": [{"transcript": text, "confidence": 0.99}]},
+        })
+
+    async def _handle(self, websocket):
+        request = urlparse(websocket.request.path)
+        params = {key: values[0] for key, values in parse_qs(request.query).items()}
+        info = {"path": request.path, "params": params,
+                "authorization": websocket.request.headers.get("Authorization"), "received_bytes": 0}
+        self.connections.append(info)
+        bytes_per_second = int(params.get("sample_rate", 16000)) * 2 * int(params.get("channels", 1))
+
+        audio = asyncio.Queue()
+        processed_s = 0.0
+        next_segment = 0
+
+        async def process():
+            nonlocal processed_s, next_segment
+            while True:
+                chunk_s = await audio.get()
+                if chunk_s is None:
+                    return
+                if self.processing_rtf:
+                    await asyncio.sleep(chunk_s * self.processing_rtf)
+                processed_s += chunk_s
+                await emit(final_only=False)
+
+        async def emit(final_only: bool):
+            nonlocal next_segment
+            while next_segment < len(self.script):
+                end_s, text = self.script[next_segment]
+                start_s = self.script[next_segment - 1][0] if next_segment else 0.0
+                if processed_s >= end_s or final_only:
+                    await websocket.send(self._result(text, start_s, end_s, True))
+                    next_segment += 1
+                    continue
+                # Resultado provisional con la proporción de palabras ya "oídas"
+                words = text.split()
+                heard = int(len(words) * max(0.0, processed_s - start_s) / (end_s - start_s))
+                if heard:
+                    await websocket.send(self._result(" ".join(words[:heard]), start_s, processed_s, False))
+                return
+
+        processor = asyncio.create_task(process())
+        async for message in websocket:
+            if isinstance(message, bytes):
+                info["received_bytes"] += len(message)
+                await audio.put(len(message) / bytes_per_second)
+                continue
+            if json.loads(message).get("type") == "CloseStream":
+                break
+
+        await audio.put(None)
+        await processor
+        # Tras el final del audio se emiten como finales los tramos que falten
+        await emit(final_only=True)
+        await websocket.send(json.dumps({"type": "Metadata", "request_id": "standin", "sha256": "standin",
+                                         "duration": processed_s, "channels": 1}))
+        await websocket.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustituto local de la interfaz en vivo de Deepgram.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--processing-rtf", type=float, default=0.0, help="Segundos de cómputo simulados por segundo de audio.")
+    args = parser.parse_args()
+    standin = DeepgramLiveStandIn(processing_rtf=args.processing_rtf, port=args.port).start()
+    print(f"Sustituto de Deepgram escuchando en {standin.url} (Ctrl+C para salir)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        standin.stop()
+
+if __name__ == "__main__":
+    main()
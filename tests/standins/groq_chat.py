@@ -0,0 +1,155 @@
+# tests/standins/groq_chat.py | Servidor HTTP local que imita la API de chat de Groq
+
+"""
+Sustituto local de `POST {base_url}/openai/v1/chat/completions` para pruebas y
+bancos de pruebas sin red, con y sin streaming (SSE).
+
+Cada petición se resuelve con `behavior(modelo, n)`, donde `n` cuenta las
+peticiones recibidas para ese modelo desde 0, y devuelve un dict con:
+- "delay_s": espera antes de responder (simula una llamada lenta),
+- "status": código HTTP (p. ej. 500, 429 o 404 para inyectar errores),
+- "content": texto de la respuesta.
+
+Uso como script:
+    python tests/standins/groq_chat.py --port 8766 --delay 0.5
+    GROQ_BASE_URL=http://127.0.0.1:8766 streamlit run main.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CONTENT = "Hola, te escucho. ¿Qué te gustaría contarme hoy?"
+
+def default_behavior(model: str, index: int) -> dict:
+    return {"delay_s": 0.0, "status": 200, "content": DEFAULT_CONTENT}
+
+class GroqChatStandIn:
+    """Servidor en un hilo propio; `base_url` queda disponible tras `start()`."""
+    def __init__(self, behavior=None, host: str = "127.0.0.1", port: int = 0):
+        self.behavior = behavior or default_behavior
+        self.host = host
+        self.port = port
+        self.requests = []
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                standin._handle(self, body)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="groq-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=5.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return self._counts.get(model, 0)
+
+    def _handle(self, handler, body):
+        model = body.get("model")
+        with self._lock:
+            index = self._counts.get(model, 0)
+            self._counts[model] = index + 1
+            self.requests.append({"model": model, "index": index, "stream": bool(body.get("stream")),
+                                  "received_at": time.monotonic()})
+        reply = dict(default_behavior(model, index), **self.behavior(model, index))
+        time.sleep(reply["delay_s"])
+        try:
+            if reply["status"] != 200:
+                self._send_json(handler, reply["status"], {"error": {"message": f"Error simulado {reply['status']}",
+                                                                      "type": "standin_error"}})
+            elif body.get("stream"):
+                self._send_stream(handler, model, reply["content"])
+            else:
+                self._send_json(handler, 200, self._completion(model, reply["content"]))
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente abandonó la petición (p. ej. perdió frente a un duplicado)
+            pass
+
+    @staticmethod
+    def _send_json(handler, status, payload):
+        data = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    @staticmethod
+    def _completion(model, content):
+        words = len(content.split())
+        return {
+            "id": "chatcmpl-standin", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": words, "total_tokens": 10 + words},
+        }
+
+    @staticmethod
+    def _send_stream(handler, model, content):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode()
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        base = {"id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            send(json.dumps(dict(base, choices=[{"index": 0, "delta": {"content": token}, "finish_reason": None}])))
+        usage = {"prompt_tokens": 10, "completion_tokens": len(words), "total_tokens": 10 + len(words)}
+        send(json.dumps(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                             x_groq={"id": "standin", "usage": usage})))
+        send("[DONE]")
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de chat de Groq.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--delay", type=float, default=0.0, help="Espera antes de cada respuesta, en segundos.")
+    args = parser.parse_args()
+    server = GroqChatStandIn(lambda model, index: {"delay_s": args.delay}, host=args.host, port=args.port).start()
+    print(f"Sustituto de Groq escuchando en {server.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,77 @@
+# tests/standins/voice_emotion_model.py | Modelo ONNX mínimo con la sensibilidad al relleno de wav2vec2-base
+
+"""
+Sustituto local del modelo de emoción vocal exportado por
+`scripts/export_to_onnx.py`, para pruebas sin `ai_resources/`.
+
+El grafo reproduce lo que hace sensible al relleno a wav2vec2-base: una
+convolución seguida de una normalización por canal sobre todo el eje temporal
+(GroupNorm con un grupo por canal) y logits por frame ('frame_logits'). Tiene
+las mismas entradas que el modelo real ('input_values' y 'attention_mask').
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from src.analysis.voice_emotion import BUNDLE_FILENAME, MODEL_NAME, MODELS_BASE_DIR, ONNXEmotionRecognizer
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+EXPORTED_MODEL_PATH = REPO_ROOT / MODELS_BASE_DIR / "model_float32.onnx"
+SAMPLING_RATE = 100
+LABELS = {"0": "neu", "1": "ang", "2": "sad"}
+
+def build_group_norm_model(directory, channels: int = 4, seed: int = 0):
+    """Escribe el modelo y su paquete de preprocesado en `directory` y devuelve (onnx_path, bundle_path)."""
+    rng = np.random.default_rng(seed)
+    initializers = [
+        numpy_helper.from_array(np.array([1], dtype=np.int64), "axes"),
+        numpy_helper.from_array(rng.normal(size=(channels, 1, 10)).astype(np.float32), "conv_weight"),
+        numpy_helper.from_array(np.ones(channels, dtype=np.float32), "norm_scale"),
+        numpy_helper.from_array(np.zeros(channels, dtype=np.float32), "norm_bias"),
+        numpy_helper.from_array(rng.normal(size=(channels, len(LABELS))).astype(np.float32), "classifier"),
+    ]
+    nodes = [
+        helper.make_node("Unsqueeze", ["input_values", "axes"], ["audio"]),
+        helper.make_node("Conv", ["audio", "conv_weight"], ["features"], strides=[5]),
+        helper.make_node("InstanceNormalization", ["features", "norm_scale", "norm_bias"], ["normalized"]),
+        helper.make_node("Transpose", ["normalized"], ["hidden_states"], perm=[0, 2, 1]),
+        helper.make_node("MatMul", ["hidden_states", "classifier"], ["frame_logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "group_norm_frames",
+        [helper.make_tensor_value_info("input_values", TensorProto.FLOAT, ["batch_size", "sequence_length"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch_size", "sequence_length"])],
+        [helper.make_tensor_value_info("frame_logits", TensorProto.FLOAT, ["batch_size", "frames", len(LABELS)])],
+        initializers,
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+
+    directory = Path(directory)
+    onnx_path = directory / "model_float32.onnx"
+    onnx.save(model, str(onnx_path))
+    bundle_path = directory / BUNDLE_FILENAME
+    bundle = {"model_name": "sintetico", "sampling_rate": SAMPLING_RATE, "do_normalize": True,
+              "padding_value": 0.0, "id2label": LABELS}
+    bundle_path.write_text(json.dumps(bundle), encoding="utf-8")
+    return str(onnx_path), str(bundle_path)
+
+def build_group_norm_recognizer(directory) -> ONNXEmotionRecognizer:
+    onnx_path, bundle_path = build_group_norm_model(directory)
+    return ONNXEmotionRecognizer("sintetico", onnx_path, bundle_path=bundle_path)
+
+def load_exported_recognizer():
+    """Reconocedor con el modelo real exportado por lotes, o None si no está en `ai_resources/`."""
+    if not EXPORTED_MODEL_PATH.exists():
+        return None
+    recognizer = ONNXEmotionRecognizer(MODEL_NAME, str(EXPORTED_MODEL_PATH),
+                                       bundle_path=str(EXPORTED_MODEL_PATH.parent / BUNDLE_FILENAME))
+    return recognizer if recognizer.frame_level_outputs else None
+
+def load_recognizer(kind: str, directory):
+    """'sintetico' construye el grafo mínimo en `directory`; 'real' carga el modelo exportado (o None)."""
+    return build_group_norm_recognizer(directory) if kind == "sintetico" else load_exported_recognizer()
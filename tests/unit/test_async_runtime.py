@@ -0,0 +1,54 @@
+# tests/unit/test_async_runtime.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import asyncio
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.async_runtime import AsyncRuntime
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(name="test-async")
+    yield runtime
+    runtime.close()
+
+def test_run_reuses_the_same_loop_from_many_threads(runtime):
+    async def current_loop(value):
+        await asyncio.sleep(0.01)
+        return asyncio.get_running_loop(), value
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda v: runtime.run(current_loop(v)), range(8)))
+    assert {id(loop) for loop, _ in results} == {id(runtime.loop)}
+    assert [value for _, value in results] == list(range(8))
+
+def test_http_session_is_shared_and_closed_with_the_runtime():
+    runtime = AsyncRuntime(name="test-async")
+    first = runtime.run(runtime.get_http_session())
+    second = runtime.run(runtime.get_http_session())
+    assert first is second
+    runtime.close()
+    assert first.closed
+    with pytest.raises(RuntimeError):
+        runtime.run(asyncio.sleep(0))
+
+def test_exceptions_and_reentrancy(runtime):
+    async def fail():
+        raise ValueError("fallo")
+
+    with pytest.raises(ValueError):
+        runtime.run(fail())
+
+    async def nested():
+        # Llamar al puente síncrono desde el propio bucle lo bloquearía: se rechaza
+        with pytest.raises(RuntimeError):
+            runtime.run(asyncio.sleep(0))
+        return threading.current_thread().name
+
+    assert runtime.run(nested()) == "test-async"
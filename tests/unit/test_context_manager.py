@@ -0,0 +1,122 @@
+# tests/unit/test_context_manager.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import random
+import threading
+from src.chat.context_manager import ConversationContext, estimate_tokens
+from src.chat.prompt_builder import build_llm_prompt
+
+MEMORY = {"nombre": "Ana", "tema_recurrente": "Estrés laboral"}
+EMOTION = {"facial_dominant": "sad", "vocal_emotions": [{"label": "neu", "score": 0.8}]}
+WORDS = "hoy me siento cansada porque el trabajo no me deja tiempo para descansar ni ver a mis amigos".split()
+
+class FakeSummarizer:
+    """Resumidor sin LLM: devuelve un resumen de longitud acotada y registra cada llamada."""
+    def __init__(self, words=120, release=None):
+        self.words = words
+        self.release = release
+        self.calls = []
+
+    def __call__(self, previous_summary, messages):
+        if self.release is not None:
+            self.release.wait(2.0)
+        self.calls.append(len(messages))
+        return " ".join(["resumen"] * self.words)
+
+def _message(rng, role):
+    return {"role": role, "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(15, 60)))}
+
+def _prompt_tokens(context, messages):
+    return sum(context.message_tokens(message) for message in messages)
+
+def test_prompt_tokens_stay_flat_over_a_200_turn_session():
+    rng = random.Random(0)
+    summarizer = FakeSummarizer()
+    context = ConversationContext(token_budget=1500, summary_max_tokens=150, summarize=summarizer, background=False)
+    history, sizes, system_prompts = [], [], set()
+
+    for turn in range(200):
+        user_text = _message(rng, "user")["content"]
+        messages = build_llm_prompt(history, user_text, EMOTION, MEMORY, context=context)
+        sizes.append(_prompt_tokens(context, messages))
+        system_prompts.add(messages[0]["content"])
+        assert messages[-1]["role"] == "user" and user_text in messages[-1]["content"]
+        assert context.last_metrics["prompt_tokens"] == sizes[-1]
+        history += [{"role": "user", "content": user_text}, _message(rng, "assistant")]
+
+    assert max(sizes) <= 1500
+    # Tras llenarse la ventana el tamaño oscila entre plegados pero no crece con la sesión
+    assert abs(sum(sizes[-50:]) / 50 - sum(sizes[50:100]) / 50) < 150
+    assert len(system_prompts) == 1
+    # El resumen se actualiza cada varios turnos, no en cada uno
+    assert 5 < len(summarizer.calls) < 60
+    assert context.summarized_upto > 300
+
+def test_without_context_the_whole_history_is_sent_once():
+    history = [{"role": "user", "content": "hola"}, {"role": "assistant", "content": "¿cómo estás?"}]
+    messages = build_llm_prompt(history, "bien", EMOTION, MEMORY)
+    assert [message["role"] for message in messages] == ["system", "user", "assistant", "user"]
+    assert "Nombre: Ana" in messages[0]["content"]
+    assert 'Mensaje del usuario: "bien"' in messages[-1]["content"]
+
+def test_budget_holds_while_the_summary_is_pending_in_background():
+    rng = random.Random(1)
+    release = threading.Event()
+    summarizer = FakeSummarizer(words=40, release=release)
+    context = ConversationContext(token_budget=800, summary_max_tokens=100, summarize=summarizer)
+    history = []
+    for _ in range(30):
+        history += [_message(rng, "user"), _message(rng, "assistant")]
+
+    messages = context.build_messages("sistema", history, "mensaje actual")
+    assert _prompt_tokens(context, messages) <= 800
+    assert messages[1]["role"] == "user"
+    assert context.last_metrics["dropped_messages"] > 0
+    # Otro turno con el resumen aún pendiente no lanza un segundo resumen
+    context.build_messages("sistema", history, "otro mensaje")
+    release.set()
+    assert context.wait_idle(timeout=2.0)
+    assert len(summarizer.calls) == 1
+
+    messages = context.build_messages("sistema", history, "mensaje actual")
+    assert messages[1]["content"].startswith("Resumen de la conversación anterior:")
+    assert _prompt_tokens(context, messages) <= 800
+
+def test_token_estimate_and_summary_truncation():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("Hola, ¿qué tal?") == 6
+    assert estimate_tokens("conversación") == 3
+    context = ConversationContext(summary_max_tokens=20, summarize=FakeSummarizer(words=80), background=False)
+    history = [{"role": "user", "content": " ".join(["palabra"] * 2000)}, {"role": "assistant", "content": "vale"}]
+    context.build_messages("sistema", history + [{"role": "user", "content": "sigo"}], "nuevo")
+    assert context.summary and estimate_tokens(context.summary) <= 20
+
+def test_summary_is_trimmed_and_overflow_is_flagged_when_the_fixed_part_does_not_fit(caplog):
+    context = ConversationContext(token_budget=200, summary_max_tokens=150, summarize=FakeSummarizer(words=150),
+                                  background=False)
+    history = [{"role": "user", "content": " ".join(["palabra"] * 400)}, {"role": "assistant", "content": "vale"},
+               {"role": "user", "content": "sigo"}, {"role": "assistant", "content": "bien"}]
+    context.build_messages("sistema", history, "nuevo")
+    assert context.summarized_upto > 0 and estimate_tokens(context.summary) > 100
+
+    # Una memoria más larga agranda el prompt de sistema: el resumen se recorta para no pasarse
+    long_system = " ".join(["memoria"] * 50)
+    messages = context.build_messages(long_system, history, "nuevo")
+    metrics = context.get_metrics()
+    assert _prompt_tokens(context, messages) == metrics["prompt_tokens"] <= 200
+    assert messages[1]["content"].startswith("Resumen de la conversación anterior:")
+    assert 0 < metrics["summary_tokens"] < estimate_tokens(context.summary)
+    assert metrics["over_budget"] is False
+
+    # Si el sistema y el mensaje actual ya superan el presupuesto, se envían solos y se avisa
+    with caplog.at_level("WARNING"):
+        messages = context.build_messages(" ".join(["memoria"] * 300), history, "nuevo")
+    assert [message["role"] for message in messages] == ["system", "user"]
+    assert context.get_metrics()["over_budget"] is True
+    assert context.get_metrics()["prompt_tokens"] > 200
+    assert "presupuesto" in caplog.text
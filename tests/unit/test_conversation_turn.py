@@ -0,0 +1,68 @@
+# tests/unit/test_conversation_turn.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import concurrent.futures
+import pytest
+from tests.standins.conversation_stages import ConversationStandIns
+
+DELAYS = {"transcription": 0.2, "vocal_emotion": 0.15, "llm": 0.1, "tts": 0.05, "memory": 0.05, "db": 0.02}
+
+@pytest.fixture
+def standins(monkeypatch):
+    return ConversationStandIns(DELAYS).install(monkeypatch.setattr)
+
+def _overlap(timings, a, b):
+    return timings[a]["start_ms"] < timings[b]["end_ms"] and timings[b]["start_ms"] < timings[a]["end_ms"]
+
+def test_turn_overlaps_stages_and_saves_user_then_assistant(standins):
+    turn = standins.build_pipeline().run(standins.turn_inputs())
+    summary = turn.timings_summary()
+    stages = summary["stages"]
+
+    assert all(stages[name]["status"] == "ok" for name in ("decode", "transcription", "vocal_emotion", "llm", "tts"))
+    assert turn.get("llm") == "Encantada, Ana. ¿Cómo te sientes hoy?"
+    # Transcripción y emoción vocal en paralelo: la ruta crítica es max(0.2, 0.15) + llm + tts, no la suma
+    assert _overlap(stages, "transcription", "vocal_emotion")
+    assert summary["critical_ms"] < (0.2 + 0.15 + 0.1 + 0.05) * 1000
+    assert stages["llm"]["start_ms"] >= max(stages["transcription"]["end_ms"], stages["vocal_emotion"]["end_ms"])
+
+    assert turn.wait_background(timeout=2.0)
+    stages = turn.timings_summary()["stages"]
+    assert standins.saved_roles == ["user", "assistant"]
+    assert stages["save_assistant"]["start_ms"] >= stages["save_user"]["end_ms"]
+    assert turn.status["memory"] == "ok" and standins.memory_facts == [{"nombre": "Ana", "profesion": "enfermera"}]
+    assert turn.get("long_term_memory") == {"nombre": "Ana", "profesion": "enfermera"}
+
+def test_without_speech_every_later_stage_is_skipped(standins):
+    turn = standins.build_pipeline(speech=False).run(standins.turn_inputs())
+    assert turn.wait_background(timeout=2.0)
+
+    assert turn.status == {name: "skipped" for name in ("decode", "transcription", "vocal_emotion", "llm", "tts",
+                                                        "save_user", "save_assistant", "memory")}
+    assert standins.llm_calls == 0 and standins.saved_roles == [] and standins.memory_facts == []
+    assert turn.values["result_container"].get_data("voice_activity")["speech_ratio"] == 0.0
+
+@pytest.mark.parametrize("error", [RuntimeError("modelo no disponible"), concurrent.futures.TimeoutError()])
+def test_a_failing_voice_service_does_not_drop_the_reply(standins, error):
+    turn = standins.build_pipeline(voice_error=error).run(standins.turn_inputs())
+
+    assert turn.status["vocal_emotion"] == "ok" and turn.get("vocal_emotion") is None
+    assert turn.status["llm"] == "ok" and turn.get("llm") == "Encantada, Ana. ¿Cómo te sientes hoy?"
+    assert turn.status["tts"] == "ok"
+    assert turn.wait_background(timeout=2.0)
+    assert standins.saved_roles == ["user", "assistant"]
+
+def test_a_reply_cut_short_is_flagged_for_the_ui_and_the_database(monkeypatch):
+    standins = ConversationStandIns(DELAYS, truncate_after=2).install(monkeypatch.setattr)
+    inputs = standins.turn_inputs()
+    turn = standins.build_pipeline().run(inputs)
+
+    assert turn.status["llm"] == "ok" and turn.get("llm") == "Encantada, Ana. "
+    assert inputs["result_container"].get_data("llm_truncated") is True
+    assert turn.wait_background(timeout=2.0)
+    assert dict(standins.saved_interactions)["assistant"] == {"text": "Encantada, Ana. ", "truncated": True}
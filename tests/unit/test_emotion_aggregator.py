@@ -0,0 +1,50 @@
+# tests/unit/test_emotion_aggregator.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import pytest
+from src.analysis.emotion_aggregator import EmotionAggregator
+
+def _scores(happy, sad):
+    return {"happy": happy, "sad": sad}
+
+def test_windows_match_naive_average():
+    aggregator = EmotionAggregator(windows={"corto": 2.0, "total": None}, capacity=8)
+    samples = [_scores(0.9, 0.1), _scores(0.2, 0.8), _scores(0.3, 0.7), _scores(0.6, 0.4)]
+    for t, sample in enumerate(samples):
+        aggregator.update(sample, timestamp=float(t))
+
+    # En t=3 la ventana de 2 s contiene las muestras de t=2 y t=3
+    short = aggregator.get_window("corto")
+    assert short["samples"] == 2
+    assert short["average_scores"]["happy"] == pytest.approx(0.45)
+
+    total = aggregator.get_window("total")
+    assert total["samples"] == 4
+    assert total["average_scores"]["sad"] == pytest.approx(0.5)
+    assert total["stable_dominant_emotion"] == "happy"
+
+def test_capacity_bounds_time_windows():
+    aggregator = EmotionAggregator(windows={"largo": 100.0}, capacity=3)
+    for t in range(10):
+        aggregator.update(_scores(t / 10, 1 - t / 10), timestamp=float(t))
+    window = aggregator.get_window("largo")
+    assert window["samples"] == 3
+    assert window["average_scores"]["happy"] == pytest.approx(0.8)
+
+def test_ema_and_summary_format():
+    aggregator = EmotionAggregator(windows={"corto": 2.0}, ema_alpha=0.5)
+    assert aggregator.summary() is None
+    aggregator.update(_scores(1.0, 0.0), timestamp=0.0)
+    aggregator.update(_scores(0.0, 1.0), timestamp=0.5)
+
+    summary = aggregator.summary()
+    assert set(summary) >= {"stable_dominant_emotion", "average_scores", "windows", "ema"}
+    assert summary["ema"]["scores"]["happy"] == pytest.approx(0.5)
+
+    aggregator.reset()
+    assert aggregator.get_window("corto") is None
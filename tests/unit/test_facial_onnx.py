@@ -0,0 +1,86 @@
+# tests/unit/test_facial_onnx.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from src.analysis import facial_emotion
+from src.analysis.facial_emotion import EMOTION_LABELS, analyze_frame_emotions
+
+onnx = pytest.importorskip("onnx")
+from onnx import TensorProto, helper, numpy_helper
+
+class FakeYuNet:
+    """Devuelve una cara que ocupa la entrada configurada; la espera abre la ventana de la carrera entre hilos."""
+    def setInputSize(self, size):
+        self.size = size
+        time.sleep(0.002)
+
+    def detect(self, frame):
+        return 1, np.array([[0, 0, self.size[0], self.size[1]] + [0] * 11], dtype=np.float32)
+
+def _write_classifier(path, bias):
+    """Clasificador mínimo con la entrada del modelo de FER: (N, 64, 64, 1) -> 7 emociones."""
+    initializers = [numpy_helper.from_array(np.zeros((64 * 64, 7), dtype=np.float32), "weights"),
+                    numpy_helper.from_array(np.asarray(bias, dtype=np.float32), "bias")]
+    graph = helper.make_graph(
+        [helper.make_node("Flatten", ["input"], ["flat"]), helper.make_node("MatMul", ["flat", "weights"], ["product"]),
+         helper.make_node("Add", ["product", "bias"], ["logits"]), helper.make_node("Softmax", ["logits"], ["scores"])],
+        "fer_minimo", [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["N", 64, 64, 1])],
+        [helper.make_tensor_value_info("scores", TensorProto.FLOAT, ["N", 7])], initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+
+@pytest.fixture
+def yunet_instances(tmp_path, monkeypatch):
+    (tmp_path / "yunet.onnx").write_bytes(b"")
+    instances = []
+    monkeypatch.setattr(cv2.FaceDetectorYN, "create", lambda *args: instances.append(FakeYuNet()) or instances[-1])
+    return instances
+
+def _detector(tmp_path, bias=(0.0,) * 7):
+    _write_classifier(tmp_path / "emotion.onnx", bias)
+    return facial_emotion.ONNXFacialEmotionDetector(str(tmp_path / "emotion.onnx"),
+                                                    face_detector_path=str(tmp_path / "yunet.onnx"))
+
+def test_output_is_a_drop_in_for_fer(tmp_path, yunet_instances):
+    # Sesgo hacia 'happy' (índice 3 de EMOTION_LABELS)
+    detector = _detector(tmp_path, bias=[0.0, 0.0, 0.0, 3.0, 0.0, 0.0, 1.0])
+    frame = np.random.default_rng(0).integers(0, 255, size=(240, 320, 3), dtype=np.uint8)
+
+    result = analyze_frame_emotions(detector, frame)
+    assert result is not None
+    box = result["bounding_box"]
+    assert isinstance(box, tuple) and len(box) == 4 and all(isinstance(v, int) for v in box)
+    assert box == (0, 0, 320, 240)
+    assert tuple(result["scores"]) == EMOTION_LABELS
+    assert all(0.0 <= score <= 1.0 for score in result["scores"].values())
+    assert abs(sum(result["scores"].values()) - 1.0) < 0.05
+    assert result["dominant_emotion"] == "happy"
+
+def test_each_thread_gets_its_own_yunet_instance(tmp_path, yunet_instances):
+    detector = _detector(tmp_path)
+    mismatches = []
+
+    def stream(width, height):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        for _ in range(30):
+            if detector.find_faces(frame) != [(0, 0, width, height)]:
+                mismatches.append((width, height))
+
+    threads = [threading.Thread(target=stream, args=size) for size in ((320, 240), (640, 480))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatches == []
+    # Una instancia al cargar y una por cada hilo de análisis
+    assert len(yunet_instances) == 3
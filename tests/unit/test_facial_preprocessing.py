@@ -0,0 +1,42 @@
+# tests/unit/test_facial_preprocessing.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+from src.analysis.facial_emotion import ResolutionAdaptiveDetector
+
+class FindFacesDetector:
+    """Imita la interfaz de FER y registra el tamaño de la imagen sobre la que se detecta."""
+    def __init__(self):
+        self.search_shapes = []
+
+    def find_faces(self, frame_np):
+        self.search_shapes.append(frame_np.shape[:2])
+        frame_h, frame_w = frame_np.shape[:2]
+        # Devuelve siempre una cara centrada de 1/4 del ancho
+        w = frame_w // 4
+        return [(frame_w // 2 - w // 2, frame_h // 2 - w // 2, w, w)]
+
+    def detect_emotions(self, frame_np, face_rectangles=None):
+        if face_rectangles is None:
+            face_rectangles = self.find_faces(frame_np)
+        return [{"box": tuple(face_rectangles[0]), "emotions": {"neutral": 0.8, "happy": 0.2}}]
+
+def test_downscaled_detection_maps_boxes_back():
+    detector = FindFacesDetector()
+    adaptive = ResolutionAdaptiveDetector(detector, max_side=480, use_roi=False)
+
+    detections = adaptive.detect_emotions(np.zeros((1080, 1920, 3), dtype=np.uint8))
+    assert detector.search_shapes[-1] == (270, 480)
+    x, y, w, h = detections[0]["box"]
+    assert abs(w - 480) <= 4 and abs(x - 720) <= 4 and abs(y - 300) <= 4
+
+    adaptive.use_roi = True
+    adaptive.detect_emotions(np.zeros((1080, 1920, 3), dtype=np.uint8))
+    # La segunda detección se hace sólo sobre la región alrededor de la cara previa
+    assert max(detector.search_shapes[-1]) <= 480
+    assert detector.search_shapes[-1] != (270, 480)
@@ -0,0 +1,55 @@
+# tests/unit/test_facial_tracking.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+from src.analysis.facial_emotion import TrackingFaceDetector, analyze_frame_emotions
+
+FACE = np.random.default_rng(0).integers(0, 255, size=(40, 40, 3), dtype=np.uint8)
+
+def _frame_with_face(x, y):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[y:y + 40, x:x + 40] = FACE
+    return frame
+
+class FakeDetector:
+    """Imita la interfaz de FER y cuenta las detecciones completas."""
+    def __init__(self, box):
+        self.box = box
+        self.full_calls = 0
+        self.classified_boxes = []
+
+    def detect_emotions(self, frame_np, face_rectangles=None):
+        if face_rectangles is None:
+            self.full_calls += 1
+            face_rectangles = [self.box]
+        self.classified_boxes.append(tuple(face_rectangles[0]))
+        return [{"box": tuple(face_rectangles[0]), "emotions": {"neutral": 0.8, "happy": 0.2}}]
+
+def test_tracks_between_detections():
+    detector = FakeDetector((100, 80, 40, 40))
+    tracking = TrackingFaceDetector(detector, redetect_every=5)
+
+    analyze_frame_emotions(tracking, _frame_with_face(100, 80))
+    result = analyze_frame_emotions(tracking, _frame_with_face(106, 83))
+
+    assert detector.full_calls == 1
+    assert result["bounding_box"] == (106, 83, 40, 40)
+    assert tracking.stats["tracked_frames"] == 1
+
+def test_redetects_on_cadence_and_low_confidence():
+    detector = FakeDetector((100, 80, 40, 40))
+    tracking = TrackingFaceDetector(detector, redetect_every=2)
+
+    for _ in range(4):
+        tracking.detect_emotions(_frame_with_face(100, 80))
+    # Detección, rastreo, rastreo, re-detección por cadencia
+    assert detector.full_calls == 2
+
+    tracking.detect_emotions(np.zeros((240, 320, 3), dtype=np.uint8))
+    assert tracking.stats["tracking_failures"] == 1
+    assert detector.full_calls == 3
@@ -0,0 +1,50 @@
+# tests/unit/test_frame_overlay.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import av
+import numpy as np
+from src.ui.frame_overlay import FrameOverlay
+
+DETECTION = {"bounding_box": (50, 60, 80, 80), "dominant_emotion": "happy"}
+
+def _luma(frame):
+    plane = frame.planes[0]
+    return np.frombuffer(plane, dtype=np.uint8).reshape(plane.height, plane.line_size)[:, :plane.width]
+
+def _decoded_frame(seed, width=320, height=240):
+    img = np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    frame = av.VideoFrame.from_ndarray(img, format="bgr24").reformat(format="yuv420p")
+    frame.pts = seed
+    return frame
+
+def test_the_decoded_frame_is_never_written():
+    overlay = FrameOverlay()
+    frame = _decoded_frame(0)
+    original = [bytes(plane) for plane in frame.planes]
+
+    output = overlay.annotate(frame, DETECTION)
+    assert output is not frame and output.pts == frame.pts
+    assert [bytes(plane) for plane in frame.planes] == original
+    # Fuera de la caja la salida es la imagen de entrada; en el borde de la caja, verde
+    luma_in, luma_out = _luma(frame), _luma(output)
+    assert np.array_equal(luma_out[200:, 200:], luma_in[200:, 200:])
+    assert (luma_out[60:140, 50] == 145).all()
+    # Sin detección se devuelve el fotograma original
+    assert overlay.annotate(frame, None) is frame
+
+def test_output_frames_are_reused_without_new_allocations():
+    overlay = FrameOverlay(output_frames=2)
+    outputs = [overlay.annotate(_decoded_frame(seed), DETECTION) for seed in range(6)]
+    allocated = overlay.allocated_bytes
+
+    assert outputs[0] is outputs[2] is outputs[4] and outputs[1] is outputs[3] and outputs[0] is not outputs[1]
+    overlay.annotate(_decoded_frame(6), DETECTION)
+    assert overlay.allocated_bytes == allocated
+    # Un cambio de resolución reserva un juego nuevo de fotogramas de salida
+    overlay.annotate(_decoded_frame(7, width=640, height=480), DETECTION)
+    assert overlay.allocated_bytes > allocated
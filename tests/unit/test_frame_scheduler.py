@@ -0,0 +1,49 @@
+# tests/unit/test_frame_scheduler.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.analysis.frame_scheduler import AdaptiveFrameScheduler, SessionRegistry
+
+def _feed(scheduler, frames, fps=30.0, start=0.0):
+    """Simula `frames` fotogramas a `fps` y devuelve cuántos se analizarían."""
+    analyzed = 0
+    for i in range(frames):
+        if scheduler.should_analyze(now=start + i / fps):
+            analyzed += 1
+    return analyzed
+
+def test_interval_follows_latency_and_budget():
+    scheduler = AdaptiveFrameScheduler(cpu_budget_per_session=0.5, registry=SessionRegistry())
+    _feed(scheduler, 30)
+    scheduler.record_latency(0.1)
+    # 30 fps * 0.1 s / 0.5 núcleos = 6 fotogramas
+    assert scheduler.interval == 6
+
+    scheduler.record_latency(0.3)
+    scheduler.record_latency(0.3)
+    assert scheduler.interval == 18
+
+def test_total_budget_is_shared_between_sessions():
+    registry = SessionRegistry()
+    schedulers = [AdaptiveFrameScheduler(cpu_budget_per_session=1.0, total_cpu_budget=1.0,
+                                         max_interval=1000, registry=registry) for _ in range(4)]
+    for scheduler in schedulers:
+        _feed(scheduler, 30)
+        scheduler.record_latency(0.1)
+
+    assert registry.count == 4
+    # Cada sesión recibe 1/4 de núcleo: 30 * 0.1 / 0.25 = 12
+    assert all(s.interval == 12 for s in schedulers)
+    total_cpu = sum(s.get_metrics()["estimated_cpu_usage"] for s in schedulers)
+    assert total_cpu <= 1.0 + 1e-6
+
+    for scheduler in schedulers[1:]:
+        scheduler.close()
+        scheduler.close()
+    assert registry.count == 1
+    schedulers[0].record_latency(0.1)
+    assert schedulers[0].interval == 3
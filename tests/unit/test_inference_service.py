@@ -0,0 +1,99 @@
+# tests/unit/test_inference_service.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import queue
+import time
+import numpy as np
+import pytest
+from src.analysis.voice_emotion import BaseEmotionRecognizer
+from src.analysis.inference_service import VoiceEmotionService
+
+class FakeRecognizer(BaseEmotionRecognizer):
+    """Reconocedor sin modelo que registra el tamaño de cada lote inferido."""
+    def __init__(self, delay_s=0.0):
+        self.id2label = {0: "neu", 1: "ang"}
+        self.target_sampling_rate = 100
+        self.delay_s = delay_s
+        self.batch_sizes = []
+
+    def _predict_logits(self, chunk):
+        return np.array([[float(np.mean(chunk)), float(np.mean(np.abs(chunk)))]])
+
+    def _predict_logits_batch(self, chunks):
+        self.batch_sizes.append(len(chunks))
+        time.sleep(self.delay_s)
+        return super()._predict_logits_batch(chunks)
+
+def _utterances(n):
+    rng = np.random.default_rng(0)
+    # Incluye un enunciado largo (3 segmentos de 10 s) para comprobar el reparto de logits
+    return [rng.normal(0, 0.5, 2500 if i == 0 else 300 + 50 * i).astype(np.float32) for i in range(n)]
+
+def test_concurrent_requests_are_batched_and_match_direct_predictions():
+    recognizer = FakeRecognizer()
+    utterances = _utterances(6)
+    expected = [recognizer.predict_array(u) for u in utterances]
+    recognizer.batch_sizes.clear()
+
+    service = VoiceEmotionService(recognizer, max_batch_size=8, max_wait_ms=200)
+    futures = [service.submit(u) for u in utterances]
+    results = [f.result(timeout=5) for f in futures]
+    service.stop()
+
+    for result, reference in zip(results, expected):
+        assert [p["label"] for p in result] == [p["label"] for p in reference]
+        assert [p["score"] for p in result] == pytest.approx([p["score"] for p in reference])
+    # Los seis enunciados (8 segmentos) se infirieron en una sola llamada
+    assert recognizer.batch_sizes == [8]
+    metrics = service.get_metrics()
+    assert metrics["batches"] == 1 and metrics["batch_size_max"] == 6 and metrics["completed"] == 6
+    assert metrics["queue_wait_avg_ms"] is not None
+
+def test_full_queue_applies_backpressure():
+    recognizer = FakeRecognizer(delay_s=0.3)
+    service = VoiceEmotionService(recognizer, max_batch_size=1, max_wait_ms=0, max_queue_size=1)
+    first = service.submit(_utterances(1)[0])
+    time.sleep(0.05)  # el worker ya está ocupado con la primera
+    service.submit(_utterances(1)[0])
+    with pytest.raises(queue.Full):
+        service.submit(_utterances(1)[0], timeout=0.01)
+    assert first.result(timeout=5)
+    service.stop()
+
+def test_errors_are_propagated_to_every_future():
+    recognizer = FakeRecognizer()
+    recognizer.predict_arrays = lambda arrays, chunk_length_s: (_ for _ in ()).throw(RuntimeError("fallo"))
+    service = VoiceEmotionService(recognizer, max_wait_ms=50)
+    futures = [service.submit(u) for u in _utterances(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+    assert service.get_metrics()["failed"] == 3
+    service.stop()
+
+@pytest.mark.parametrize("kind", ["sintetico", "real"])
+def test_result_is_the_same_with_a_co_batched_utterance_of_another_length(kind, tmp_path):
+    pytest.importorskip("onnx")
+    from tests.standins.voice_emotion_model import load_recognizer
+    recognizer = load_recognizer(kind, tmp_path)
+    if recognizer is None:
+        pytest.skip("No se encontró el modelo exportado por lotes en 'ai_resources/'.")
+    rng = np.random.default_rng(1)
+    # El enunciado observado es más corto que el que lo acompaña: con relleno, cambiaría su resultado
+    target = rng.normal(0, 0.1, int(4.2 * recognizer.target_sampling_rate)).astype(np.float32)
+    other = rng.normal(0, 0.1, int(7.9 * recognizer.target_sampling_rate)).astype(np.float32)
+
+    service = VoiceEmotionService(recognizer, max_batch_size=8, max_wait_ms=200)
+    alone = service.predict_array(target, timeout=5)
+    futures = [service.submit(other), service.submit(target)]
+    co_batched = futures[1].result(timeout=5)
+    assert service.get_metrics()["batch_size_max"] == 2
+    service.stop()
+
+    assert [p["label"] for p in co_batched] == [p["label"] for p in alone]
+    assert [p["score"] for p in co_batched] == pytest.approx([p["score"] for p in alone], abs=1e-6)
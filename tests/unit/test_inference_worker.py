@@ -0,0 +1,61 @@
+# tests/unit/test_inference_worker.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import threading
+import numpy as np
+from src.analysis.inference_worker import FacialInferenceWorker
+
+class SlowFakeDetector:
+    """Detector de prueba que bloquea hasta que se le permite continuar."""
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.seen = []
+
+    def detect_emotions(self, frame_np):
+        self.started.set()
+        self.release.wait(timeout=2)
+        self.seen.append(int(frame_np[0, 0]))
+        return [{"box": (0, 0, 10, 10), "emotions": {"happy": 0.9, "sad": 0.1}}]
+
+def _frame(value):
+    return np.full((4, 4), value, dtype=np.uint8)
+
+def test_latest_frame_wins_and_metrics():
+    detector = SlowFakeDetector()
+    results = []
+    done = threading.Event()
+
+    def on_result(result):
+        results.append(result)
+        if len(results) == 2:
+            done.set()
+
+    worker = FacialInferenceWorker(detector, on_result=on_result)
+    try:
+        worker.submit(_frame(1))
+        assert detector.started.wait(timeout=2)
+
+        # Mientras el primero se procesa, llegan tres fotogramas: solo el último sobrevive.
+        assert worker.submit(_frame(2)) is True
+        assert worker.submit(_frame(3)) is False
+        assert worker.submit(_frame(4)) is False
+        assert worker.get_metrics()["queue_depth"] == 2
+
+        detector.release.set()
+        assert done.wait(timeout=2)
+
+        assert detector.seen == [1, 4]
+        assert results[-1]["dominant_emotion"] == "happy"
+        metrics = worker.get_metrics()
+        assert metrics["submitted_frames"] == 4
+        assert metrics["processed_frames"] == 2
+        assert metrics["dropped_frames"] == 2
+        assert metrics["latency_avg_ms"] is not None
+    finally:
+        worker.stop()
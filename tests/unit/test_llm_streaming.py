@@ -0,0 +1,117 @@
+# tests/unit/test_llm_streaming.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+# No se llama a la API real; config.py exige que las variables existan
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY", "ENCRYPTION_KEY"):
+    os.environ.setdefault(variable, "standin")
+
+import threading
+import time
+from types import SimpleNamespace
+from src.chat import llm_client
+from src.chat.turn_pipeline import Stage, StageStream, TurnPipeline
+
+def _chunk(content=None, usage=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)] if content is not None else [],
+                           x_groq=SimpleNamespace(usage=usage) if usage else None)
+
+class _FakeCompletions:
+    def __init__(self, chunks, delay_s=0.0, fail_after=None):
+        self.chunks, self.delay_s, self.fail_after = chunks, delay_s, fail_after
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        def stream():
+            for index, chunk in enumerate(self.chunks):
+                if self.fail_after is not None and index == self.fail_after:
+                    raise ConnectionError("corte")
+                time.sleep(self.delay_s)
+                yield chunk
+        return stream()
+
+def _client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+def test_stream_yields_tokens_and_records_metrics(monkeypatch):
+    completions = _FakeCompletions([_chunk("Hola"), _chunk(", "), _chunk(""), _chunk("¿qué tal?"),
+                                    _chunk(usage=SimpleNamespace(completion_tokens=5))], delay_s=0.02)
+    monkeypatch.setattr(llm_client, "groq_client", _client(completions))
+    metrics = {}
+    tokens = list(llm_client.stream_groq_response([{"role": "user", "content": "hola"}], metrics=metrics))
+
+    assert tokens == ["Hola", ", ", "¿qué tal?"]
+    assert completions.calls[0]["stream"] is True
+    assert 15 < metrics["ttft_ms"] < metrics["total_ms"]
+    # Se usa el recuento de tokens de Groq, no el de fragmentos
+    assert metrics["completion_tokens"] == 5
+    assert metrics["tokens_per_s"] > 0
+    assert metrics["truncated"] is False and metrics["error"] is None
+
+def test_a_stream_cut_after_the_first_token_is_flagged(monkeypatch, caplog):
+    monkeypatch.setattr(llm_client, "groq_client", _client(_FakeCompletions([_chunk("Hola"), _chunk("!")], fail_after=1)))
+    metrics = {}
+    with caplog.at_level("WARNING"):
+        tokens = list(llm_client.stream_groq_response([], metrics=metrics))
+
+    assert tokens == ["Hola"]
+    assert metrics["truncated"] is True and "corte" in metrics["error"]
+    assert "incompleta" in caplog.text
+
+    # Si falla antes del primer token se envía la disculpa: hay error, pero no texto cortado
+    monkeypatch.setattr(llm_client, "groq_client", _client(_FakeCompletions([_chunk("Hola")], fail_after=0)))
+    list(llm_client.stream_groq_response([], metrics=metrics))
+    assert metrics["truncated"] is False and metrics["error"] is not None
+
+def test_blocking_wrapper_joins_the_stream_and_keeps_error_messages(monkeypatch):
+    monkeypatch.setattr(llm_client, "groq_client", _client(_FakeCompletions([_chunk("Hola"), _chunk(" mundo")])))
+    assert llm_client.get_groq_response([]) == "Hola mundo"
+
+    # Un fallo antes del primer token devuelve la disculpa; después, se conserva el texto parcial
+    monkeypatch.setattr(llm_client, "groq_client", _client(_FakeCompletions([_chunk("Hola")], fail_after=0)))
+    assert llm_client.get_groq_response([]) == "Lo siento, tuve un problema al generar una respuesta."
+    monkeypatch.setattr(llm_client, "groq_client", _client(_FakeCompletions([_chunk("Hola"), _chunk("!")], fail_after=1)))
+    assert llm_client.get_groq_response([]) == "Hola"
+
+    monkeypatch.setattr(llm_client, "groq_client", None)
+    assert llm_client.get_groq_response([]) == "Error: Cliente de Groq no inicializado."
+
+def test_stage_stream_delivers_tokens_before_the_turn_finishes():
+    release = threading.Event()
+
+    def llm(ctx):
+        for token in ("a", "b", "c"):
+            ctx["response_stream"].put(token)
+        return "abc"
+
+    pipeline = TurnPipeline([
+        Stage("llm", llm),
+        Stage("tts", lambda ctx: release.wait(2.0) and ctx["llm"], deps=("llm",)),
+    ])
+    stream = StageStream()
+    turn = pipeline.start({"response_stream": stream})
+    turn.on_stage_done("llm", lambda _: stream.close())
+
+    # Los tokens llegan aunque la etapa tts siga bloqueada
+    assert list(stream) == ["a", "b", "c"]
+    assert turn.wait_stage("llm", timeout=1.0) == "ok"
+    assert "tts" not in turn.status
+    release.set()
+    assert turn.wait_critical(timeout=2.0).get("tts") == "abc"
+
+def test_stage_stream_closes_when_the_stage_is_skipped():
+    def broken(ctx):
+        raise RuntimeError("sin transcripción")
+
+    pipeline = TurnPipeline([Stage("transcription", broken), Stage("llm", lambda ctx: "x", deps=("transcription",))])
+    stream = StageStream()
+    turn = pipeline.start({"response_stream": stream})
+    turn.on_stage_done("llm", lambda _: stream.close())
+    assert list(stream) == []
+    assert turn.wait_critical(timeout=1.0).status["llm"] == "skipped"
@@ -0,0 +1,120 @@
+# tests/unit/test_memory_worker.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import threading
+import pytest
+from src.chat.memory_worker import MemoryExtractionWorker, has_memory_cues
+from src.database import data_manager
+
+class FakeExtractor:
+    """Sustituye a la llamada al LLM: registra los prompts y devuelve hechos fijos."""
+    def __init__(self, facts=None, release=None):
+        self.facts = facts or {}
+        self.release = release
+        self.prompts = []
+
+    def __call__(self, prompt):
+        if self.release is not None:
+            self.release.wait(2.0)
+        self.prompts.append(prompt)
+        return dict(self.facts)
+
+@pytest.fixture
+def worker_factory():
+    workers = []
+    def factory(**kwargs):
+        worker = MemoryExtractionWorker(**kwargs)
+        workers.append(worker)
+        return worker
+    yield factory
+    for worker in workers:
+        worker.stop(timeout=2.0)
+
+def test_prefilter_skips_turns_without_facts():
+    assert not has_memory_cues("Sí.")
+    assert not has_memory_cues("Gracias, hasta luego")
+    assert not has_memory_cues("¿Y tú qué opinas?")
+    assert has_memory_cues("Me llamo Ana y tengo 30 años")
+    assert has_memory_cues("Últimamente me cuesta dormir por el trabajo")
+    assert has_memory_cues("Trabajo como enfermera en el hospital")
+    assert has_memory_cues("Me gusta mucho pintar los domingos")
+
+def test_prefilter_skips_ordinary_small_talk():
+    small_talk = [
+        "Mi día estuvo bien",
+        "Quiero hablar de algo",
+        "Eso nunca me pasó",
+        "Siempre pasa lo mismo",
+        "Mis amigos están bien, gracias",
+        "Hoy voy a salir un rato",
+        "No sé muy bien qué decir",
+        "Tengo que pensarlo un poco",
+        "Hace dos años de aquello",
+    ]
+    assert [text for text in small_talk if has_memory_cues(text)] == []
+
+def test_turns_are_batched_into_one_extraction_and_published(worker_factory):
+    extractor = FakeExtractor({"nombre": "Ana", "meta_u_objetivo": "Dormir mejor", "edad": None})
+    saved = []
+    worker = worker_factory(extract=extractor, save=lambda facts: saved.append(facts) or True, max_batch_turns=3, max_wait_s=5.0)
+    memory = {"tema_recurrente": "Estrés laboral"}
+    updates = []
+
+    assert worker.submit("Me llamo Ana", "Encantada, Ana.", memory, on_update=updates.append)
+    assert not worker.submit("Vale", "¿Algo más?", memory)
+    assert worker.submit("Mi meta es dormir mejor", "Es una buena meta.", memory)
+    assert worker.submit("Me cuesta dormir, me despierto a las tres", "Eso cansa mucho.", memory)
+    assert worker.flush(timeout=2.0)
+
+    # Tres turnos con posibles hechos, una sola llamada; el turno filtrado no llega al prompt
+    assert len(extractor.prompts) == 1
+    assert "Me llamo Ana" in extractor.prompts[0] and "Vale" not in extractor.prompts[0]
+    assert "Estrés laboral" in extractor.prompts[0]
+    assert saved == [{"nombre": "Ana", "meta_u_objetivo": "Dormir mejor"}]
+    assert memory == {"tema_recurrente": "Estrés laboral", "nombre": "Ana", "meta_u_objetivo": "Dormir mejor"}
+    assert updates == saved
+    metrics = worker.get_metrics()
+    assert metrics["filtered"] == 1 and metrics["extractions"] == 1 and metrics["turns_per_extraction_avg"] == 3
+
+def test_sessions_are_not_mixed_and_stop_drains_the_queue(worker_factory):
+    release = threading.Event()
+    extractor = FakeExtractor({"nombre": "Luis"}, release=release)
+    worker = worker_factory(extract=extractor, save=lambda facts: True, max_batch_turns=8, max_wait_s=0.05)
+    memory_a, memory_b = {}, {}
+    worker.submit("Me llamo Luis, soy profesor", "Hola, Luis.", memory_a)
+    worker.submit("Mi nombre es Luis también", "¡Qué coincidencia!", memory_b)
+    release.set()
+    worker.stop(timeout=2.0)
+
+    assert len(extractor.prompts) == 2
+    assert memory_a == memory_b == {"nombre": "Luis"}
+    with pytest.raises(RuntimeError):
+        worker.submit("Me llamo Luis", "Hola", memory_a)
+
+def test_facts_are_saved_in_a_single_transaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_manager, "DB_FILE", str(tmp_path / "psyai.db"))
+    data_manager.setup_database()
+    assert data_manager.save_memory_facts({"nombre": "Ana", "edad": 30})
+    assert data_manager.save_memory_fact("edad", 31)
+    assert data_manager.get_all_memory() == {"nombre": "Ana", "edad": "31"}
+
+    # Una clave que SQLite no puede guardar hace fallar el lote entero: no queda ningún hecho a medias
+    assert not data_manager.save_memory_facts({"tema_recurrente": "Sueño", ("clave", "inválida"): "x"})
+    assert "tema_recurrente" not in data_manager.get_all_memory()
+
+def test_failed_save_leaves_memory_untouched(worker_factory):
+    updates = []
+    worker = worker_factory(extract=FakeExtractor({"nombre": "Ana"}), save=lambda facts: False, max_wait_s=0.05)
+    memory = {"tema_recurrente": "Estrés laboral"}
+    worker.submit("Me llamo Ana y trabajo mucho", "Hola, Ana.", memory, on_update=updates.append)
+    assert worker.flush(timeout=2.0)
+
+    assert memory == {"tema_recurrente": "Estrés laboral"}
+    assert updates == []
+    metrics = worker.get_metrics()
+    assert metrics["failed"] == 1 and metrics["extractions"] == 0 and metrics["facts_saved"] == 0
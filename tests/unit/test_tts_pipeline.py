@@ -0,0 +1,133 @@
+# tests/unit/test_tts_pipeline.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+# No se llama a Edge TTS; config.py exige que las variables existan
+for variable in ("DEEPGRAM_API_KEY", "GROQ_API_KEY", "ENCRYPTION_KEY"):
+    os.environ.setdefault(variable, "standin")
+
+import asyncio
+import time
+import pytest
+from src.audio.tts_pipeline import SentenceSplitter, SentenceTTSPipeline
+from src.utils.async_runtime import AsyncRuntime
+
+@pytest.fixture
+def runtime():
+    runtime = AsyncRuntime(name="test-tts")
+    yield runtime
+    runtime.close()
+
+def _fake_synthesizer(seconds_per_char=0.002, fail_on=None):
+    state = {"active": 0, "max_active": 0}
+
+    async def synthesize(text):
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            await asyncio.sleep(len(text) * seconds_per_char)
+        finally:
+            state["active"] -= 1
+        if fail_on and fail_on in text:
+            return None
+        return text.encode(), len(text) / 15
+    return synthesize, state
+
+def test_splitter_cuts_on_sentence_ends_and_merges_short_ones():
+    splitter = SentenceSplitter(min_chars=10)
+    sentences = []
+    for token in ["Sí. ", "Entiendo lo", " que dices.", " ¿Quieres", " hablar de ello?", "\n", "Vale 3.5 ", "puntos"]:
+        sentences += splitter.feed(token)
+    assert sentences == ["Sí. Entiendo lo que dices.", "¿Quieres hablar de ello?"]
+    # Sin puntuación final, la última frase sale al vaciar el búfer
+    assert splitter.flush() == "Vale 3.5 puntos"
+    assert splitter.flush() == ""
+
+def test_segments_arrive_in_order_while_synthesis_runs_concurrently(runtime):
+    synthesize, state = _fake_synthesizer()
+    pipeline = SentenceTTSPipeline(synthesize, max_concurrency=3, min_sentence_chars=5, runtime=runtime)
+    # La primera frase es la más larga: las siguientes terminan antes pero se entregan después
+    sentences = ["Esta es una primera frase bastante larga de verdad.", "Corta dos.", "Corta tres.", "Final"]
+    for sentence in sentences:
+        pipeline.feed(sentence + " ")
+    pipeline.finish()
+
+    segments = list(pipeline.segments)
+    assert [segment["text"] for segment in segments] == sentences
+    assert [segment["index"] for segment in segments] == [0, 1, 2, 3]
+    assert 1 < state["max_active"] <= 3
+    assert pipeline.result(timeout=1.0) == segments
+    metrics = pipeline.get_metrics()
+    assert metrics["sentences"] == metrics["segments"] == 4
+
+def test_first_audio_arrives_before_the_response_finishes(runtime):
+    synthesize, _ = _fake_synthesizer(seconds_per_char=0.001)
+    pipeline = SentenceTTSPipeline(synthesize, min_sentence_chars=5, runtime=runtime)
+    segments = iter(pipeline.segments)
+
+    # Un LLM lento: la primera frase suena mientras el resto se sigue generando
+    pipeline.feed("Hola, te escucho con atención. ")
+    first = next(segments)
+    assert first["index"] == 0
+    for token in ["Cuéntame ", "más ", "sobre ", "tu ", "día."]:
+        time.sleep(0.05)
+        pipeline.feed(token)
+    pipeline.finish()
+    assert [segment["text"] for segment in segments] == ["Cuéntame más sobre tu día."]
+    metrics = pipeline.get_metrics()
+    assert metrics["first_audio_ms"] < 150
+
+def test_failed_sentences_are_skipped_and_finish_closes_an_empty_pipeline(runtime):
+    synthesize, _ = _fake_synthesizer(fail_on="falla")
+    pipeline = SentenceTTSPipeline(synthesize, min_sentence_chars=5, runtime=runtime)
+    pipeline.feed("Primera frase. Esta falla. Tercera frase.")
+    pipeline.finish()
+    pipeline.finish()
+    assert [segment["text"] for segment in pipeline.segments] == ["Primera frase.", "Tercera frase."]
+
+    empty = SentenceTTSPipeline(synthesize, runtime=runtime)
+    empty.finish()
+    assert list(empty.segments) == []
+    assert empty.get_metrics()["first_audio_ms"] is None
+
+def test_volume_boost_runs_off_the_event_loop(runtime, monkeypatch):
+    from src.audio import tts_player
+    saved = []
+
+    class FakeCommunicate:
+        def __init__(self, text, voice):
+            pass
+
+        async def save(self, path):
+            saved.append(path)
+
+    def slow_boost(path):
+        time.sleep(0.3)  # decodificación y recodificación con ffmpeg
+        return b"mp3", 1.5
+
+    monkeypatch.setattr(tts_player, "Communicate", FakeCommunicate)
+    monkeypatch.setattr(tts_player, "_boost_volume", slow_boost)
+
+    async def ticker(stop):
+        ticks = 0
+        while not stop.is_set():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks
+
+    async def scenario():
+        stop = asyncio.Event()
+        ticks = asyncio.ensure_future(ticker(stop))
+        segment = await tts_player.synthesize_segment_edge("Hola, te escucho.")
+        stop.set()
+        return segment, await ticks
+
+    segment, ticks = runtime.run(scenario(), timeout=5)
+    assert segment == (b"mp3", 1.5)
+    # El bucle siguió atendiendo otras tareas mientras se procesaba el audio
+    assert ticks >= 10
+    assert saved and not os.path.exists(saved[0])
@@ -0,0 +1,102 @@
+# tests/unit/test_turn_pipeline.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import threading
+import time
+import pytest
+from src.chat.turn_pipeline import Stage, StageSkipped, TurnPipeline
+
+def _sleeper(seconds, value=None):
+    def func(ctx):
+        time.sleep(seconds)
+        return value
+    return func
+
+def test_independent_stages_overlap_and_background_stays_off_the_critical_path():
+    release = threading.Event()
+    pipeline = TurnPipeline([
+        Stage("transcription", _sleeper(0.2, "hola")),
+        Stage("vocal", _sleeper(0.2, "neu")),
+        Stage("llm", lambda ctx: f"{ctx['transcription']}|{ctx['vocal']}", deps=("transcription", "vocal")),
+        Stage("memory", lambda ctx: release.wait(2.0) and ctx["llm"], deps=("llm",), critical=False),
+    ])
+    start = time.perf_counter()
+    result = pipeline.run({"session_id": 1})
+    elapsed = time.perf_counter() - start
+
+    # Ruta crítica ≈ max(0.2, 0.2), no 0.4; la etapa de fondo sigue pendiente
+    assert elapsed < 0.35
+    assert result.get("llm") == "hola|neu"
+    assert result.get("session_id") == 1
+    assert "memory" not in result.status
+
+    release.set()
+    assert result.wait_background(timeout=2.0)
+    assert result.status["memory"] == "ok"
+    summary = result.timings_summary()
+    assert summary["stages"]["transcription"]["start_ms"] < summary["stages"]["vocal"]["end_ms"]
+    assert summary["stages"]["memory"]["end_ms"] >= summary["critical_ms"]
+
+def test_skips_and_errors_propagate_to_dependents():
+    def no_speech(ctx):
+        raise StageSkipped()
+
+    def broken(ctx):
+        raise RuntimeError("fallo")
+
+    pipeline = TurnPipeline([
+        Stage("decode", no_speech),
+        Stage("transcription", lambda ctx: "x", deps=("decode",)),
+        Stage("other", broken),
+        Stage("after_other", lambda ctx: "y", deps=("other",)),
+    ])
+    result = pipeline.run()
+    assert result.status == {"decode": "skipped", "transcription": "skipped", "other": "error", "after_other": "skipped"}
+    assert isinstance(result.errors["other"], RuntimeError)
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        TurnPipeline([Stage("a", None, deps=("b",)), Stage("b", None, deps=("a",))])
+    with pytest.raises(ValueError):
+        TurnPipeline([Stage("a", None, deps=("missing",))])
+    with pytest.raises(ValueError):
+        TurnPipeline([Stage("bg", None, critical=False), Stage("a", None, deps=("bg",))])
+
+def test_on_complete_fires_after_background_stages():
+    finished = threading.Event()
+    pipeline = TurnPipeline([
+        Stage("llm", lambda ctx: "respuesta"),
+        Stage("save", _sleeper(0.1, True), deps=("llm",), critical=False),
+    ])
+    result = pipeline.run()
+    result.on_complete(lambda turn: finished.set())
+    assert finished.wait(2.0)
+    assert result.status["save"] == "ok"
+
+def test_concurrent_turns_do_not_wait_for_each_others_threads():
+    # Como las etapas llm y tts, cada turno ocupa su hilo mientras dura la respuesta
+    release = threading.Event()
+    running = []
+    lock = threading.Lock()
+
+    def streaming(ctx):
+        with lock:
+            running.append(ctx["session_id"])
+        release.wait(2.0)
+        return ctx["session_id"]
+
+    pipeline = TurnPipeline([Stage("transcription", _sleeper(0.01, "hola")),
+                             Stage("llm", streaming, deps=("transcription",))])
+    turns = [pipeline.start({"session_id": i}) for i in range(8)]
+    deadline = time.monotonic() + 1.0
+    while len(running) < 8 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # Las ocho sesiones están en la etapa llm a la vez
+    assert sorted(running) == list(range(8))
+    release.set()
+    assert [turn.wait_critical(timeout=2.0).get("llm") for turn in turns] == list(range(8))
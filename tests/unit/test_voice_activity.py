@@ -0,0 +1,70 @@
+# tests/unit/test_voice_activity.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+import soundfile as sf
+import io
+from src.analysis.voice_activity import EnergyVAD, trim_to_speech, voiced_samples
+from src.audio.audio_ingestion import decode_audio_segment, encode_audio
+from pydub import AudioSegment
+
+SR = 16000
+
+def _tone(seconds, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def _noise(seconds, amplitude=0.001, seed=0):
+    return np.random.default_rng(seed).normal(0, amplitude, int(seconds * SR)).astype(np.float32)
+
+def test_trims_leading_and_trailing_silence():
+    audio = np.concatenate([_noise(1.0), _tone(1.0), _noise(0.1, seed=1), _tone(0.5), _noise(1.5, seed=2)])
+    vad = EnergyVAD(padding_ms=0)
+    result = vad.detect(audio, SR)
+
+    # La pausa corta entre las dos frases se une en un único segmento
+    assert len(result["segments"]) == 1
+    start, end = result["segments"][0]
+    assert abs(start / SR - 1.0) < 0.05
+    assert abs(end / SR - 2.6) < 0.05
+    assert 0.35 < result["speech_ratio"] < 0.45
+    assert len(trim_to_speech(audio, result["segments"])) == end - start
+
+def test_long_pause_splits_segments_and_voiced_drops_it():
+    audio = np.concatenate([_noise(0.5), _tone(0.6), _noise(1.0, seed=1), _tone(0.6), _noise(0.5, seed=2)])
+    result = EnergyVAD(padding_ms=0).detect(audio, SR)
+
+    assert len(result["segments"]) == 2
+    voiced = voiced_samples(audio, result["segments"])
+    assert abs(len(voiced) / SR - 1.2) < 0.1
+    # El recorte conserva la pausa intermedia; la concatenación no
+    assert len(trim_to_speech(audio, result["segments"])) > len(voiced)
+
+def test_silence_and_clicks_are_not_speech():
+    silence = _noise(2.0)
+    assert EnergyVAD().detect(silence, SR)["segments"] == []
+    assert EnergyVAD().detect(np.zeros(SR, dtype=np.float32), SR)["speech_ratio"] == 0.0
+
+    clicked = silence.copy()
+    clicked[SR:SR + 800] = _tone(0.05)
+    assert EnergyVAD().detect(clicked, SR)["segments"] == []
+
+def test_decode_once_and_lossless_upload():
+    stereo = (np.stack([_tone(0.5), _tone(0.5)], axis=1) * 32767).astype(np.int16)
+    segment = AudioSegment(stereo.tobytes(), frame_rate=SR, sample_width=2, channels=2)
+    samples = decode_audio_segment(segment, SR)
+    assert samples.dtype == np.float32 and len(samples) == len(stereo)
+    assert np.allclose(samples, _tone(0.5), atol=1e-3)
+
+    wav, wav_mime = encode_audio(samples, SR, "wav")
+    flac, flac_mime = encode_audio(samples, SR, "flac")
+    assert (wav_mime, flac_mime) == ("audio/wav", "audio/flac")
+    assert len(flac) < len(wav)
+    decoded, sample_rate = sf.read(io.BytesIO(flac), dtype="float32")
+    assert sample_rate == SR
+    assert np.allclose(decoded, samples, atol=1e-4)
@@ -0,0 +1,48 @@
+# tests/unit/test_voice_emotion_batching.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+import pytest
+pytest.importorskip("onnx")
+from tests.standins.voice_emotion_model import build_group_norm_recognizer, load_recognizer
+
+@pytest.fixture(params=["sintetico", "real"])
+def recognizer(request, tmp_path):
+    recognizer = load_recognizer(request.param, tmp_path)
+    if recognizer is None:
+        pytest.skip("No se encontró el modelo exportado por lotes en 'ai_resources/'.")
+    return recognizer
+
+def _chunks(recognizer, seconds):
+    rng = np.random.default_rng(1)
+    return [rng.normal(0, 0.1, int(s * recognizer.target_sampling_rate)).astype(np.float32) for s in seconds]
+
+def test_padding_changes_the_valid_frames(tmp_path):
+    # Comprueba que el grafo sintético reproduce el problema: rellenar altera los frames válidos
+    recognizer = build_group_norm_recognizer(tmp_path)
+    chunk = _chunks(recognizer, [2.0])[0]
+    input_values, _ = recognizer._extract_features([chunk])
+    padded = np.concatenate([input_values, np.zeros((1, 300), dtype=np.float32)], axis=1)
+    alone = recognizer.session.run(None, {"input_values": input_values, "attention_mask": np.ones_like(input_values, dtype=np.int64)})[0]
+    with_padding = recognizer.session.run(None, {"input_values": padded, "attention_mask": np.ones_like(padded, dtype=np.int64)})[0]
+    assert not np.allclose(alone[0], with_padding[0, :alone.shape[1]], atol=1e-3)
+
+def test_batched_logits_match_per_chunk_logits(recognizer):
+    # Segmentos completos de 10 s más un resto, como en `_split_chunks`
+    chunks = _chunks(recognizer, [10.0, 10.0, 3.7])
+    batched = recognizer._predict_logits_batch(chunks)
+    per_chunk = np.concatenate([recognizer._predict_logits_batch([chunk]) for chunk in chunks])
+    assert batched.shape == per_chunk.shape
+    np.testing.assert_allclose(batched, per_chunk, atol=1e-4)
+
+def test_result_does_not_depend_on_co_batched_utterances(recognizer):
+    target, other = _chunks(recognizer, [4.2, 7.9])
+    alone = recognizer.predict_arrays([target])[0]
+    co_batched = recognizer.predict_arrays([other, target])[1]
+    assert [p["label"] for p in co_batched] == [p["label"] for p in alone]
+    assert [p["score"] for p in co_batched] == pytest.approx([p["score"] for p in alone], abs=1e-5)
@@ -0,0 +1,50 @@
+# tests/unit/test_voice_streaming.py
+
+import sys
+import os
+from pathlib import Path
+REPO_ROOT = Path(os.path.dirname(os.path.abspath(__file__))).parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+import numpy as np
+import pytest
+from src.analysis.voice_emotion import BaseEmotionRecognizer
+
+class FakeRecognizer(BaseEmotionRecognizer):
+    """Reconocedor sin modelo: los logits dependen de la energía y la media del segmento."""
+    def __init__(self):
+        self.id2label = {0: "neu", 1: "ang"}
+        self.target_sampling_rate = 100
+        self.calls = 0
+
+    def _predict_logits(self, chunk):
+        self.calls += 1
+        return np.array([[float(np.mean(chunk)), float(np.mean(np.abs(chunk)))]])
+
+def test_stream_matches_predict_and_does_work_early():
+    audio = np.random.default_rng(0).normal(0, 0.5, 2550).astype(np.float32)
+    recognizer = FakeRecognizer()
+    expected = recognizer.predict_array(audio, chunk_length_s=10.0)
+
+    recognizer.calls = 0
+    stream = recognizer.start_stream(chunk_length_s=10.0, hop_s=None)
+    for start in range(0, len(audio), 170):
+        stream.push(audio[start:start + 170])
+    # Los dos segmentos completos de 10 s ya se infirieron durante la grabación
+    assert recognizer.calls == 2
+
+    result = stream.finish()
+    assert recognizer.calls == 3
+    assert [p["label"] for p in result] == [p["label"] for p in expected]
+    assert [p["score"] for p in result] == pytest.approx([p["score"] for p in expected], abs=1e-6)
+
+def test_rolling_estimates_and_int16_input():
+    recognizer = FakeRecognizer()
+    stream = recognizer.start_stream(window_s=2.0, hop_s=1.0)
+    pcm = (np.ones(250) * 16384).astype(np.int16)
+
+    estimate = stream.push(pcm.tobytes())
+    assert estimate is not None and estimate[0]["label"] in {"NEU", "ANG"}
+    assert len(stream.rolling_estimates) == 1
+    assert stream.duration_s == pytest.approx(2.5)
+    assert len(stream.finish()) == 2